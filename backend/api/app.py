@@ -2,7 +2,6 @@
 import os
 import re
 import click
-import sqlite3
 import json
 from functools import wraps
 from flask import Flask, request, jsonify, g, make_response
@@ -16,24 +15,36 @@ import sys
 import yaml
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-import random
 
 # Utility and blueprint imports
 from .util import get_db, close_db, init_db, require_auth, jsonify_success, jsonify_error, verify_google_token
 from .strategy import strategy_api
-from .utils.cache import cache_api_lru
+from .utils.user_cache import get_user_profile, ensure_user_profile, update_user_profile, user_profile_cache_info
+from .utils.player_record import RecordJSONProvider
+from .utils.dataset_artifact import artifact_enabled, artifact_info
 from .routes.giocatori import routes_giocatori
 from .routes.auction_log import routes_auction_log
 from .routes.credit import routes_credit
 from .routes.league_settings import routes_league_settings
+from .routes.stripe_webhook import routes_stripe_webhook
+from .routes.bootstrap import routes_bootstrap
+from .utils.checkout import fulfil_checkout_session, get_cached_session_status, session_grant
+from .utils.firestore_dal import get_doc, register_read_counter, USER_PROFILE_FIELDS
+from .utils.sqlite_writer import run_sqlite_write, sqlite_writer_info
+from backend.database.migrations import migrate_database
+from .utils.writes import write_league_settings, write_auction_log, spend_ai_credit, write_tos_acceptance
 
 
 # Load credits config
 with open(os.path.join(os.path.dirname(__file__), 'credits_config.yaml'), 'r') as f:
     CREDITS_PER_PLAN = yaml.safe_load(f)
 
+PAID_STATUSES = ('paid', 'no_payment_required')
+
 def create_app():
     app = Flask(__name__)
+    # jsonify() also accepts compact player records
+    app.json = RecordJSONProvider(app)
     # Configuration
     app.config['SQLITE_PATH'] = os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db')
     app.config['FRONTEND_URL'] = os.getenv('FRONTEND_URL', 'http://localhost:5173')
@@ -51,6 +62,15 @@ def create_app():
     # Stripe setup
     stripe.api_key = app.config['STRIPE_SECRET_KEY']
 
+    # Schema migrations (idempotent; concurrent workers apply each version once)
+    if os.getenv('RUN_MIGRATIONS', '1') == '1':
+        migrate_database(sqlite_path=app.config['SQLITE_PATH'])
+
+    # Load the published player artifact before serving (fails fast if none is reachable)
+    if artifact_enabled():
+        from .routes.giocatori import get_players_dataset
+        get_players_dataset(os.getenv('DB_TYPE', 'sqlite'), app.config['SQLITE_PATH'])
+
     # Handle CORS preflight for /api/*
     @app.before_request
     def handle_global_options():
@@ -69,18 +89,59 @@ def create_app():
 
     # Teardown DB
     app.teardown_appcontext(close_db)
+    register_read_counter(app)
 
     # CLI: init-db
     @app.cli.command('init-db')
     def init_db_command():
         init_db(app.config['SQLITE_PATH'])
-        click.echo('Initialized the database.')
+        applied = migrate_database(sqlite_path=app.config['SQLITE_PATH'])
+        click.echo(f'Initialized the database (migrations applied: {applied or "none"}).')
+
+    # CLI: stripe-fake-event (local fake Stripe event source, signed with STRIPE_WEBHOOK_SECRET)
+    @app.cli.command('stripe-fake-event')
+    @click.argument('google_sub')
+    @click.option('--plan', default='basic')
+    @click.option('--credits', default=0, type=int)
+    @click.option('--session-id', default=None)
+    @click.option('--status', 'payment_status', default='paid')
+    def stripe_fake_event_command(google_sub, plan, credits, session_id, payment_status):
+        secret = os.getenv('STRIPE_WEBHOOK_SECRET')
+        if not secret:
+            raise click.ClickException('STRIPE_WEBHOOK_SECRET not set')
+        metadata = {'plan': plan, 'credits': str(credits)} if credits else {'plan': plan}
+        payload = json.dumps({
+            'id': f"evt_fake_{int(time.time() * 1000)}",
+            'object': 'event',
+            'type': 'checkout.session.completed',
+            'data': {'object': {
+                'id': session_id or f"cs_fake_{int(time.time() * 1000)}",
+                'object': 'checkout.session',
+                'client_reference_id': google_sub,
+                'payment_status': payment_status,
+                'metadata': metadata,
+            }},
+        })
+        timestamp = int(time.time())
+        import hmac
+        signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+        resp = app.test_client().post(
+            '/api/stripe-webhook', data=payload, content_type='application/json',
+            headers={'Stripe-Signature': f"t={timestamp},v1={signature}"}
+        )
+        click.echo(f"{resp.status_code} {resp.get_data(as_text=True)}")
 
     # Health check
     @app.route('/api/health', methods=['GET'])
     def health():
         return jsonify_success({'status': 'ok'})
 
+    # Cache statistics (hit ratios) for monitoring
+    @app.route('/api/cache-stats', methods=['GET'])
+    def cache_stats():
+        return jsonify_success({'user_profile': user_profile_cache_info(), 'sqlite_writer': sqlite_writer_info(),
+                                'dataset_artifact': artifact_info()})
+
     # --- /api/me ---
     @app.route('/api/me', methods=['GET'])
     @require_auth
@@ -88,59 +149,15 @@ def create_app():
         sub = g.user_id
         db_type = os.getenv('DB_TYPE', 'sqlite')
         db = get_db()
-        tos_accepted = False
-        if db_type == 'firestore':
-            user_ref = db.collection('users').document(sub)
-            user_doc = user_ref.get()
-            if not user_doc.exists:
-                plan = 'free'
-                # Create user if not exists
-                user_ref.set({'plan': plan, 
-                              'email': g.user_email, 
-                              'created_at': firestore.SERVER_TIMESTAMP, 
-                              'ai_credits': CREDITS_PER_PLAN['credits_per_plan'][plan]}, 
-                             merge=True)
-                tos_accepted = False
-            else:
-                user_data = user_doc.to_dict()
-                plan = user_data.get('plan', 'free')
-                ai_credits = user_data.get('ai_credits', 0)
-                tos_accepted = bool(user_data.get('tos_version'))
-            return jsonify_success({
-                'plan': plan,
-                'email': g.user_email,
-                'picture': g.user_picture,
-                'sub': sub,
-                'ai_credits': ai_credits,
-                'tos_accepted': tos_accepted
-            })
-        else:
-            # Check if user exists
-            row = db.execute("SELECT plan, ai_credits FROM users WHERE google_sub = ?", (sub,)).fetchone()
-            if not row:
-                plan = 'free'
-                credits = CREDITS_PER_PLAN.get(plan, 0)
-                db.execute(
-                    "INSERT INTO users (google_sub, plan, ai_credits) VALUES (?, ?, ?)",
-                    (sub, plan, credits)
-                )
-                db.commit()
-                ai_credits = credits
-                tos_accepted = False
-            else:
-                plan = row['plan']
-                ai_credits = row['ai_credits']
-                # Check tos_acceptance table
-                tos_row = db.execute("SELECT version FROM tos_acceptance WHERE google_sub = ?", (sub,)).fetchone()
-                tos_accepted = bool(tos_row)
-            return jsonify_success({
-                'plan': plan,
-                'email': g.user_email,
-                'picture': g.user_picture,
-                'sub': sub,
-                'ai_credits': ai_credits,
-                'tos_accepted': tos_accepted
-            })
+        profile = ensure_user_profile(sub, db, db_type, g.user_email, CREDITS_PER_PLAN['credits_per_plan']['free'])
+        return jsonify_success({
+            'plan': profile['plan'],
+            'email': g.user_email,
+            'picture': g.user_picture,
+            'sub': sub,
+            'ai_credits': profile['ai_credits'],
+            'tos_accepted': profile['tos_accepted']
+        })
 
     # --- /api/create-checkout-session ---
     @app.route('/api/create-checkout-session', methods=['POST'])
@@ -185,56 +202,32 @@ def create_app():
             return jsonify_error('stripe_error', e.user_message or 'Could not create checkout session', 500)
 
     # --- /api/checkout-session ---
+    # Fulfilment is driven by /api/stripe-webhook; the success page reads the locally cached status.
+    # Without STRIPE_WEBHOOK_SECRET we fall back to retrieving and fulfilling the session inline.
+    def _load_checkout_status(db, db_type, session_id):
+        status = get_cached_session_status(db, db_type, session_id, g.user_id)
+        if status and status['payment_status'] in PAID_STATUSES:
+            return status
+        if os.getenv('STRIPE_WEBHOOK_SECRET'):
+            return status
+        session = stripe.checkout.Session.retrieve(session_id)
+        if session.client_reference_id != g.user_id:
+            return None
+        fulfil_checkout_session(db, db_type, session)
+        return get_cached_session_status(db, db_type, session_id, g.user_id)
+
     @app.route('/api/checkout-session', methods=['GET'])
     @require_auth
     def get_checkout_session():
         session_id = request.args.get('sessionId')
-        credits = request.args.get('credits', 0)
         if not session_id:
             return jsonify_error('missing_session', 'Missing sessionId')
         try:
-            session = stripe.checkout.Session.retrieve(session_id, expand=['payment_intent'])
-            db_type = os.getenv('DB_TYPE', 'sqlite')
-            db = get_db()
-            if session.payment_status in ('paid', 'complete') and session.metadata:
-                plan = session.metadata.get('plan')
-                credits = CREDITS_PER_PLAN.get(plan, 0) if credits == 0 else int(credits)
-                if db_type == 'firestore':
-                    user_ref = db.collection('users').document(session.client_reference_id)
-                    user_doc = user_ref.get()
-                    last_session_id = None
-                    current_credits = 0
-                    if user_doc.exists:
-                        user_data = user_doc.to_dict()
-                        last_session_id = user_data.get('last_session_id')
-                        current_credits = user_data.get('ai_credits', 0)
-                    if last_session_id != session.id:
-                        # If this is a topup (not a plan change), add credits to existing
-                        if plan == user_data.get('plan'):
-                            new_credits = current_credits + credits
-                        else:
-                            new_credits = credits
-                        user_ref.set({'plan': plan, 'ai_credits': new_credits, 'last_session_id': session.id}, merge=True)
-                else:
-                    # processed_sessions table is always present from init.sql
-                    already_processed = db.execute(
-                        "SELECT 1 FROM processed_sessions WHERE session_id = ?", (session.id,)
-                    ).fetchone()
-                    if not already_processed:
-                        db.execute(
-                            "UPDATE users SET plan = ?, ai_credits = ai_credits + ?, last_credits_update = CURRENT_TIMESTAMP, last_session_id = ? WHERE google_sub = ?",
-                            (plan, credits, session.id, session.client_reference_id)
-                        )
-                        db.execute(
-                            "INSERT INTO processed_sessions (session_id, google_sub) VALUES (?, ?)",
-                            (session.id, session.client_reference_id)
-                        )
-                        db.commit()
-            return jsonify_success({
-                'id': session.id,
-                'payment_status': session.payment_status,
-                'metadata': session.metadata,
-            })
+            status = _load_checkout_status(get_db(), os.getenv('DB_TYPE', 'sqlite'), session_id)
+            if status is None:
+                # Webhook not received yet: the success page polls again
+                return jsonify_success({'id': session_id, 'payment_status': 'pending', 'metadata': {}})
+            return jsonify_success(status)
         except Exception:
             app.logger.exception('Error retrieving checkout session')
             return jsonify_error('stripe_error', 'Could not retrieve session', 500)
@@ -243,83 +236,18 @@ def create_app():
     @require_auth
     def post_checkout_session():
         data = request.get_json() or {}
-        plan = data.get('plan')
-        credits = data.get('credits')
-        current_plan = data.get('current_plan')
         session_id = data.get('sessionId')
-        if not session_id or (plan is None and credits is None):
-            return jsonify_error('missing_data', 'Missing plan/credits or sessionId')
+        if not session_id:
+            return jsonify_error('missing_data', 'Missing sessionId')
         try:
-            session = stripe.checkout.Session.retrieve(session_id)
-            db_type = os.getenv('DB_TYPE', 'sqlite')
-            db = get_db()
-            meta = session.metadata or {}
-            # If credits is present, this is a credit top-up
-            if credits is not None:
-                credits = int(credits)
-                if credits <= 0:
-                    return jsonify_error('invalid_credits', 'Credits must be > 0')
-                if db_type == 'firestore':
-                    user_ref = db.collection('users').document(session.client_reference_id)
-                    user_doc = user_ref.get()
-                    last_session_id = None
-                    current_credits = 0
-                    if user_doc.exists:
-                        user_data = user_doc.to_dict()
-                        last_session_id = user_data.get('last_session_id')
-                        current_credits = user_data.get('ai_credits', 0)
-                    if last_session_id != session.id:
-                        new_credits = current_credits + credits
-                        # Do NOT change plan, just add credits
-                        user_ref.set({'ai_credits': new_credits, 'last_session_id': session.id}, merge=True)
-                else:
-                    already_processed = db.execute(
-                        "SELECT 1 FROM processed_sessions WHERE session_id = ?", (session.id,)
-                    ).fetchone()
-                    if not already_processed:
-                        db.execute(
-                            "UPDATE users SET ai_credits = ai_credits + ?, last_credits_update = CURRENT_TIMESTAMP, last_session_id = ? WHERE google_sub = ?",
-                            (credits, session.id, session.client_reference_id)
-                        )
-                        db.execute(
-                            "INSERT INTO processed_sessions (session_id, google_sub) VALUES (?, ?)",
-                            (session.id, session.client_reference_id)
-                        )
-                        db.commit()
-                return jsonify_success({'status': 'updated', 'credits': credits, 'plan': current_plan})
-            # Otherwise, this is a plan change
-            else:
-                credits_to_set = CREDITS_PER_PLAN.get(plan, 0)
-                if db_type == 'firestore':
-                    user_ref = db.collection('users').document(session.client_reference_id)
-                    user_doc = user_ref.get()
-                    last_session_id = None
-                    current_credits = 0
-                    if user_doc.exists:
-                        user_data = user_doc.to_dict()
-                        last_session_id = user_data.get('last_session_id')
-                        current_credits = user_data.get('ai_credits', 0)
-                    if last_session_id != session.id:
-                        if plan == user_data.get('plan'):
-                            new_credits = current_credits + credits_to_set
-                        else:
-                            new_credits = credits_to_set
-                        user_ref.set({'plan': plan, 'ai_credits': new_credits, 'last_session_id': session.id}, merge=True)
-                else:
-                    already_processed = db.execute(
-                        "SELECT 1 FROM processed_sessions WHERE session_id = ?", (session.id,)
-                    ).fetchone()
-                    if not already_processed:
-                        db.execute(
-                            "UPDATE users SET plan = ?, ai_credits = ai_credits + ?, last_credits_update = CURRENT_TIMESTAMP, last_session_id = ? WHERE google_sub = ?",
-                            (plan, credits_to_set, session.id, session.client_reference_id)
-                        )
-                        db.execute(
-                            "INSERT INTO processed_sessions (session_id, google_sub) VALUES (?, ?)",
-                            (session.id, session.client_reference_id)
-                        )
-                        db.commit()
-                return jsonify_success({'status': 'updated', 'plan': plan, 'credits': credits_to_set})
+            status = _load_checkout_status(get_db(), os.getenv('DB_TYPE', 'sqlite'), session_id)
+            if status is None or status['payment_status'] not in PAID_STATUSES:
+                return jsonify_success({'status': 'pending'})
+            # Plan and credits always come from the session metadata, never from the client
+            plan, credits, is_topup = session_grant(status)
+            if is_topup:
+                return jsonify_success({'status': 'updated', 'credits': credits, 'plan': data.get('current_plan')})
+            return jsonify_success({'status': 'updated', 'plan': plan, 'credits': credits})
         except Exception:
             app.logger.exception('Error updating plan after checkout')
             return jsonify_error('stripe_error', 'Could not update plan', 500)
@@ -360,26 +288,7 @@ def create_app():
                 int(bool(data.get('useDefensiveModifier'))),
             )
             try:
-                db.execute(
-                    '''
-                    INSERT INTO league_settings (
-                        google_sub, participants, budget, participant_names,
-                        n_gk_players, n_def_players, n_mid_players, n_fwd_players,
-                        use_clean_sheet_bonus, use_defensive_modifier
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(google_sub) DO UPDATE SET
-                    participants=excluded.participants,
-                    budget=excluded.budget,
-                    participant_names=excluded.participant_names,
-                    n_gk_players=excluded.n_gk_players,
-                    n_def_players=excluded.n_def_players,
-                    n_mid_players=excluded.n_mid_players,
-                    n_fwd_players=excluded.n_fwd_players,
-                    use_clean_sheet_bonus=excluded.use_clean_sheet_bonus,
-                    use_defensive_modifier=excluded.use_defensive_modifier
-                    ''' , vals
-                )
-                db.commit()
+                run_sqlite_write(write_league_settings, vals)
                 return jsonify_success()
             except Exception:
                 app.logger.exception('Error saving league settings')
@@ -392,11 +301,9 @@ def create_app():
         db_type = os.getenv('DB_TYPE', 'sqlite')
         db = get_db()
         if db_type == 'firestore':
-            doc_ref = db.collection('league_settings').document(g.user_id)
-            doc = doc_ref.get()
-            if not doc.exists:
+            row = get_doc(db, 'league_settings', g.user_id)
+            if row is None:
                 return jsonify_success({'settings': None})
-            row = doc.to_dict()
             try:
                 settings = {
                     'participants': row.get('participants'),
@@ -440,89 +347,7 @@ def create_app():
                 app.logger.exception('Error loading league settings')
                 return jsonify_error('corrupted', 'Corrupted data')
 
-    # --- /api/giocatori ---
-    @cache_api_lru(maxsize=1024, ttl=60*24)  # Cache for 24 hours
-    # @cache_api_lru(maxsize=128, ttl=1)  # Cache for 24 hours
-    def get_giocatori_cached(db_type, db_path):
-        if db_type == 'firestore':
-            db = get_db()
-            giocatori_ref = db.collection('giocatori')
-            docs = giocatori_ref.stream()
-            giocatori = [doc.to_dict() | {'id': doc.id} for doc in docs if doc.id != 'init']
-            if not giocatori:
-                # merge_and_update_players()
-                docs = giocatori_ref.stream()
-                giocatori = [doc.to_dict() | {'id': doc.id} for doc in docs if doc.id != 'init']
-            return giocatori
-        else:
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute('SELECT * FROM giocatori').fetchall()
-            if not rows:
-                # merge_and_update_players()
-                rows = conn.execute('SELECT * FROM giocatori').fetchall()
-            conn.close()
-            return [dict(r) for r in rows]
-
-    @app.route('/api/giocatori', methods=['GET'])
-    @require_auth
-    def get_giocatori():
-        db_type = os.getenv('DB_TYPE', 'sqlite')
-        db_path = os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db')
-        giocatori = get_giocatori_cached(db_type, db_path)
-        # Fetch user plan
-        plan = 'free'
-        if db_type == 'firestore':
-            db = get_db()
-            user_ref = db.collection('users').document(g.user_id)
-            user_doc = user_ref.get()
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                plan = user_data.get('plan', 'free')
-        else:
-            db = get_db()
-            row = db.execute("SELECT plan FROM users WHERE google_sub = ?", (g.user_id,)).fetchone()
-            if row:
-                plan = row['plan']
-        # If free plan, return a stratified random sample (e.g., 30 players by recommendation)
-        if plan == 'free' and len(giocatori) > 30:
-            from collections import defaultdict
-            # Group by recommendation (rounded to int, fallback 0)
-            groups = defaultdict(list)
-            for p in giocatori:
-                try:
-                    rec = int(round(float(p.get('stars', 1))))
-                except Exception:
-                    rec = 1
-                groups[rec].append(p)
-            # Define how many to sample from each group (proportional, but at least 1 if group not empty)
-            total = 30
-            rec_levels = sorted(groups.keys(), reverse=True)  # e.g., 5,4,3,2,1,0
-            group_sizes = {k: len(groups[k]) for k in rec_levels}
-            total_players = sum(group_sizes.values())
-            # Proportional allocation
-            stratified = []
-            remaining = total
-            for i, k in enumerate(rec_levels):
-                if i == len(rec_levels) - 1:
-                    n = remaining  # all remaining
-                else:
-                    n = max(1, int(round(total * group_sizes[k] / total_players)))
-                    n = min(n, group_sizes[k])
-                if n > 0:
-                    stratified.extend(random.sample(groups[k], n))
-                remaining -= n
-                if remaining <= 0:
-                    break
-            # If not enough, fill up with randoms
-            if len(stratified) < total:
-                leftovers = [p for k in rec_levels for p in groups[k] if p not in stratified]
-                needed = total - len(stratified)
-                if leftovers:
-                    stratified.extend(random.sample(leftovers, min(needed, len(leftovers))))
-            random.shuffle(stratified)
-            giocatori = stratified[:total]
-        return jsonify_success({'giocatori': giocatori})
+    # /api/giocatori is served by routes_giocatori (shared dataset cache + ETag)
 
     # --- /api/save-auction-log ---
     @app.route('/api/save-auction-log', methods=['POST'])
@@ -539,15 +364,7 @@ def create_app():
         else:
             # Store as JSON string in new table auction_log
             try:
-                db.execute(
-                    '''
-                    INSERT INTO auction_log (google_sub, auction_log)
-                    VALUES (?, ?)
-                    ON CONFLICT(google_sub) DO UPDATE SET auction_log=excluded.auction_log
-                    ''',
-                    (g.user_id, json.dumps(auction_log))
-                )
-                db.commit()
+                run_sqlite_write(write_auction_log, g.user_id, json.dumps(auction_log))
                 return jsonify_success()
             except Exception:
                 app.logger.exception('Error saving auction log')
@@ -560,11 +377,9 @@ def create_app():
         db_type = os.getenv('DB_TYPE', 'sqlite')
         db = get_db()
         if db_type == 'firestore':
-            doc_ref = db.collection('auction_logs').document(g.user_id)
-            doc = doc_ref.get()
-            if not doc.exists:
+            row = get_doc(db, 'auction_logs', g.user_id, fields=['auctionLog'])
+            if row is None:
                 return jsonify_success({'auctionLog': {}})
-            row = doc.to_dict()
             return jsonify_success({'auctionLog': row.get('auctionLog', {})})
         else:
             row = db.execute(
@@ -593,10 +408,9 @@ def create_app():
             cost = 0
         if db_type == 'firestore':
             user_ref = db.collection('users').document(sub)
-            user_doc = user_ref.get()
-            if not user_doc.exists:
+            user_data = get_doc(db, 'users', sub, fields=USER_PROFILE_FIELDS)
+            if user_data is None:
                 return jsonify_error('no_credits', 'Crediti AI esauriti', 403)
-            user_data = user_doc.to_dict()
             ai_credits = user_data.get('ai_credits', 0)
             api_cost = user_data.get('api_cost', 0)
             spent_credits = user_data.get('spent_credits', 0)
@@ -608,6 +422,7 @@ def create_app():
                 'api_cost': firestore.Increment(cost),
                 'spent_credits': firestore.Increment(1)
             })
+            update_user_profile(sub, ai_credits=ai_credits - 1, api_cost=api_cost + cost, spent_credits=spent_credits + 1)
             return jsonify_success({
                 'ai_credits': ai_credits - 1,
                 'api_cost': api_cost + cost,
@@ -617,16 +432,16 @@ def create_app():
         else:
             # Use a transaction to ensure atomicity
             try:
-                cur = db.execute("SELECT ai_credits, api_cost, spent_credits FROM users WHERE google_sub = ?", (sub,))
-                row = cur.fetchone()
-                if not row or row['ai_credits'] < 1:
+                row = run_sqlite_write(spend_ai_credit, sub, cost)
+                if row is None:
                     return jsonify_error('no_credits', 'Crediti AI esauriti', 403)
-                db.execute("UPDATE users SET ai_credits = ai_credits - 1, api_cost = api_cost + ?, spent_credits = spent_credits + 1 WHERE google_sub = ? AND ai_credits > 0", (cost, sub))
-                db.commit()
+                # api_cost is NUMERIC: a Decimal on Postgres
+                api_cost = float(row['api_cost'])
+                update_user_profile(sub, ai_credits=row['ai_credits'], api_cost=api_cost, spent_credits=row['spent_credits'])
                 return jsonify_success({
-                    'ai_credits': row['ai_credits'] - 1,
-                    'api_cost': row['api_cost'] + cost,
-                    'spent_credits': row['spent_credits'] + 1,
+                    'ai_credits': row['ai_credits'],
+                    'api_cost': api_cost,
+                    'spent_credits': row['spent_credits'],
                     'call_cost': cost
                 })
             except Exception:
@@ -637,23 +452,11 @@ def create_app():
     @app.route('/api/check-credit', methods=['GET'])
     @require_auth
     def check_credit():
-        sub = g.user_id
-        db_type = os.getenv('DB_TYPE', 'sqlite')
-        db = get_db()
-        if db_type == 'firestore':
-            user_ref = db.collection('users').document(sub)
-            user_doc = user_ref.get()
-            if not user_doc.exists:
-                return jsonify_success({'has_credit': False, 'ai_credits': 0})
-            user_data = user_doc.to_dict()
-            ai_credits = user_data.get('ai_credits', 0)
-            return jsonify_success({'has_credit': ai_credits > 0, 'ai_credits': ai_credits})
-        else:
-            row = db.execute("SELECT ai_credits FROM users WHERE google_sub = ?", (sub,)).fetchone()
-            if not row:
-                return jsonify_success({'has_credit': False, 'ai_credits': 0})
-            ai_credits = row['ai_credits']
-            return jsonify_success({'has_credit': ai_credits > 0, 'ai_credits': ai_credits})
+        profile = get_user_profile(g.user_id, get_db(), os.getenv('DB_TYPE', 'sqlite'))
+        if not profile:
+            return jsonify_success({'has_credit': False, 'ai_credits': 0})
+        ai_credits = profile['ai_credits']
+        return jsonify_success({'has_credit': ai_credits > 0, 'ai_credits': ai_credits})
 
     # --- /api/accept-tos ---
     @app.route('/api/accept-tos', methods=['POST'])
@@ -665,28 +468,21 @@ def create_app():
         db_type = os.getenv('DB_TYPE', 'sqlite')
         db = get_db()
         if db_type == 'firestore':
-            user_ref = db.collection('users').document(sub)
-            user_doc = user_ref.get()
-            if not user_doc.exists:
-                user_ref.set({'tos_version': version, 'tos_accepted_at': firestore.SERVER_TIMESTAMP}, merge=True)
-            else:
-                user_ref.update({'tos_version': version, 'tos_accepted_at': firestore.SERVER_TIMESTAMP})
+            # merge=True creates or updates the doc without reading it first
+            db.collection('users').document(sub).set({'tos_version': version, 'tos_accepted_at': firestore.SERVER_TIMESTAMP}, merge=True)
+            update_user_profile(sub, tos_accepted=True)
             return jsonify_success({'status': 'accepted', 'version': version})
         else:
             # SQLite: upsert into tos_acceptance table
-            db.execute(
-                '''
-                INSERT INTO tos_acceptance (google_sub, version, accepted_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(google_sub) DO UPDATE SET version=excluded.version, accepted_at=CURRENT_TIMESTAMP
-                ''',
-                (sub, version)
-            )
-            db.commit()
+            run_sqlite_write(write_tos_acceptance, sub, version)
+            update_user_profile(sub, tos_accepted=True)
             return jsonify_success({'status': 'accepted', 'version': version})
 
     # --- Flask-Limiter setup ---
-    limiter = Limiter(get_remote_address, default_limits=["60 per minute"])
+    # Per-IP default limit; set RATE_LIMIT_STORAGE_URI (e.g. redis://...) to share it across workers.
+    # Per-user, plan-aware limits on the AI endpoints live in utils/rate_limit.py
+    limiter = Limiter(get_remote_address, default_limits=["60 per minute"],
+                      storage_uri=os.getenv('RATE_LIMIT_STORAGE_URI', 'memory://'))
     limiter.init_app(app)
     app.limiter = limiter  # Attach to app for blueprint access
 
@@ -695,6 +491,8 @@ def create_app():
     app.register_blueprint(routes_auction_log)
     app.register_blueprint(routes_credit)
     app.register_blueprint(routes_league_settings)
+    app.register_blueprint(routes_stripe_webhook)
+    app.register_blueprint(routes_bootstrap)
     app.register_blueprint(strategy_api, url_prefix='/api')
     from backend.api.gemini_api import gemini_api
     app.register_blueprint(gemini_api, url_prefix='/api/gemini')
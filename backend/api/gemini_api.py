@@ -3,8 +3,9 @@ import os
 import logging
 import google.genai as genai
 from google.genai import types
-from flask import Blueprint, request, current_app
+from flask import Blueprint, request
 from .util import require_auth, jsonify_success, jsonify_error
+from .utils.rate_limit import plan_rate_limit
 import time
 
 # --- GEMINI AI ENDPOINTS ---
@@ -15,12 +16,6 @@ grounding_tool = types.Tool(google_search=types.GoogleSearch())
 logger = logging.getLogger("gemini_api")
 logging.basicConfig(level=logging.INFO)
 
-def get_limiter():
-    try:
-        return current_app.limiter
-    except Exception:
-        return None
-
 # GEMINI_MODEL = "gemini-2.5-flash-lite-preview-06-17"
 GEMINI_MODEL = "gemini-2.5-flash"
 ROLE_NAMES = {
@@ -87,10 +82,8 @@ def compute_gemini_cost(model, input_tokens, output_tokens, input_type="default"
 
 @gemini_api.route('/aggregated-analysis', methods=['POST'])
 @require_auth
+@plan_rate_limit('aggregated-analysis')
 def gemini_aggregated_analysis():
-    limiter = get_limiter()
-    if limiter:
-        limiter.limit("20/minute")(lambda: None)()
     data = request.get_json() or {}
     players = data.get('players', [])
     role = data.get('role')
@@ -168,10 +161,8 @@ def gemini_aggregated_analysis():
 
 @gemini_api.route('/detailed-analysis', methods=['POST'])
 @require_auth
+@plan_rate_limit('detailed-analysis')
 def gemini_detailed_analysis():
-    limiter = get_limiter()
-    if limiter:
-        limiter.limit("20/minute")(lambda: None)()
     data = request.get_json() or {}
     player_name = data.get('playerName')
     player_team = data.get('playerTeam')
@@ -272,10 +263,8 @@ def gemini_detailed_analysis():
 
 @gemini_api.route('/bidding-advice', methods=['POST'])
 @require_auth
+@plan_rate_limit('bidding-advice')
 def gemini_bidding_advice():
-    limiter = get_limiter()
-    if limiter:
-        limiter.limit("20/minute")(lambda: None)()
     data = request.get_json() or {}
     player = data.get('player')
     my_team = data.get('myTeam', [])
@@ -3,6 +3,9 @@ import sqlite3
 import json
 from flask import Blueprint, request, g
 from ..util import get_db, jsonify_success, require_auth
+from ..utils.firestore_dal import get_doc
+from ..utils.sqlite_writer import run_sqlite_write
+from ..utils.writes import write_auction_log
 
 routes_auction_log = Blueprint('routes_auction_log', __name__)
 
@@ -19,15 +22,7 @@ def save_auction_log():
         return jsonify_success()
     else:
         try:
-            db.execute(
-                '''
-                INSERT INTO auction_log (google_sub, auction_log)
-                VALUES (?, ?)
-                ON CONFLICT(google_sub) DO UPDATE SET auction_log=excluded.auction_log
-                ''',
-                (g.user_id, json.dumps(auction_log))
-            )
-            db.commit()
+            run_sqlite_write(write_auction_log, g.user_id, json.dumps(auction_log))
             return jsonify_success()
         except Exception:
             return jsonify_success({'error': 'Could not save auction log'})
@@ -38,11 +33,9 @@ def get_auction_log():
     db_type = os.getenv('DB_TYPE', 'sqlite')
     db = get_db()
     if db_type == 'firestore':
-        doc_ref = db.collection('auction_logs').document(g.user_id)
-        doc = doc_ref.get()
-        if not doc.exists:
+        row = get_doc(db, 'auction_logs', g.user_id, fields=['auctionLog'])
+        if row is None:
             return jsonify_success({'auctionLog': {}})
-        row = doc.to_dict()
         return jsonify_success({'auctionLog': row.get('auctionLog', {})})
     else:
         row = db.execute(
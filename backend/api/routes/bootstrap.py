@@ -0,0 +1,140 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, g
+from ..util import get_db, require_auth
+from ..utils.user_cache import ensure_user_profile, set_user_profile
+from ..utils.checkout import CREDITS_PER_PLAN
+from ..utils.player_record import records_response
+from ..utils.firestore_dal import get_docs, count_reads, STRATEGY_TARGET_FIELDS
+from .giocatori import get_players_dataset, players_payload
+
+routes_bootstrap = Blueprint('routes_bootstrap', __name__)
+
+DEFAULT_ROLE_BUDGET = {
+    'role_budget_gk': 8,
+    'role_budget_def': 12,
+    'role_budget_mid': 30,
+    'role_budget_fwd': 50
+}
+
+# Shared by all requests: runs the Firestore targets query next to the get_all RPC
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='bootstrap')
+
+
+def _league_settings_payload(row, participant_names):
+    return {
+        'participants': row.get('participants'),
+        'budget': row.get('budget'),
+        'participantNames': participant_names,
+        'roster': {
+            'P': row.get('n_gk_players', 3),
+            'D': row.get('n_def_players', 8),
+            'C': row.get('n_mid_players', 8),
+            'A': row.get('n_fwd_players', 6),
+        },
+        'useCleanSheetBonus': bool(row.get('use_clean_sheet_bonus', 0)),
+        'useDefensiveModifier': bool(row.get('use_defensive_modifier', 0)),
+    }
+
+
+def _load_user_state_firestore(db, sub):
+    """One get_all for the per-user documents, with the targets query in parallel."""
+    targets_query = db.collection('strategy_board_targets').where('google_sub', '==', sub).select(STRATEGY_TARGET_FIELDS)
+    targets_future = _executor.submit(lambda: [doc.to_dict() for doc in targets_query.stream()])
+    refs = {
+        'user': db.collection('users').document(sub),
+        'settings': db.collection('league_settings').document(sub),
+        'budget': db.collection('strategy_board').document(sub),
+        'auction_log': db.collection('auction_logs').document(sub),
+    }
+    by_path = get_docs(db, refs.values())
+    data = {key: by_path[ref.path] for key, ref in refs.items()}
+
+    if data['user'] is not None:
+        set_user_profile(sub, {
+            'plan': data['user'].get('plan', 'free'),
+            'ai_credits': data['user'].get('ai_credits', 0),
+            'api_cost': data['user'].get('api_cost', 0),
+            'spent_credits': data['user'].get('spent_credits', 0),
+            'tos_accepted': bool(data['user'].get('tos_version')),
+        })
+    settings = data['settings']
+    target_players = targets_future.result()
+    # Counted here: the worker thread has no app context
+    count_reads(max(len(target_players), 1))
+    return {
+        'settings': _league_settings_payload(settings, settings.get('participantNames', [])) if settings else None,
+        'role_budget': data['budget'] or dict(DEFAULT_ROLE_BUDGET),
+        'auction_log': (data['auction_log'] or {}).get('auctionLog', {}),
+        'target_players': target_players,
+    }
+
+
+def _load_user_state_sql(db, db_type, sub):
+    """All per-user rows read inside one read transaction (consistent snapshot)."""
+    if db_type == 'postgres':
+        db.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+    else:
+        db.execute('BEGIN')
+    try:
+        settings_row = db.execute("SELECT * FROM league_settings WHERE google_sub = ?", (sub,)).fetchone()
+        budget_row = db.execute(
+            "SELECT role_budget_gk, role_budget_def, role_budget_mid, role_budget_fwd FROM strategy_board WHERE google_sub = ?",
+            (sub,)
+        ).fetchone()
+        target_rows = db.execute(
+            "SELECT player_id AS id, max_bid FROM strategy_board_targets WHERE google_sub = ?", (sub,)
+        ).fetchall()
+        log_row = db.execute("SELECT auction_log FROM auction_log WHERE google_sub = ?", (sub,)).fetchone()
+    finally:
+        db.commit()
+    settings = None
+    if settings_row:
+        settings_row = dict(settings_row)
+        settings = _league_settings_payload(settings_row, json.loads(settings_row['participant_names'] or '[]'))
+    return {
+        'settings': settings,
+        'role_budget': dict(budget_row) if budget_row else dict(DEFAULT_ROLE_BUDGET),
+        'auction_log': json.loads(log_row['auction_log']) if log_row else {},
+        'target_players': [dict(row) for row in target_rows],
+    }
+
+
+@routes_bootstrap.route('/api/bootstrap', methods=['GET'])
+@require_auth
+def bootstrap():
+    """
+    Everything the app needs at start in one round trip: profile, league settings,
+    strategy board, auction log and the player list with its dataset version.
+    Pass ?players_version=<version> to skip the player list when it has not changed.
+    """
+    sub = g.user_id
+    db_type = os.getenv('DB_TYPE', 'sqlite')
+    db_path = os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db')
+    db = get_db()
+    if db_type == 'firestore':
+        state = _load_user_state_firestore(db, sub)
+    else:
+        state = _load_user_state_sql(db, db_type, sub)
+    profile = ensure_user_profile(sub, db, db_type, g.user_email, CREDITS_PER_PLAN['credits_per_plan']['free'])
+
+    dataset = get_players_dataset(db_type, db_path)
+    players_not_modified = profile['plan'] != 'free' and request.args.get('players_version') == dataset['version']
+    giocatori = None if players_not_modified else players_payload(dataset, profile['plan'])
+    return records_response({
+        'me': {
+            'plan': profile['plan'],
+            'email': g.user_email,
+            'picture': g.user_picture,
+            'sub': sub,
+            'ai_credits': profile['ai_credits'],
+            'tos_accepted': profile['tos_accepted'],
+        },
+        'settings': state['settings'],
+        'strategy_board': {'target_players': state['target_players'], 'role_budget': state['role_budget']},
+        'auctionLog': state['auction_log'],
+        'giocatori': giocatori,
+        'players_version': dataset['version'],
+        'players_not_modified': players_not_modified,
+    })
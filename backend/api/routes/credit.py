@@ -1,6 +1,10 @@
 import os
 from flask import Blueprint, request, g
 from ..util import get_db, jsonify_success, jsonify_error, require_auth
+from ..utils.user_cache import get_user_profile, update_user_profile
+from ..utils.firestore_dal import get_doc, USER_PROFILE_FIELDS
+from ..utils.sqlite_writer import run_sqlite_write
+from ..utils.writes import spend_ai_credit, write_tos_acceptance
 from google.cloud import firestore
 
 routes_credit = Blueprint('routes_credit', __name__)
@@ -19,10 +23,9 @@ def use_ai_credit():
         cost = 0
     if db_type == 'firestore':
         user_ref = db.collection('users').document(sub)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
+        user_data = get_doc(db, 'users', sub, fields=USER_PROFILE_FIELDS)
+        if user_data is None:
             return jsonify_error('no_credits', 'Crediti AI esauriti', 403)
-        user_data = user_doc.to_dict()
         ai_credits = user_data.get('ai_credits', 0)
         api_cost = user_data.get('api_cost', 0)
         spent_credits = user_data.get('spent_credits', 0)
@@ -33,6 +36,7 @@ def use_ai_credit():
             'api_cost': firestore.Increment(cost),
             'spent_credits': firestore.Increment(1)
         })
+        update_user_profile(sub, ai_credits=ai_credits - 1, api_cost=api_cost + cost, spent_credits=spent_credits + 1)
         return jsonify_success({
             'ai_credits': ai_credits - 1,
             'api_cost': api_cost + cost,
@@ -41,16 +45,16 @@ def use_ai_credit():
         })
     else:
         try:
-            cur = db.execute("SELECT ai_credits, api_cost, spent_credits FROM users WHERE google_sub = ?", (sub,))
-            row = cur.fetchone()
-            if not row or row['ai_credits'] < 1:
+            row = run_sqlite_write(spend_ai_credit, sub, cost)
+            if row is None:
                 return jsonify_error('no_credits', 'Crediti AI esauriti', 403)
-            db.execute("UPDATE users SET ai_credits = ai_credits - 1, api_cost = api_cost + ?, spent_credits = spent_credits + 1 WHERE google_sub = ? AND ai_credits > 0", (cost, sub))
-            db.commit()
+            # api_cost is NUMERIC: a Decimal on Postgres
+            api_cost = float(row['api_cost'])
+            update_user_profile(sub, ai_credits=row['ai_credits'], api_cost=api_cost, spent_credits=row['spent_credits'])
             return jsonify_success({
-                'ai_credits': row['ai_credits'] - 1,
-                'api_cost': row['api_cost'] + cost,
-                'spent_credits': row['spent_credits'] + 1,
+                'ai_credits': row['ai_credits'],
+                'api_cost': api_cost,
+                'spent_credits': row['spent_credits'],
                 'call_cost': cost
             })
         except Exception:
@@ -59,23 +63,11 @@ def use_ai_credit():
 @routes_credit.route('/api/check-credit', methods=['GET'])
 @require_auth
 def check_credit():
-    sub = g.user_id
-    db_type = os.getenv('DB_TYPE', 'sqlite')
-    db = get_db()
-    if db_type == 'firestore':
-        user_ref = db.collection('users').document(sub)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            return jsonify_success({'has_credit': False, 'ai_credits': 0})
-        user_data = user_doc.to_dict()
-        ai_credits = user_data.get('ai_credits', 0)
-        return jsonify_success({'has_credit': ai_credits > 0, 'ai_credits': ai_credits})
-    else:
-        row = db.execute("SELECT ai_credits FROM users WHERE google_sub = ?", (sub,)).fetchone()
-        if not row:
-            return jsonify_success({'has_credit': False, 'ai_credits': 0})
-        ai_credits = row['ai_credits']
-        return jsonify_success({'has_credit': ai_credits > 0, 'ai_credits': ai_credits})
+    profile = get_user_profile(g.user_id, get_db(), os.getenv('DB_TYPE', 'sqlite'))
+    if not profile:
+        return jsonify_success({'has_credit': False, 'ai_credits': 0})
+    ai_credits = profile['ai_credits']
+    return jsonify_success({'has_credit': ai_credits > 0, 'ai_credits': ai_credits})
 
 @routes_credit.route('/api/accept-tos', methods=['POST'])
 @require_auth
@@ -86,21 +78,11 @@ def accept_tos():
     db_type = os.getenv('DB_TYPE', 'sqlite')
     db = get_db()
     if db_type == 'firestore':
-        user_ref = db.collection('users').document(sub)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            user_ref.set({'tos_version': version, 'tos_accepted_at': firestore.SERVER_TIMESTAMP}, merge=True)
-        else:
-            user_ref.update({'tos_version': version, 'tos_accepted_at': firestore.SERVER_TIMESTAMP})
+        # merge=True creates or updates the doc without reading it first
+        db.collection('users').document(sub).set({'tos_version': version, 'tos_accepted_at': firestore.SERVER_TIMESTAMP}, merge=True)
+        update_user_profile(sub, tos_accepted=True)
         return jsonify_success({'status': 'accepted', 'version': version})
     else:
-        db.execute(
-            '''
-            INSERT INTO tos_acceptance (google_sub, version, accepted_at)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(google_sub) DO UPDATE SET version=excluded.version, accepted_at=CURRENT_TIMESTAMP
-            ''',
-            (sub, version)
-        )
-        db.commit()
+        run_sqlite_write(write_tos_acceptance, sub, version)
+        update_user_profile(sub, tos_accepted=True)
         return jsonify_success({'status': 'accepted', 'version': version})
@@ -1,80 +1,236 @@
 import os
+import json
 import sqlite3
-from flask import Blueprint, request, jsonify, g
-from tqdm import tqdm
-from ..util import get_db, jsonify_success, require_auth
+from collections import defaultdict
+from flask import Blueprint, request, jsonify, g, make_response
+from ..util import get_db, jsonify_success, jsonify_error, require_auth
 from backend.api.utils.cache import cache_api_lru
+from backend.api.utils.user_cache import get_user_profile
+from backend.api.utils.firestore_dal import stream_collection
+from backend.api.utils.sqlite_profile import connect_sqlite
+from backend.api.utils.pg_backend import get_pg_connection
+from backend.api.utils.player_snapshot import refresh_snapshot, ensure_snapshot, dataset_version
+from backend.api.utils.dataset_artifact import artifact_enabled, current_artifact
+from backend.database.skills import SKILL_TAGS, mask_for, mask_matches, skills_mask, tags_from_mask
+from backend.api.utils.player_record import RawJSON, dumps_records, records_from_dicts, records_response
+import numpy as np
 import random
 
 routes_giocatori = Blueprint('routes_giocatori', __name__)
 
-@cache_api_lru(maxsize=1024, ttl=60)  # Cache for 1 hour (60 minutes)
-def get_giocatori_cached(db_type, db_path):
+FREE_PLAN_SAMPLE_SIZE = 30
+PLAYER_SNAPSHOT = os.getenv('PLAYER_SNAPSHOT', '1') == '1'
+PLAYERS_TTL = 60*24  # 24 minutes (ttl is in seconds)
+
+def load_players(db_type, db_path):
+    """Read the full player list from the configured backend as a list of dicts."""
     if db_type == 'firestore':
-        db = get_db()
-        giocatori_ref = db.collection('giocatori')
-        docs = giocatori_ref.get()
-        giocatori = [doc.to_dict() | {'id': doc.id} for doc in tqdm(docs) if doc.id != 'init']
-        return giocatori
+        return stream_collection(get_db(), 'giocatori')
+    if db_type == 'postgres':
+        conn = get_pg_connection()
     else:
-        conn = sqlite3.connect(db_path)
+        conn = connect_sqlite(db_path)
         conn.row_factory = sqlite3.Row
-        rows = conn.execute('SELECT * FROM giocatori').fetchall()
-        if not rows:
-            rows = conn.execute('SELECT * FROM giocatori').fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+    rows = conn.execute('SELECT * FROM giocatori').fetchall()
+    conn.close()
+    giocatori = [dict(r) for r in rows]
+    for p in giocatori:
+        # skills is stored as a JSON-encoded list in SQL
+        if isinstance(p.get('skills'), str):
+            try:
+                p['skills'] = json.loads(p['skills'])
+            except ValueError:
+                p['skills'] = [p['skills']]
+    return giocatori
+
+def _records_dataset(giocatori, version):
+    fields = list(dict.fromkeys(key for p in giocatori for key in p))
+    return {'snapshot': None, 'giocatori': records_from_dicts(giocatori, fields), 'version': version}
+
+@cache_api_lru(maxsize=1024, ttl=PLAYERS_TTL)
+def _db_players_dataset(db_type, db_path):
+    if PLAYER_SNAPSHOT:
+        snapshot = refresh_snapshot(lambda: load_players(db_type, db_path), max_age=PLAYERS_TTL)
+        return {'snapshot': snapshot, 'giocatori': None, 'version': snapshot.version}
+    giocatori = load_players(db_type, db_path)
+    return _records_dataset(giocatori, dataset_version(giocatori))
+
+def _build_artifact_dataset(manifest, load):
+    if PLAYER_SNAPSHOT:
+        # Only the first worker downloads the artifact; the others map its snapshot
+        snapshot = ensure_snapshot(manifest['dataset_version'], load)
+        return {'snapshot': snapshot, 'giocatori': None, 'version': snapshot.version}
+    return _records_dataset(load(), manifest['dataset_version'])
+
+def get_players_dataset(db_type, db_path):
+    """
+    The player dataset together with its version (a content hash usable as an ETag
+    by /api/giocatori and /api/bootstrap): from the published artifact when
+    DATASET_ARTIFACT_URI is set, otherwise from the database once per TTL.
+    With PLAYER_SNAPSHOT=1 the players live in the shared memory-mapped snapshot
+    and only the requested rows are materialized.
+    """
+    if artifact_enabled():
+        return current_artifact(_build_artifact_dataset)[1]
+    return _db_players_dataset(db_type, db_path)
+
+def dataset_players(dataset, indices=None):
+    """Player records of the dataset (only the rows at `indices` when given)."""
+    snapshot = dataset['snapshot']
+    if snapshot is not None:
+        return snapshot.records(indices)
+    giocatori = dataset['giocatori']
+    return giocatori if indices is None else [giocatori[i] for i in indices]
+
+def query_players(dataset, position=None, team=None, sort=None, descending=False, limit=None,
+                  skills=None, skills_match='any'):
+    """
+    Filter by position/team and skill tags (any/all), sort on a numeric column.
+    Vectorized on the snapshot; raises ValueError on an unknown skill tag.
+    """
+    where = {k: v for k, v in (('position', position), ('current_team', team)) if v is not None}
+    snapshot = dataset['snapshot']
+    if snapshot is not None:
+        if any(name not in snapshot.kinds for name in where):
+            return []
+        return snapshot.records(snapshot.select(where, sort, descending, limit, skills, skills_match))
+    players = [p for p in dataset['giocatori'] if all(p.get(k) == v for k, v in where.items())]
+    if skills:
+        query_mask = mask_for(skills)
+        players = [p for p in players if mask_matches(skills_mask(p.get('skills')), query_mask, skills_match)]
+    if sort is not None:
+        def key(p):
+            v = p.get(sort)
+            missing = not isinstance(v, (int, float)) or v != v
+            return (missing, 0 if missing else (-v if descending else v))
+        players.sort(key=key)
+    return players[:limit] if limit is not None else players
+
+def skill_counts(dataset):
+    """Players per skill tag, in dictionary order."""
+    snapshot = dataset['snapshot']
+    if snapshot is not None:
+        return snapshot.skill_counts()
+    counts = dict.fromkeys(SKILL_TAGS, 0)
+    for p in dataset['giocatori']:
+        for tag in tags_from_mask(skills_mask(p.get('skills'))):
+            counts[tag] += 1
+    return counts
+
+def get_giocatori_cached(db_type, db_path):
+    return dataset_players(get_players_dataset(db_type, db_path))
+
+def _star_level(stars):
+    try:
+        return int(round(float(stars)))
+    except Exception:
+        return 1
+
+def _stratified_sample(items, levels, total):
+    """Random sample of `total` items stratified by level (proportional, at least 1 per level)."""
+    # Group by recommendation level
+    groups = defaultdict(list)
+    for item, level in zip(items, levels):
+        groups[level].append(item)
+    rec_levels = sorted(groups.keys(), reverse=True)
+    group_sizes = {k: len(groups[k]) for k in rec_levels}
+    total_players = sum(group_sizes.values())
+    stratified = []
+    remaining = total
+    for i, k in enumerate(rec_levels):
+        if i == len(rec_levels) - 1:
+            n = remaining
+        else:
+            n = max(1, int(round(total * group_sizes[k] / total_players)))
+            n = min(n, group_sizes[k])
+        if n > 0:
+            stratified.extend(random.sample(groups[k], n))
+        remaining -= n
+        if remaining <= 0:
+            break
+    # If not enough, fill up with randoms
+    if len(stratified) < total:
+        chosen = set(map(id, stratified))
+        leftovers = [p for k in rec_levels for p in groups[k] if id(p) not in chosen]
+        needed = total - len(stratified)
+        if leftovers:
+            stratified.extend(random.sample(leftovers, min(needed, len(leftovers))))
+    random.shuffle(stratified)
+    return stratified[:total]
+
+def sample_players_for_plan(giocatori, plan):
+    """Free plan gets a stratified random sample (by stars), other plans the full list."""
+    if plan != 'free' or len(giocatori) <= FREE_PLAN_SAMPLE_SIZE:
+        return giocatori
+    levels = [_star_level(p.get('stars', 1)) for p in giocatori]
+    return _stratified_sample(giocatori, levels, FREE_PLAN_SAMPLE_SIZE)
+
+def players_for_plan(dataset, plan):
+    """sample_players_for_plan on a dataset, building records only for the sampled rows."""
+    snapshot = dataset['snapshot']
+    if snapshot is None:
+        return sample_players_for_plan(dataset['giocatori'], plan)
+    if plan != 'free' or len(snapshot) <= FREE_PLAN_SAMPLE_SIZE:
+        return snapshot.records()
+    if snapshot.kinds.get('stars') in ('int', 'float'):
+        stars = np.asarray(snapshot.column('stars'), dtype=np.float64)
+        levels = np.rint(np.nan_to_num(stars, nan=1.0)).astype(np.int64).tolist()
+    else:
+        levels = [_star_level(p.get('stars', 1)) for p in snapshot.rows(columns=['stars'])] \
+            if 'stars' in snapshot.kinds else [1] * len(snapshot)
+    indices = _stratified_sample(list(range(len(snapshot))), levels, FREE_PLAN_SAMPLE_SIZE)
+    return snapshot.records(indices)
+
+def full_players_json(dataset):
+    """The full player list, JSON-encoded once per dataset version."""
+    encoded = dataset.get('players_json')
+    if encoded is None:
+        encoded = dataset['players_json'] = RawJSON(dumps_records(dataset_players(dataset)))
+    return encoded
+
+def players_payload(dataset, plan):
+    """Player list for a response: the pre-encoded full list, or the free-plan sample."""
+    if plan != 'free':
+        return full_players_json(dataset)
+    return players_for_plan(dataset, plan)
 
 @routes_giocatori.route('/api/giocatori', methods=['GET'])
 @require_auth
 def get_giocatori():
     db_type = os.getenv('DB_TYPE', 'sqlite')
     db_path = os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db')
-    giocatori = get_giocatori_cached(db_type, db_path)
-    plan = 'free'
-    if db_type == 'firestore':
-        db = get_db()
-        user_ref = db.collection('users').document(g.user_id)
-        user_doc = user_ref.get()
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
-            plan = user_data.get('plan', 'free')
-    else:
-        db = get_db()
-        row = db.execute("SELECT plan FROM users WHERE google_sub = ?", (g.user_id,)).fetchone()
-        if row:
-            plan = row['plan']
-    if plan == 'free' and len(giocatori) > 30:
-        from collections import defaultdict
-        groups = defaultdict(list)
-        for p in giocatori:
+    dataset = get_players_dataset(db_type, db_path)
+    profile = get_user_profile(g.user_id, get_db(), db_type)
+    plan = profile['plan'] if profile else 'free'
+    if plan != 'free':
+        filters = {
+            'position': request.args.get('position'),
+            'team': request.args.get('team'),
+            'sort': request.args.get('sort'),
+            'skills': [t for t in request.args.get('skills', '').split(',') if t.strip()],
+        }
+        if any(filters.values()) or request.args.get('limit'):
+            limit = request.args.get('limit', type=int)
+            descending = request.args.get('order', 'asc') == 'desc'
+            skills_match = 'all' if request.args.get('skills_match') == 'all' else 'any'
             try:
-                rec = int(round(float(p.get('stars', 1))))
-            except Exception:
-                rec = 1
-            groups[rec].append(p)
-        total = 30
-        rec_levels = sorted(groups.keys(), reverse=True)
-        group_sizes = {k: len(groups[k]) for k in rec_levels}
-        total_players = sum(group_sizes.values())
-        stratified = []
-        remaining = total
-        for i, k in enumerate(rec_levels):
-            if i == len(rec_levels) - 1:
-                n = remaining
-            else:
-                n = max(1, int(round(total * group_sizes[k] / total_players)))
-                n = min(n, group_sizes[k])
-            if n > 0:
-                stratified.extend(random.sample(groups[k], n))
-            remaining -= n
-            if remaining <= 0:
-                break
-        if len(stratified) < total:
-            leftovers = [p for k in rec_levels for p in groups[k] if p not in stratified]
-            needed = total - len(stratified)
-            if leftovers:
-                stratified.extend(random.sample(leftovers, min(needed, len(leftovers))))
-        random.shuffle(stratified)
-        giocatori = stratified[:total]
-    return jsonify_success({'giocatori': giocatori})
+                players = query_players(dataset, descending=descending, limit=limit, skills_match=skills_match, **filters)
+            except ValueError as e:
+                return jsonify_error('bad_request', f"Filtro skill non valido: {e}")
+            return records_response({'giocatori': players})
+        # Full list is deterministic for paid plans, so it can be revalidated by ETag
+        if request.if_none_match.contains(dataset['version']):
+            return make_response('', 304)
+        response = records_response({'giocatori': full_players_json(dataset)})
+        response.set_etag(dataset['version'])
+        return response
+    return records_response({'giocatori': players_for_plan(dataset, plan)})
+
+@routes_giocatori.route('/api/giocatori/skills', methods=['GET'])
+@require_auth
+def get_skill_counts():
+    """Skill tag dictionary with the number of players per tag."""
+    db_type = os.getenv('DB_TYPE', 'sqlite')
+    db_path = os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db')
+    counts = skill_counts(get_players_dataset(db_type, db_path))
+    return jsonify_success({'skills': [{'tag': tag, 'count': count} for tag, count in counts.items()]})
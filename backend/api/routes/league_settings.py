@@ -3,6 +3,9 @@ import sqlite3
 import json
 from flask import Blueprint, request, g
 from ..util import get_db, jsonify_success, require_auth
+from ..utils.firestore_dal import get_doc
+from ..utils.sqlite_writer import run_sqlite_write
+from ..utils.writes import write_league_settings
 
 routes_league_settings = Blueprint('routes_league_settings', __name__)
 
@@ -41,26 +44,7 @@ def save_league_settings():
             int(bool(data.get('useDefensiveModifier'))),
         )
         try:
-            db.execute(
-                '''
-                INSERT INTO league_settings (
-                    google_sub, participants, budget, participant_names,
-                    n_gk_players, n_def_players, n_mid_players, n_fwd_players,
-                    use_clean_sheet_bonus, use_defensive_modifier
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(google_sub) DO UPDATE SET
-                participants=excluded.participants,
-                budget=excluded.budget,
-                participant_names=excluded.participant_names,
-                n_gk_players=excluded.n_gk_players,
-                n_def_players=excluded.n_def_players,
-                n_mid_players=excluded.n_mid_players,
-                n_fwd_players=excluded.n_fwd_players,
-                use_clean_sheet_bonus=excluded.use_clean_sheet_bonus,
-                use_defensive_modifier=excluded.use_defensive_modifier
-                ''' , vals
-            )
-            db.commit()
+            run_sqlite_write(write_league_settings, vals)
             return jsonify_success()
         except Exception:
             return jsonify_success({'error': 'Could not save settings'})
@@ -71,11 +55,9 @@ def get_league_settings():
     db_type = os.getenv('DB_TYPE', 'sqlite')
     db = get_db()
     if db_type == 'firestore':
-        doc_ref = db.collection('league_settings').document(g.user_id)
-        doc = doc_ref.get()
-        if not doc.exists:
+        row = get_doc(db, 'league_settings', g.user_id)
+        if row is None:
             return jsonify_success({'settings': None})
-        row = doc.to_dict()
         try:
             settings = {
                 'participants': row.get('participants'),
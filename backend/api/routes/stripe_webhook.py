@@ -0,0 +1,46 @@
+import os
+import logging
+import stripe
+from flask import Blueprint, request
+from ..util import get_db, jsonify_success, jsonify_error
+from ..utils.checkout import fulfil_checkout_session
+
+routes_stripe_webhook = Blueprint('routes_stripe_webhook', __name__)
+logger = logging.getLogger("stripe_webhook")
+
+FULFIL_EVENTS = (
+    'checkout.session.completed',
+    'checkout.session.async_payment_succeeded',
+    'checkout.session.async_payment_failed',
+    'checkout.session.expired',
+)
+
+
+@routes_stripe_webhook.route('/api/stripe-webhook', methods=['POST'])
+def stripe_webhook():
+    """
+    Stripe calls this endpoint (no user auth) when a checkout session changes state.
+    The payload is authenticated with the Stripe-Signature header.
+    """
+    secret = os.getenv('STRIPE_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify_error('webhook_disabled', 'STRIPE_WEBHOOK_SECRET not configured', 503)
+    payload = request.get_data()
+    sig_header = request.headers.get('Stripe-Signature', '')
+    try:
+        event = stripe.Webhook.construct_event(payload, sig_header, secret)
+    except ValueError:
+        return jsonify_error('invalid_payload', 'Invalid payload')
+    except stripe.error.SignatureVerificationError:
+        return jsonify_error('invalid_signature', 'Invalid signature')
+
+    if event['type'] in FULFIL_EVENTS:
+        session = event['data']['object']
+        try:
+            applied = fulfil_checkout_session(get_db(), os.getenv('DB_TYPE', 'sqlite'), session)
+        except Exception:
+            logger.exception('Error fulfilling checkout session %s', session.get('id'))
+            # Non-2xx makes Stripe retry the delivery later
+            return jsonify_error('fulfilment_error', 'Could not fulfil session', 500)
+        logger.info(f"Stripe event {event['type']} for session {session.get('id')}: applied={applied}")
+    return jsonify_success({'received': True})
@@ -3,6 +3,9 @@ import os
 from flask import Blueprint, request, make_response, g
 from google.cloud import firestore
 from .util import get_db, require_auth, jsonify_success, jsonify_error
+from .utils.firestore_dal import get_doc, query_docs, count_reads, STRATEGY_TARGET_FIELDS
+from .utils.sqlite_writer import run_sqlite_write
+from .utils.writes import write_strategy_targets, write_strategy_budget
 
 strategy_api = Blueprint('strategy_api', __name__)
 
@@ -16,12 +19,11 @@ def strategy_board():
     if request.method == 'GET':
         if db_type == 'firestore':
             targets_ref = db.collection('strategy_board_targets').where('google_sub', '==', google_sub)
-            docs = targets_ref.stream()
-            target_players = [doc.to_dict() for doc in docs]
+            target_players = query_docs(targets_ref, STRATEGY_TARGET_FIELDS)
             return jsonify_success({'strategy_board': {'target_players': target_players}})
         else:
             rows = db.execute(
-                "SELECT id, max_bid FROM strategy_board_targets WHERE google_sub = ?",
+                "SELECT player_id AS id, max_bid FROM strategy_board_targets WHERE google_sub = ?",
                 (google_sub,)
             ).fetchall()
             target_players = [dict(row) for row in rows]
@@ -33,7 +35,9 @@ def strategy_board():
         if db_type == 'firestore':
             # Delete all previous targets for this user before inserting new ones
             targets_ref = db.collection('strategy_board_targets').where('google_sub', '==', google_sub)
-            docs = list(targets_ref.stream())
+            # Only the references are needed: an empty field mask skips the document bodies
+            docs = list(targets_ref.select([]).stream())
+            count_reads(max(len(docs), 1))
             batch = db.batch()
             for doc in docs:
                 batch.delete(doc.reference)
@@ -48,19 +52,7 @@ def strategy_board():
             batch.commit()
             return jsonify_success({'message': 'Saved'})
         else:
-            # Delete all previous targets for this user before inserting new ones
-            db.execute("DELETE FROM strategy_board_targets WHERE google_sub = ?", (google_sub,))
-            for player in target_players:
-                db.execute(
-                    """
-                    INSERT INTO strategy_board_targets (google_sub, id, max_bid)
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(google_sub, id) DO UPDATE SET
-                        max_bid=excluded.max_bid
-                    """,
-                    (google_sub, player.get('id'), player.get('maxBid', 0))
-                )
-            db.commit()
+            run_sqlite_write(write_strategy_targets, google_sub, target_players)
             return jsonify_success({'message': 'Saved'})
 
 @strategy_api.route('/strategy-board-budget', methods=['GET', 'POST'])
@@ -72,11 +64,8 @@ def strategy_board_budget():
 
     if request.method == 'GET':
         if db_type == 'firestore':
-            doc_ref = db.collection('strategy_board').document(google_sub)
-            doc = doc_ref.get()
-            if doc.exists:
-                role_budget = doc.to_dict()
-            else:
+            role_budget = get_doc(db, 'strategy_board', google_sub)
+            if role_budget is None:
                 role_budget = {
                     'role_budget_gk': 8,
                     'role_budget_def': 12,
@@ -116,19 +105,7 @@ def strategy_board_budget():
             }, merge=True)
             return jsonify_success({'message': 'Saved'})
         else:
-            db.execute(
-                """
-                INSERT INTO strategy_board (google_sub, role_budget_gk, role_budget_def, role_budget_mid, role_budget_fwd)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(google_sub) DO UPDATE SET
-                    role_budget_gk=excluded.role_budget_gk,
-                    role_budget_def=excluded.role_budget_def,
-                    role_budget_mid=excluded.role_budget_mid,
-                    role_budget_fwd=excluded.role_budget_fwd
-                """,
-                (google_sub, gk, d, m, f)
-            )
-            db.commit()
+            run_sqlite_write(write_strategy_budget, google_sub, gk, d, m, f)
             return jsonify_success({'message': 'Saved'})
 
 @strategy_api.route('/strategy', methods=['DELETE'])
@@ -141,7 +118,8 @@ def delete_strategy():
     if db_type == 'firestore':
         # Delete all strategy_board_targets for this user
         targets_ref = db.collection('strategy_board_targets').where('google_sub', '==', google_sub)
-        docs = list(targets_ref.stream())
+        docs = list(targets_ref.select([]).stream())
+        count_reads(max(len(docs), 1))
         batch = db.batch()
         for doc in docs:
             batch.delete(doc.reference)
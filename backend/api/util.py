@@ -3,11 +3,12 @@ import re
 import json
 import sqlite3
 import psycopg2
-import psycopg2.extras
 from flask import request, jsonify, g
 from functools import wraps
 import requests
 from google.cloud import firestore
+from .utils.sqlite_profile import connect_sqlite
+from .utils.pg_backend import get_pg_connection
 
 
 def get_db():
@@ -18,16 +19,10 @@ def get_db():
             g.db = firestore.Client(project="fantacalcio-project", database=firestore_db)
             print(f"Using Firestore database: {firestore_db}")
         elif db_type == 'postgres':
-            g.db = psycopg2.connect(
-                dbname=os.getenv('POSTGRES_DB'),
-                user=os.getenv('POSTGRES_USER'),
-                password=os.getenv('POSTGRES_PASSWORD'),
-                host=os.getenv('POSTGRES_HOST'),
-                port=os.getenv('POSTGRES_PORT', 5432),
-                cursor_factory=psycopg2.extras.RealDictCursor
-            )
+            # Borrowed from the per-process pool, returned by close_db()
+            g.db = get_pg_connection()
         else:
-            conn = sqlite3.connect(
+            conn = connect_sqlite(
                 os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db'),
                 detect_types=sqlite3.PARSE_DECLTYPES,
             )
@@ -61,7 +56,7 @@ def init_db(db_path=None):
             conn.commit()
     else:
         sql_path = os.path.join(os.path.dirname(__file__), '../database/init.sqlite.sql')
-        with sqlite3.connect(db_path or os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db')) as conn:
+        with connect_sqlite(db_path or os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db')) as conn:
             with open(sql_path, 'r') as f:
                 conn.executescript(f.read())
 
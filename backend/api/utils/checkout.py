@@ -0,0 +1,132 @@
+import os
+import json
+import yaml
+from google.cloud import firestore
+
+from .user_cache import invalidate_user_profile
+from .firestore_dal import get_doc
+
+# Load credits config
+with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'credits_config.yaml'), 'r') as f:
+    CREDITS_PER_PLAN = yaml.safe_load(f)
+
+
+def _session_field(session, key, default=None):
+    # Works for both stripe.checkout.Session objects and plain webhook dicts
+    try:
+        value = session[key]
+    except (KeyError, TypeError):
+        value = getattr(session, key, default)
+    return default if value is None else value
+
+
+def session_grant(session):
+    """
+    Return (plan, credits, is_topup) for a checkout session from its metadata.
+    A session with metadata.credits > 0 is a credit top-up, otherwise a plan purchase.
+    """
+    meta = dict(_session_field(session, 'metadata', {}) or {})
+    plan = meta.get('plan')
+    credits = int(meta.get('credits') or 0)
+    if credits > 0:
+        return plan, credits, True
+    return plan, CREDITS_PER_PLAN['credits_per_plan'].get(plan, 0), False
+
+
+def fulfil_checkout_session(db, db_type, session):
+    """
+    Idempotently apply a paid checkout session to its user and cache its status locally.
+    A settled (paid) session is never downgraded by a later or out-of-order event.
+    Returns True if the session was applied now, False if it had already been processed.
+    """
+    session_id = _session_field(session, 'id')
+    google_sub = _session_field(session, 'client_reference_id')
+    payment_status = _session_field(session, 'payment_status', 'unpaid')
+    plan, credits, is_topup = session_grant(session)
+    metadata = dict(_session_field(session, 'metadata', {}) or {})
+
+    if db_type == 'firestore':
+        processed_ref = db.collection('processed_sessions').document(session_id)
+        user_ref = db.collection('users').document(google_sub)
+        status_ref = db.collection('checkout_sessions').document(session_id)
+
+        @firestore.transactional
+        def apply(transaction):
+            status = {'google_sub': google_sub, 'payment_status': payment_status,
+                      'metadata': metadata, 'updated_at': firestore.SERVER_TIMESTAMP}
+            processed = processed_ref.get(transaction=transaction).exists
+            if payment_status not in ('paid', 'no_payment_required') or processed:
+                # A settled session keeps its paid status whatever arrives after it
+                if not processed or payment_status in ('paid', 'no_payment_required'):
+                    transaction.set(status_ref, status, merge=True)
+                return False
+            user_doc = user_ref.get(transaction=transaction)
+            user_data = user_doc.to_dict() if user_doc.exists else {}
+            if is_topup:
+                # Do NOT change plan, just add credits
+                update = {'ai_credits': user_data.get('ai_credits', 0) + credits}
+            elif plan == user_data.get('plan'):
+                update = {'plan': plan, 'ai_credits': user_data.get('ai_credits', 0) + credits}
+            else:
+                update = {'plan': plan, 'ai_credits': credits}
+            update['last_session_id'] = session_id
+            transaction.set(user_ref, update, merge=True)
+            transaction.set(processed_ref, {'google_sub': google_sub, 'processed_at': firestore.SERVER_TIMESTAMP})
+            transaction.set(status_ref, status, merge=True)
+            return True
+
+        applied = apply(db.transaction())
+    else:
+        applied = False
+        db.execute(
+            '''
+            INSERT INTO checkout_sessions (session_id, google_sub, payment_status, metadata, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(session_id) DO UPDATE SET
+                payment_status=excluded.payment_status,
+                metadata=excluded.metadata,
+                updated_at=CURRENT_TIMESTAMP
+            WHERE checkout_sessions.payment_status NOT IN ('paid', 'no_payment_required')
+            ''',
+            (session_id, google_sub, payment_status, json.dumps(metadata))
+        )
+        if payment_status in ('paid', 'no_payment_required'):
+            # processed_sessions is the idempotency store: only the first insert applies the grant
+            cur = db.execute(
+                "INSERT INTO processed_sessions (session_id, google_sub) VALUES (?, ?) ON CONFLICT(session_id) DO NOTHING",
+                (session_id, google_sub)
+            )
+            if cur.rowcount == 1:
+                if is_topup:
+                    db.execute(
+                        "UPDATE users SET ai_credits = ai_credits + ?, last_credits_update = CURRENT_TIMESTAMP, last_session_id = ? WHERE google_sub = ?",
+                        (credits, session_id, google_sub)
+                    )
+                else:
+                    db.execute(
+                        "UPDATE users SET plan = ?, ai_credits = ai_credits + ?, last_credits_update = CURRENT_TIMESTAMP, last_session_id = ? WHERE google_sub = ?",
+                        (plan, credits, session_id, google_sub)
+                    )
+                applied = True
+        db.commit()
+    if applied:
+        invalidate_user_profile(google_sub)
+    return applied
+
+
+def get_cached_session_status(db, db_type, session_id, google_sub):
+    """Return the locally cached status of a checkout session owned by google_sub, or None."""
+    if db_type == 'firestore':
+        data = get_doc(db, 'checkout_sessions', session_id)
+        if data is None:
+            return None
+        if data.get('google_sub') != google_sub:
+            return None
+        return {'id': session_id, 'payment_status': data.get('payment_status'), 'metadata': data.get('metadata', {})}
+    row = db.execute(
+        "SELECT payment_status, metadata FROM checkout_sessions WHERE session_id = ? AND google_sub = ?",
+        (session_id, google_sub)
+    ).fetchone()
+    if not row:
+        return None
+    return {'id': session_id, 'payment_status': row['payment_status'], 'metadata': json.loads(row['metadata'] or '{}')}
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import threading
+
+from backend.database.artifact import ArtifactError, fetch_manifest, load_artifact
+
+# Serve the player dataset from published artifacts instead of the database.
+# DATASET_ARTIFACT_URI is a directory (shared volume) or an http(s) base URL.
+# LATEST.json is checked at most every DATASET_ARTIFACT_POLL_SECONDS; a new
+# version is downloaded, verified and turned into a dataset by one thread while
+# the others keep serving the current one, then swapped in with a single
+# reference assignment.
+
+DATASET_ARTIFACT_URI = os.getenv('DATASET_ARTIFACT_URI')
+ARTIFACT_POLL_SECONDS = float(os.getenv('DATASET_ARTIFACT_POLL_SECONDS', 60))
+
+_current = None  # (manifest, dataset)
+_checked_at = 0.0
+_refresh_lock = threading.Lock()
+_stats = {'checks': 0, 'swaps': 0, 'errors': 0, 'last_error': None}
+
+
+def artifact_enabled():
+    return bool(DATASET_ARTIFACT_URI)
+
+
+def _refresh(build):
+    global _current, _checked_at
+    _stats['checks'] += 1
+    manifest = fetch_manifest(DATASET_ARTIFACT_URI)
+    if _current is None or manifest['version'] != _current[0]['version']:
+        start = time.time()
+        dataset = build(manifest, lambda: load_artifact(DATASET_ARTIFACT_URI, manifest))
+        previous = _current[0]['version'] if _current else None
+        _current = (manifest, dataset)
+        _stats['swaps'] += 1
+        print(f"\033[92m[Artifact] serving {manifest['version']} ({manifest['rows']} players, was {previous}) "
+              f"in {time.time() - start:.2f}s\033[0m", file=sys.stderr)
+    _checked_at = time.time()
+
+
+def current_artifact(build):
+    """
+    (manifest, dataset) for the artifact being served, switching to the version
+    LATEST.json points at when it changes. build(manifest, load_players) makes
+    the dataset of a new version; load_players() downloads and verifies it.
+    Raises ArtifactError only if no artifact could be loaded yet.
+    """
+    global _checked_at
+    if _current is not None and time.time() - _checked_at < ARTIFACT_POLL_SECONDS:
+        return _current
+    # The first load blocks every caller; later checks are done by one thread
+    if _refresh_lock.acquire(blocking=_current is None):
+        try:
+            if _current is None or time.time() - _checked_at >= ARTIFACT_POLL_SECONDS:
+                _refresh(build)
+        except (ArtifactError, OSError, ValueError) as e:
+            _stats['errors'] += 1
+            _stats['last_error'] = str(e)
+            print(f"\033[91m[Artifact] refresh failed, keeping {_current[0]['version'] if _current else 'nothing'}: "
+                  f"{e}\033[0m", file=sys.stderr)
+            if _current is None:
+                raise
+            _checked_at = time.time()  # retry at the next poll, not on every request
+        finally:
+            _refresh_lock.release()
+    return _current
+
+
+def artifact_info():
+    return {
+        **_stats,
+        'uri': DATASET_ARTIFACT_URI,
+        'version': _current[0]['version'] if _current else None,
+        'dataset_version': _current[0]['dataset_version'] if _current else None,
+        'poll_seconds': ARTIFACT_POLL_SECONDS,
+    }
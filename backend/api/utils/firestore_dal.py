@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, has_app_context
+
+# Firestore data-access helpers: field masks for projections, get_all for
+# multi-document fetches, partitioned parallel streaming for big collections,
+# and a per-request document-read counter (exposed as X-Firestore-Reads).
+
+STREAM_PARTITIONS = int(os.getenv('FIRESTORE_STREAM_PARTITIONS', 4))
+
+# Field masks for the hot projections
+USER_PROFILE_FIELDS = ['plan', 'ai_credits', 'api_cost', 'spent_credits', 'tos_version']
+STRATEGY_TARGET_FIELDS = ['id', 'max_bid']
+
+_executor = ThreadPoolExecutor(max_workers=max(STREAM_PARTITIONS, 1), thread_name_prefix='firestore-dal')
+
+
+def count_reads(n=1):
+    """Add n document reads to the current request's counter (no-op outside a request)."""
+    if has_app_context():
+        g.firestore_reads = g.get('firestore_reads', 0) + n
+
+
+def get_doc(db, collection, doc_id, fields=None):
+    """Single document as a dict (None if missing), optionally projected on `fields`."""
+    doc = db.collection(collection).document(doc_id).get(field_paths=fields)
+    count_reads(1)
+    return doc.to_dict() if doc.exists else None
+
+
+def get_docs(db, refs, fields=None):
+    """
+    Fetch many documents in one batched RPC.
+    Returns {reference.path: dict or None} for every requested reference.
+    """
+    refs = list(refs)
+    if not refs:
+        return {}
+    result = {ref.path: None for ref in refs}
+    for doc in db.get_all(refs, field_paths=fields):
+        if doc.exists:
+            result[doc.reference.path] = doc.to_dict()
+    count_reads(len(refs))
+    return result
+
+
+def query_docs(query, fields=None):
+    """Run a query, projecting on `fields` with select() when given."""
+    if fields:
+        query = query.select(fields)
+    docs = [doc.to_dict() for doc in query.stream()]
+    count_reads(max(len(docs), 1))  # an empty query still bills one read
+    return docs
+
+
+def stream_collection(db, collection, fields=None, partitions=None, exclude_ids=('init',)):
+    """
+    Read a whole collection as a list of dicts (with 'id'), splitting it into
+    partitions that are streamed in parallel. Falls back to a single stream.
+    """
+    partitions = partitions or STREAM_PARTITIONS
+    start = time.time()
+
+    def run(query):
+        if fields:
+            query = query.select(fields)
+        return [doc.to_dict() | {'id': doc.id} for doc in query.stream() if doc.id not in exclude_ids]
+
+    queries = None
+    if partitions > 1:
+        try:
+            queries = [p.query() for p in db.collection_group(collection).get_partitions(partitions)]
+        except Exception as e:
+            print(f"\033[91m[Firestore] partitioning {collection} failed, streaming serially: {e}\033[0m", file=sys.stderr)
+    if queries and len(queries) > 1:
+        # The collection group matches this collection as long as no subcollection shares its name
+        parts = list(_executor.map(run, queries))
+        docs = [d for part in parts for d in part]
+    else:
+        docs = run(db.collection(collection))
+    count_reads(max(len(docs), 1))
+    print(f"\033[96m[Firestore] streamed {len(docs)} docs from {collection} "
+          f"in {time.time() - start:.2f}s ({len(queries or [None])} partitions)\033[0m", file=sys.stderr)
+    return docs
+
+
+def register_read_counter(app):
+    """Expose the per-request Firestore read count as a response header and in the log."""
+    @app.after_request
+    def add_firestore_reads_header(response):
+        reads = g.get('firestore_reads')
+        if reads is not None:
+            response.headers['X-Firestore-Reads'] = str(reads)
+            app.logger.info(f"[Firestore reads] {reads} docs for {response.status_code} request")
+        return response
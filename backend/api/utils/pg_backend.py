@@ -0,0 +1,149 @@
+import os
+import re
+import threading
+from functools import lru_cache
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+# Pooled Postgres backend behind the same interface the routes use with SQLite:
+# db.execute(sql with ? placeholders, params) -> cursor, db.commit(), db.close().
+# Statements run PG_PREPARE_THRESHOLD times on a connection are turned into
+# server-side prepared statements (PREPARE/EXECUTE), so hot queries skip parsing
+# and planning. Statements selecting `*` are never prepared: a prepared statement
+# keeps its result columns, so once a migration adds a column it would fail with
+# "cached plan must not change result type". JSONB values are returned as JSON
+# text, like the TEXT columns on SQLite.
+
+PG_POOL_MIN = int(os.getenv('PG_POOL_MIN', 1))
+PG_POOL_MAX = int(os.getenv('PG_POOL_MAX', 10))
+PG_POOL_TIMEOUT = float(os.getenv('PG_POOL_TIMEOUT', 10))
+PG_PREPARE_THRESHOLD = int(os.getenv('PG_PREPARE_THRESHOLD', 5))
+
+_PREPARABLE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+# SELECT * / SELECT t.* / RETURNING * (count(*) is fine: its result type is fixed)
+_STAR_COLUMNS = re.compile(r'(\bSELECT\s+(DISTINCT\s+)?|\bRETURNING\s+|,\s*)(\w+\.)?\*', re.IGNORECASE)
+
+
+def preparable(sql):
+    return bool(_PREPARABLE.match(sql)) and not _STAR_COLUMNS.search(sql)
+
+
+class _PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers its statement usage and prepared statements."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_uses = {}
+        self.prepared = {}
+        psycopg2.extras.register_default_jsonb(self, loads=lambda value: value)
+
+
+@lru_cache(maxsize=512)
+def translate_placeholders(sql):
+    """
+    Return (pyformat_sql, dollar_sql, n_params) for a statement written with ? placeholders.
+    Literal % are escaped for psycopg2; ? inside string literals is not supported.
+    """
+    parts = sql.replace('%', '%%').split('?')
+    pyformat_sql = '%s'.join(parts)
+    dollar_sql = parts[0] + ''.join(f'${i}{part}' for i, part in enumerate(parts[1:], start=1))
+    return pyformat_sql, dollar_sql.replace('%%', '%'), len(parts) - 1
+
+
+class PostgresDB:
+    """SQLite-style facade over a connection borrowed from the pool; close() gives it back."""
+
+    def __init__(self, pool, slots):
+        self._pool = pool
+        self._slots = slots
+        if not slots.acquire(timeout=PG_POOL_TIMEOUT):
+            raise psycopg2.pool.PoolError('timed out waiting for a Postgres connection')
+        try:
+            self.conn = pool.getconn()
+        except Exception:
+            slots.release()
+            raise
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def execute(self, sql, params=()):
+        pyformat_sql, dollar_sql, n_params = translate_placeholders(sql)
+        cur = self.conn.cursor()
+        name = self.conn.prepared.get(sql)
+        if name is None and preparable(sql):
+            uses = self.conn.statement_uses.get(sql, 0) + 1
+            self.conn.statement_uses[sql] = uses
+            if uses >= PG_PREPARE_THRESHOLD:
+                name = f"stmt_{len(self.conn.prepared)}"
+                cur.execute(f"PREPARE {name} AS {dollar_sql}")
+                self.conn.prepared[sql] = name
+        if name is None and n_params:
+            cur.execute(pyformat_sql, params)
+        elif name is None:
+            cur.execute(sql)
+        elif n_params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * n_params)})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
+        return cur
+
+    def executemany(self, sql, seq_of_params):
+        pyformat_sql, _, _ = translate_placeholders(sql)
+        cur = self.conn.cursor()
+        psycopg2.extras.execute_batch(cur, pyformat_sql, seq_of_params, page_size=500)
+        return cur
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    @property
+    def in_transaction(self):
+        return self.conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        if self.conn is None:
+            return
+        broken = bool(self.conn.closed)
+        if not broken and self.in_transaction:
+            self.conn.rollback()
+        self._pool.putconn(self.conn, close=broken)
+        self.conn = None
+        self._slots.release()
+
+
+_pool = None
+_pool_pid = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def get_pg_pool():
+    """Per-process pool (re-created after a fork, e.g. in each gunicorn worker)."""
+    global _pool, _pool_pid, _slots
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadedConnectionPool(
+                PG_POOL_MIN, PG_POOL_MAX,
+                dbname=os.getenv('POSTGRES_DB'),
+                user=os.getenv('POSTGRES_USER'),
+                password=os.getenv('POSTGRES_PASSWORD'),
+                host=os.getenv('POSTGRES_HOST'),
+                port=os.getenv('POSTGRES_PORT', 5432),
+                cursor_factory=psycopg2.extras.RealDictCursor,
+                connection_factory=_PooledConnection,
+            )
+            # ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait instead
+            _slots = threading.BoundedSemaphore(PG_POOL_MAX)
+            _pool_pid = os.getpid()
+        return _pool, _slots
+
+
+def get_pg_connection():
+    pool, slots = get_pg_pool()
+    return PostgresDB(pool, slots)
@@ -0,0 +1,142 @@
+import json
+from functools import lru_cache
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+from backend.database.schema import GIOCATORI_COLUMNS
+
+# Compact player rows: one __slots__ object holding a tuple of values, with the
+# field names and the name -> position index shared by every row of the same
+# column list. Read access mirrors dict (record['x'], record.get('x'), keys(),
+# items(), dict(record)) so existing row-handling code keeps working.
+
+
+class Record:
+    __slots__ = ('_values',)
+    _fields = ()
+    _index = {}
+
+    def __init__(self, values):
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else self._values[i]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self._fields == other._fields and self._values == other._values
+        return NotImplemented
+
+    __hash__ = None
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return self._values
+
+    def items(self):
+        return zip(self._fields, self._values)
+
+    def to_dict(self):
+        return dict(zip(self._fields, self._values))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+@lru_cache(maxsize=32)
+def record_type(fields):
+    """Record class for a tuple of field names (one class, and one key index, per column list)."""
+    fields = tuple(fields)
+    return type('PlayerRecord', (Record,), {
+        '__slots__': (),
+        '_fields': fields,
+        '_index': {name: i for i, name in enumerate(fields)},
+    })
+
+
+PlayerRecord = record_type(tuple(GIOCATORI_COLUMNS))
+
+
+def records_from_rows(rows, fields):
+    """Records from DB rows (sqlite3.Row, tuples) whose values are in `fields` order."""
+    cls = record_type(tuple(fields))
+    return [cls(tuple(row)) for row in rows]
+
+
+def records_from_dicts(dicts, fields=None):
+    """Records from dicts (e.g. Firestore documents); keys outside `fields` are dropped."""
+    cls = record_type(tuple(fields or GIOCATORI_COLUMNS))
+    names = cls._fields
+    return [cls(tuple(d.get(name) for name in names)) for d in dicts]
+
+
+def records_from_columns(fields, columns):
+    """Records from per-field value lists (the columnar snapshot layout)."""
+    cls = record_type(tuple(fields))
+    return [cls(values) for values in zip(*columns)]
+
+
+# Serialization goes through the stdlib C encoder (records become dicts in
+# `default`), with compact separators and no key sorting: dropping sort_keys is
+# what makes the player list cheaper to encode than Flask's default provider.
+
+def _default(o):
+    if isinstance(o, Record):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(',', ':'), default=_default)
+
+
+class RawJSON(str):
+    """Already-encoded JSON, inserted verbatim by dumps_payload()."""
+    __slots__ = ()
+
+
+def dumps_records(records):
+    """JSON array of objects for a list of records."""
+    return _dumps(records)
+
+
+def dumps_payload(obj):
+    """json.dumps for a payload whose dicts may contain already-encoded parts (RawJSON)."""
+    if isinstance(obj, RawJSON):
+        return str(obj)
+    if isinstance(obj, dict):
+        return '{' + ','.join(_dumps(str(k)) + ':' + dumps_payload(v) for k, v in obj.items()) + '}'
+    return _dumps(obj)
+
+
+def records_response(data):
+    """jsonify_success() for payloads carrying player records."""
+    return Response(dumps_payload({'success': True, 'data': data or {}}), mimetype='application/json')
+
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that also accepts records (as plain objects) in jsonify(), keys unsorted."""
+
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import threading
+
+import numpy as np
+
+from .player_record import records_from_columns
+from backend.database.skills import SKILL_TAGS, normalize_skill, skills_mask
+from backend.database.artifact import dataset_version
+
+# Immutable columnar snapshot of the player dataset, shared by all workers.
+# Numeric columns are .npy files memory-mapped read-only (the page cache holds
+# one copy for every process); text and JSON columns are int32 codes into a
+# shared string table. Row dicts are built only for the rows a request returns.
+#
+# Layout: <PLAYER_SNAPSHOT_DIR>/<version>/{manifest.json, strings.json, <column>.npy}
+#         <PLAYER_SNAPSHOT_DIR>/CURRENT  -> name of the published version
+
+PLAYER_SNAPSHOT_DIR = os.getenv('PLAYER_SNAPSHOT_DIR', 'backend/database/snapshots')
+SNAPSHOTS_TO_KEEP = 2
+
+_open_snapshots = {}
+_open_lock = threading.Lock()
+
+
+def _column_kind(values):
+    kind = 'int'
+    for v in values:
+        if v is None:
+            if kind == 'int':
+                kind = 'float'  # int64 has no NULL: fall back to float64 with NaN
+        elif isinstance(v, (list, dict)):
+            return 'json'
+        elif isinstance(v, str):
+            return 'str'
+        elif isinstance(v, float):
+            kind = 'float'
+        elif not isinstance(v, (int, bool)):
+            return 'str'
+    return kind
+
+
+def publish_snapshot(giocatori, version, snapshot_dir=PLAYER_SNAPSHOT_DIR):
+    """Write the snapshot for `version` and make it current (atomic rename of CURRENT)."""
+    start = time.time()
+    os.makedirs(snapshot_dir, exist_ok=True)
+    names = list(dict.fromkeys(key for p in giocatori for key in p))
+    overrides = {}
+    if 'skills' in names:
+        # Recomputed from the lists, so the bits always follow the current SKILL_TAGS
+        overrides['skills_mask'] = [skills_mask(p.get('skills')) for p in giocatori]
+        names = list(dict.fromkeys(names + ['skills_mask']))
+    tmp_dir = os.path.join(snapshot_dir, f'.{version}.{os.getpid()}.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    strings, string_codes = [], {}
+    columns = []
+    for name in names:
+        values = overrides.get(name) or [p.get(name) for p in giocatori]
+        kind = _column_kind(values)
+        column = {'name': name, 'kind': kind}
+        if kind == 'int':
+            arr = np.array(values, dtype=np.int64)
+        elif kind == 'float':
+            arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            if any(v is not None for v in values) and all(v is None or isinstance(v, int) for v in values):
+                # An integer column with NULLs: stored as float64, decoded back to ints
+                column['integral'] = True
+        else:
+            codes = []
+            for v in values:
+                if v is None:
+                    codes.append(-1)
+                    continue
+                text = json.dumps(v) if kind == 'json' else str(v)
+                code = string_codes.get(text)
+                if code is None:
+                    code = string_codes[text] = len(strings)
+                    strings.append(text)
+                codes.append(code)
+            arr = np.array(codes, dtype=np.int32)
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), arr)
+        columns.append(column)
+
+    with open(os.path.join(tmp_dir, 'strings.json'), 'w') as f:
+        json.dump(strings, f)
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump({'version': version, 'n_rows': len(giocatori), 'columns': columns, 'skill_tags': SKILL_TAGS}, f)
+
+    final_dir = os.path.join(snapshot_dir, version)
+    if os.path.isdir(final_dir):
+        shutil.rmtree(tmp_dir)
+    else:
+        os.rename(tmp_dir, final_dir)
+    pointer_tmp = os.path.join(snapshot_dir, f'.CURRENT.{os.getpid()}')
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(snapshot_dir, 'CURRENT'))
+    _prune_snapshots(snapshot_dir, version)
+    print(f"\033[96m[PlayerSnapshot] published {version}: {len(giocatori)} rows x {len(columns)} columns "
+          f"in {time.time() - start:.2f}s\033[0m", file=sys.stderr)
+    return final_dir
+
+
+def _prune_snapshots(snapshot_dir, current):
+    # Workers still mapping a removed version keep reading it until they reopen (the inode stays alive)
+    versions = [d for d in os.listdir(snapshot_dir)
+                if not d.startswith('.') and os.path.isdir(os.path.join(snapshot_dir, d))]
+    versions.sort(key=lambda d: os.path.getmtime(os.path.join(snapshot_dir, d)), reverse=True)
+    for old in [v for v in versions if v != current][SNAPSHOTS_TO_KEEP - 1:]:
+        shutil.rmtree(os.path.join(snapshot_dir, old), ignore_errors=True)
+
+
+def current_version(snapshot_dir=PLAYER_SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, 'CURRENT'), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class PlayerSnapshot:
+    """Read-only, memory-mapped view of one published snapshot."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'manifest.json'), 'r') as f:
+            manifest = json.load(f)
+        with open(os.path.join(path, 'strings.json'), 'r') as f:
+            self.strings = json.load(f)
+        self.version = manifest['version']
+        self.n_rows = manifest['n_rows']
+        self.kinds = {c['name']: c['kind'] for c in manifest['columns']}
+        self.integral = {c['name'] for c in manifest['columns'] if c.get('integral')}
+        self.names = [c['name'] for c in manifest['columns']]
+        self.skill_tags = manifest.get('skill_tags', [])
+        self._columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in self.names}
+        self._string_index = None
+
+    def __len__(self):
+        return self.n_rows
+
+    def column(self, name):
+        """Raw column: values for numeric columns, string-table codes for text/JSON columns."""
+        return self._columns[name]
+
+    def string_code(self, value):
+        if self._string_index is None:
+            self._string_index = {s: i for i, s in enumerate(self.strings)}
+        return self._string_index.get(value, -2)  # -2 matches nothing (-1 is NULL)
+
+    def mask_equals(self, name, value):
+        if self.kinds[name] in ('str', 'json'):
+            return self._columns[name] == self.string_code(value)
+        return self._columns[name] == value
+
+    def mask_skills(self, tags, match='any'):
+        """Rows having any (or all) of the skill `tags`; raises ValueError on an unknown tag."""
+        bits = {tag: bit for bit, tag in enumerate(self.skill_tags)}
+        query = 0
+        for tag in tags:
+            canonical = normalize_skill(tag)
+            if canonical not in bits:
+                raise ValueError(f"unknown skill tag: {tag}")
+            query |= 1 << bits[canonical]
+        if 'skills_mask' not in self._columns:
+            return np.zeros(self.n_rows, dtype=bool)
+        masks = self._columns['skills_mask']
+        if match == 'all':
+            return (masks & query) == query
+        return (masks & query) != 0
+
+    def skill_counts(self, indices=None):
+        """Players per skill tag (over `indices` when given)."""
+        if 'skills_mask' not in self._columns:
+            return {tag: 0 for tag in self.skill_tags}
+        masks = self._columns['skills_mask']
+        if indices is not None:
+            masks = masks[indices]
+        return {tag: int(np.count_nonzero(masks & (1 << bit))) for bit, tag in enumerate(self.skill_tags)}
+
+    def select(self, where=None, order_by=None, descending=False, limit=None, skills=None, skills_match='any'):
+        """
+        Row indices matching all `where` equalities and the `skills` filter (any/all),
+        optionally sorted and truncated.
+        """
+        mask = np.ones(self.n_rows, dtype=bool)
+        for name, value in (where or {}).items():
+            mask &= self.mask_equals(name, value)
+        if skills:
+            mask &= self.mask_skills(skills, skills_match)
+        indices = np.flatnonzero(mask)
+        if order_by is not None and self.kinds.get(order_by) in ('int', 'float'):
+            keys = np.asarray(self._columns[order_by][indices], dtype=np.float64)
+            # NaN sorts last in both directions
+            keys = np.where(np.isnan(keys), np.inf if not descending else -np.inf, keys)
+            order = np.argsort(-keys if descending else keys, kind='stable')
+            indices = indices[order]
+        if limit is not None:
+            indices = indices[:limit]
+        return indices
+
+    def _decode(self, indices, names):
+        if indices is None:
+            indices = np.arange(self.n_rows)
+        values = []
+        for name in names:
+            col = self._columns[name][indices]
+            kind = self.kinds[name]
+            if kind == 'float' and name in self.integral:
+                values.append([None if v != v else int(v) for v in col.tolist()])
+            elif kind == 'float':
+                values.append([None if v != v else v for v in col.tolist()])
+            elif kind == 'int':
+                values.append(col.tolist())
+            else:
+                strings = self.strings
+                decode = json.loads if kind == 'json' else (lambda s: s)
+                values.append([None if c < 0 else decode(strings[c]) for c in col.tolist()])
+        return values
+
+    def rows(self, indices=None, columns=None):
+        """Build dicts for the given row indices only (all rows by default)."""
+        names = columns or self.names
+        return [dict(zip(names, row)) for row in zip(*self._decode(indices, names))]
+
+    def records(self, indices=None, columns=None):
+        """Like rows(), as compact PlayerRecords sharing one key index."""
+        names = columns or self.names
+        return records_from_columns(names, self._decode(indices, names))
+
+
+def open_snapshot(version=None, snapshot_dir=PLAYER_SNAPSHOT_DIR):
+    """The snapshot for `version` (default: current), opened once per process."""
+    version = version or current_version(snapshot_dir)
+    if version is None:
+        return None
+    with _open_lock:
+        snapshot = _open_snapshots.get(version)
+        if snapshot is None:
+            snapshot = PlayerSnapshot(os.path.join(snapshot_dir, version))
+            # Drop the mappings of older versions
+            _open_snapshots.clear()
+            _open_snapshots[version] = snapshot
+        return snapshot
+
+
+def _snapshot_age(snapshot_dir):
+    try:
+        return time.time() - os.path.getmtime(os.path.join(snapshot_dir, 'CURRENT'))
+    except FileNotFoundError:
+        return None
+
+
+def refresh_snapshot(load_players, max_age=0, snapshot_dir=PLAYER_SNAPSHOT_DIR):
+    """
+    Rebuild the snapshot from load_players() if it is older than max_age seconds and the
+    data changed, then open the current one. Only one worker at a time rebuilds (file lock);
+    the others keep the current snapshot, or wait for the first build when none exists yet.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    age = _snapshot_age(snapshot_dir)
+    if age is not None and age < max_age:
+        return open_snapshot(snapshot_dir=snapshot_dir)
+    with open(os.path.join(snapshot_dir, '.lock'), 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            builder = True
+        except BlockingIOError:
+            builder = False
+            if current_version(snapshot_dir) is None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                builder = current_version(snapshot_dir) is None
+        if builder:
+            giocatori = load_players()
+            version = dataset_version(giocatori)
+            if version != current_version(snapshot_dir) or not os.path.isdir(os.path.join(snapshot_dir, version)):
+                publish_snapshot(giocatori, version, snapshot_dir)
+            else:
+                # Unchanged: mark it fresh so the other workers skip the reload
+                os.utime(os.path.join(snapshot_dir, 'CURRENT'))
+    return open_snapshot(snapshot_dir=snapshot_dir)
+
+
+def ensure_snapshot(version, load_players, snapshot_dir=PLAYER_SNAPSHOT_DIR):
+    """Open snapshot `version`, publishing it from load_players() if no worker has yet."""
+    if not os.path.isdir(os.path.join(snapshot_dir, version)):
+        os.makedirs(snapshot_dir, exist_ok=True)
+        with open(os.path.join(snapshot_dir, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.isdir(os.path.join(snapshot_dir, version)):
+                publish_snapshot(load_players(), version, snapshot_dir)
+    return open_snapshot(version, snapshot_dir)
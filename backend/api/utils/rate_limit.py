@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+import yaml
+from functools import wraps
+from flask import g
+
+from .user_cache import get_user_profile
+
+# Plan-aware token buckets keyed by authenticated user. Buckets live in a SQLite
+# file shared by every worker on the host (RATE_LIMIT_DB), so the quota holds
+# across gunicorn workers instead of per process.
+
+with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'rate_limits.yaml'), 'r') as f:
+    RATE_LIMITS = yaml.safe_load(f)
+
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', 'backend/database/rate_limits.db')
+
+_conn = None
+_conn_lock = threading.Lock()
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(RATE_LIMIT_DB, timeout=5, isolation_level=None, check_same_thread=False)
+        _conn.execute('PRAGMA journal_mode=WAL')
+        _conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                bucket_key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            '''
+        )
+    return _conn
+
+
+def plan_limits(plan):
+    """(capacity, refill tokens per second) for a plan, defaulting to the free tier."""
+    plans = RATE_LIMITS['plans']
+    limits = plans.get(plan) or plans['free']
+    return float(limits['capacity']), float(limits['refill_per_minute']) / 60.0
+
+
+def endpoint_cost(name):
+    costs = RATE_LIMITS['endpoint_costs']
+    return float(costs.get(name, costs.get('default', 1)))
+
+
+def take_tokens(bucket_key, cost, capacity, refill_rate):
+    """
+    Atomically refill the bucket and try to take `cost` tokens.
+    Returns (allowed, retry_after_seconds).
+    """
+    now = time.time()
+    with _conn_lock:
+        conn = _get_conn()
+        # BEGIN IMMEDIATE takes the write lock up front: no other worker can interleave
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM rate_buckets WHERE bucket_key = ?', (bucket_key,)).fetchone()
+            if row is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, row[0] + (now - row[1]) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                '''
+                INSERT INTO rate_buckets (bucket_key, tokens, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(bucket_key) DO UPDATE SET tokens=excluded.tokens, updated_at=excluded.updated_at
+                ''',
+                (bucket_key, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    retry_after = 0.0 if allowed else (cost - tokens) / refill_rate if refill_rate > 0 else 60.0
+    return allowed, retry_after
+
+
+def plan_rate_limit(endpoint):
+    """
+    Charge the endpoint cost against the caller's plan bucket; 429 when empty.
+    Must be applied below @require_auth (it needs g.user_id).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            from ..util import jsonify_error
+            sub = g.user_id
+            profile = get_user_profile(sub)
+            plan = profile['plan'] if profile else 'free'
+            capacity, refill_rate = plan_limits(plan)
+            cost = endpoint_cost(endpoint)
+            try:
+                allowed, retry_after = take_tokens(f"user:{sub}", cost, capacity, refill_rate)
+            except sqlite3.Error as e:
+                # Fail open: a locked/broken bucket store must not take the API down
+                print(f"\033[91m[RateLimit] store error, allowing request: {e}\033[0m", file=sys.stderr)
+                return f(*args, **kwargs)
+            if not allowed:
+                print(f"\033[93m[RateLimit] {endpoint} throttled for sub={sub[:8]}... plan={plan}\033[0m", file=sys.stderr)
+                response, status = jsonify_error('rate_limited', 'Troppe richieste, riprova tra poco.', 429)
+                response.headers['Retry-After'] = str(int(retry_after) + 1)
+                return response, status
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
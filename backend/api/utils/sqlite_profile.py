@@ -0,0 +1,49 @@
+import os
+import sqlite3
+
+# SQLite connection profiles, applied on every connect.
+# 'production' is tuned for several gunicorn workers sharing one database file;
+# 'default' keeps SQLite's stock settings (rollback journal, full sync).
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',          # readers no longer block on the writer
+        'synchronous': 'NORMAL',        # safe with WAL, fsync only at checkpoints
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,       # negative = KiB, i.e. 64 MiB page cache
+        'busy_timeout': 5000,           # ms to wait on a locked database before failing
+        'temp_store': 'MEMORY',
+    },
+}
+
+# Order matters: journal_mode must be switched before the other pragmas
+_PRAGMA_ORDER = ['journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'busy_timeout', 'temp_store']
+
+
+def sqlite_pragmas(profile=None):
+    """
+    Pragmas for `profile` (env SQLITE_PROFILE, default 'production').
+    Each pragma can be overridden with SQLITE_<PRAGMA>, e.g. SQLITE_MMAP_SIZE=0.
+    """
+    profile = profile or os.getenv('SQLITE_PROFILE', 'production')
+    pragmas = dict(SQLITE_PROFILES.get(profile, SQLITE_PROFILES['production']))
+    for name in _PRAGMA_ORDER:
+        override = os.getenv(f'SQLITE_{name.upper()}')
+        if override is not None:
+            pragmas[name] = override
+    return pragmas
+
+
+def apply_sqlite_profile(conn, profile=None):
+    pragmas = sqlite_pragmas(profile)
+    for name in _PRAGMA_ORDER:
+        if name in pragmas:
+            conn.execute(f'PRAGMA {name}={pragmas[name]}')
+    return conn
+
+
+def connect_sqlite(db_path, profile=None, **kwargs):
+    """sqlite3.connect with a larger statement cache and the profile pragmas applied."""
+    kwargs.setdefault('cached_statements', int(os.getenv('SQLITE_CACHED_STATEMENTS', 256)))
+    conn = sqlite3.connect(db_path, **kwargs)
+    return apply_sqlite_profile(conn, profile)
@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from .sqlite_profile import connect_sqlite
+
+# Optional single-writer path for SQLite (SQLITE_WRITE_QUEUE=1).
+# Mutations are handed to one writer thread per process, which group-commits
+# small writes in a single transaction and resolves a Future per write.
+SQLITE_WRITE_QUEUE = os.getenv('SQLITE_WRITE_QUEUE', '0') == '1'
+WRITE_BATCH_MAX = int(os.getenv('SQLITE_WRITE_BATCH_MAX', 64))
+WRITE_BATCH_WAIT_MS = float(os.getenv('SQLITE_WRITE_BATCH_WAIT_MS', 2))
+WRITE_TIMEOUT = float(os.getenv('SQLITE_WRITE_TIMEOUT', 30))
+
+
+class SQLiteWriter:
+    def __init__(self, db_path, max_batch=WRITE_BATCH_MAX, max_wait_ms=WRITE_BATCH_WAIT_MS):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = {'writes': 0, 'batches': 0, 'failed': 0}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        """Queue fn(conn, *args); the returned Future resolves once its batch is committed."""
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _connect(self):
+        # isolation_level=None: transactions are managed explicitly in _commit
+        conn = connect_sqlite(self.db_path, isolation_level=None, check_same_thread=False,
+                              detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _commit(self, conn, batch):
+        outcomes = []
+        conn.execute('BEGIN IMMEDIATE')
+        for future, fn, args in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            # A savepoint per write: one failing write does not abort the batch
+            conn.execute('SAVEPOINT write')
+            try:
+                outcomes.append((future, fn(conn, *args), None))
+                conn.execute('RELEASE write')
+            except Exception as e:
+                conn.execute('ROLLBACK TO write')
+                conn.execute('RELEASE write')
+                outcomes.append((future, None, e))
+        conn.execute('COMMIT')
+        return outcomes
+
+    def _run(self):
+        # The connection is (re)opened lazily: a failed connect fails the batch
+        # it was opened for and is retried with the next one.
+        conn = None
+        while True:
+            batch = self._next_batch()
+            try:
+                if conn is None:
+                    conn = self._connect()
+                outcomes = self._commit(conn, batch)
+            except Exception as e:
+                print(f"\033[91m[SQLiteWriter] batch of {len(batch)} failed: {e}\033[0m", file=sys.stderr)
+                if conn is not None:
+                    try:
+                        if conn.in_transaction:
+                            conn.execute('ROLLBACK')
+                    except Exception:
+                        conn.close()
+                        conn = None
+                # Writes not reached yet are still pending (unless cancelled): fail them too
+                outcomes = [(future, None, e) for future, _, _ in batch
+                            if future.running() or (not future.done() and future.set_running_or_notify_cancel())]
+            self.stats['batches'] += 1
+            for future, result, error in outcomes:
+                if error is None:
+                    self.stats['writes'] += 1
+                    future.set_result(result)
+                else:
+                    self.stats['failed'] += 1
+                    future.set_exception(error)
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Per-process writer (re-created after a fork, e.g. in each gunicorn worker)."""
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = SQLiteWriter(os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db'))
+            _writer_pid = os.getpid()
+        return _writer
+
+
+def run_sqlite_write(fn, *args):
+    """
+    Run a write function fn(conn, *args) and return its result.
+    With SQLITE_WRITE_QUEUE=1 it goes through the writer thread, otherwise it runs
+    on the request connection and commits. fn must not commit itself.
+    """
+    if SQLITE_WRITE_QUEUE and os.getenv('DB_TYPE', 'sqlite') == 'sqlite':
+        return get_writer().submit(fn, *args).result(WRITE_TIMEOUT)
+    from ..util import get_db
+    db = get_db()
+    try:
+        result = fn(db, *args)
+    except Exception:
+        db.rollback()
+        raise
+    db.commit()
+    return result
+
+
+def sqlite_writer_info():
+    if not SQLITE_WRITE_QUEUE or _writer is None:
+        return {'enabled': SQLITE_WRITE_QUEUE}
+    return {'enabled': True, 'queued': _writer._queue.qsize(), **_writer.stats}
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import threading
+
+# Short-TTL, per-process cache of the user profile (plan, credits, ToS acceptance).
+# Every mutating path must call update_user_profile() or invalidate_user_profile().
+USER_PROFILE_TTL = float(os.getenv('USER_PROFILE_CACHE_TTL', 30))
+
+_profiles = {}
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _load_user_profile(db, db_type, sub):
+    """Read the user row/document once and return the cached profile fields (or None)."""
+    if db_type == 'firestore':
+        from .firestore_dal import get_doc, USER_PROFILE_FIELDS
+        user_data = get_doc(db, 'users', sub, fields=USER_PROFILE_FIELDS)
+        if user_data is None:
+            return None
+        return {
+            'plan': user_data.get('plan', 'free'),
+            'ai_credits': user_data.get('ai_credits', 0),
+            'api_cost': user_data.get('api_cost', 0),
+            'spent_credits': user_data.get('spent_credits', 0),
+            'tos_accepted': bool(user_data.get('tos_version')),
+        }
+    row = db.execute(
+        '''
+        SELECT u.plan, u.ai_credits, u.api_cost, u.spent_credits, t.version AS tos_version
+        FROM users u LEFT JOIN tos_acceptance t ON t.google_sub = u.google_sub
+        WHERE u.google_sub = ?
+        ''',
+        (sub,)
+    ).fetchone()
+    if not row:
+        return None
+    return {
+        'plan': row['plan'],
+        'ai_credits': row['ai_credits'],
+        'api_cost': float(row['api_cost']),  # NUMERIC: a Decimal on Postgres
+        'spent_credits': row['spent_credits'],
+        'tos_accepted': bool(row['tos_version']),
+    }
+
+
+def get_user_profile(sub, db=None, db_type=None):
+    """
+    Return a copy of the user profile, reading the DB at most once per TTL window.
+    Missing users are not cached so that the first /api/me can create them.
+    """
+    now = time.time()
+    with _lock:
+        entry = _profiles.get(sub)
+        if entry and now - entry[0] < USER_PROFILE_TTL:
+            _stats['hits'] += 1
+            return dict(entry[1])
+        _stats['misses'] += 1
+    if db is None:
+        from ..util import get_db
+        db = get_db()
+    db_type = db_type or os.getenv('DB_TYPE', 'sqlite')
+    profile = _load_user_profile(db, db_type, sub)
+    if profile is None:
+        return None
+    with _lock:
+        _profiles[sub] = (now, profile)
+    print(f"\033[93m[UserProfile LOAD] sub={sub[:8]}...\033[0m", file=sys.stderr)
+    return dict(profile)
+
+
+def ensure_user_profile(sub, db, db_type, email=None, initial_credits=0):
+    """Return the user profile, creating the user on the free plan if it does not exist yet."""
+    profile = get_user_profile(sub, db, db_type)
+    if profile is not None:
+        return profile
+    plan = 'free'
+    if db_type == 'firestore':
+        from google.cloud import firestore
+        db.collection('users').document(sub).set({'plan': plan,
+                                                  'email': email,
+                                                  'created_at': firestore.SERVER_TIMESTAMP,
+                                                  'ai_credits': initial_credits},
+                                                 merge=True)
+    else:
+        db.execute(
+            "INSERT INTO users (google_sub, plan, ai_credits) VALUES (?, ?, ?)",
+            (sub, plan, initial_credits)
+        )
+        db.commit()
+    profile = {'plan': plan, 'ai_credits': initial_credits, 'api_cost': 0, 'spent_credits': 0, 'tos_accepted': False}
+    set_user_profile(sub, profile)
+    return dict(profile)
+
+
+def set_user_profile(sub, profile):
+    """Write-through a full profile (e.g. right after creating the user)."""
+    with _lock:
+        _profiles[sub] = (time.time(), dict(profile))
+
+
+def update_user_profile(sub, **fields):
+    """Write-through known new values into a cached profile; no-op if not cached."""
+    with _lock:
+        entry = _profiles.get(sub)
+        if entry:
+            entry[1].update(fields)
+
+
+def invalidate_user_profile(sub):
+    with _lock:
+        if _profiles.pop(sub, None) is not None:
+            _stats['invalidations'] += 1
+
+
+def user_profile_cache_info():
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            **_stats,
+            'size': len(_profiles),
+            'ttl': USER_PROFILE_TTL,
+            'hit_ratio': round(_stats['hits'] / lookups, 4) if lookups else 0.0,
+        }
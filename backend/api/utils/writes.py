@@ -0,0 +1,85 @@
+# SQLite/Postgres write statements shared by the app routes and the blueprints.
+# Each takes the connection first so it can run through run_sqlite_write().
+
+
+def write_league_settings(conn, vals):
+    conn.execute(
+        '''
+        INSERT INTO league_settings (
+            google_sub, participants, budget, participant_names,
+            n_gk_players, n_def_players, n_mid_players, n_fwd_players,
+            use_clean_sheet_bonus, use_defensive_modifier
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(google_sub) DO UPDATE SET
+        participants=excluded.participants,
+        budget=excluded.budget,
+        participant_names=excluded.participant_names,
+        n_gk_players=excluded.n_gk_players,
+        n_def_players=excluded.n_def_players,
+        n_mid_players=excluded.n_mid_players,
+        n_fwd_players=excluded.n_fwd_players,
+        use_clean_sheet_bonus=excluded.use_clean_sheet_bonus,
+        use_defensive_modifier=excluded.use_defensive_modifier
+        ''', vals
+    )
+
+
+def write_auction_log(conn, google_sub, auction_log_json):
+    conn.execute(
+        '''
+        INSERT INTO auction_log (google_sub, auction_log)
+        VALUES (?, ?)
+        ON CONFLICT(google_sub) DO UPDATE SET auction_log=excluded.auction_log
+        ''',
+        (google_sub, auction_log_json)
+    )
+
+
+def spend_ai_credit(conn, google_sub, cost):
+    """Decrement in a single guarded statement; returns the row after the update, or None if no credit was spent."""
+    row = conn.execute(
+        "UPDATE users SET ai_credits = ai_credits - 1, api_cost = api_cost + ?, spent_credits = spent_credits + 1"
+        " WHERE google_sub = ? AND ai_credits > 0 RETURNING ai_credits, api_cost, spent_credits",
+        (cost, google_sub)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def write_tos_acceptance(conn, google_sub, version):
+    conn.execute(
+        '''
+        INSERT INTO tos_acceptance (google_sub, version, accepted_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(google_sub) DO UPDATE SET version=excluded.version, accepted_at=CURRENT_TIMESTAMP
+        ''',
+        (google_sub, version)
+    )
+
+
+def write_strategy_targets(conn, google_sub, target_players):
+    # Delete all previous targets for this user before inserting new ones
+    conn.execute("DELETE FROM strategy_board_targets WHERE google_sub = ?", (google_sub,))
+    conn.executemany(
+        """
+        INSERT INTO strategy_board_targets (google_sub, player_id, max_bid)
+        VALUES (?, ?, ?)
+        ON CONFLICT(google_sub, player_id) DO UPDATE SET
+            max_bid=excluded.max_bid
+        """,
+        [(google_sub, player.get('id'), player.get('maxBid', 0)) for player in target_players]
+    )
+
+
+def write_strategy_budget(conn, google_sub, gk, d, m, f):
+    conn.execute(
+        """
+        INSERT INTO strategy_board (google_sub, role_budget_gk, role_budget_def, role_budget_mid, role_budget_fwd)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(google_sub) DO UPDATE SET
+            role_budget_gk=excluded.role_budget_gk,
+            role_budget_def=excluded.role_budget_def,
+            role_budget_mid=excluded.role_budget_mid,
+            role_budget_fwd=excluded.role_budget_fwd
+        """,
+        (google_sub, gk, d, m, f)
+    )
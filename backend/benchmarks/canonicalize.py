@@ -0,0 +1,89 @@
+"""
+Loader canonicalization benchmark: per-record dict loop vs the columnar stage.
+
+Builds a synthetic player DataFrame with the CSV column names, then times the
+previous row-by-row canonicalization (key_map lookup and list scan per field,
+ast.literal_eval of skills per row) against canonicalize_players().
+
+    python -m backend.benchmarks.canonicalize --players 600 --repeat 5
+"""
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from backend.database.canonicalize import GIOCATORI_KEY_MAP, canonicalize_players, parse_skills
+from backend.database.schema import GIOCATORI_COLUMNS, GIOCATORI_INTEGER_COLUMNS, GIOCATORI_TEXT_COLUMNS
+from backend.database.skills import SKILL_TAGS, skills_mask
+
+
+def synthetic_frame(n_players):
+    rng = random.Random(0)
+    source_names = {canonical: source for source, canonical in GIOCATORI_KEY_MAP.items()}
+    data = {}
+    for col in GIOCATORI_COLUMNS:
+        if col == 'skills_mask':
+            continue
+        if col == 'id':
+            values = list(range(1, n_players + 1))
+        elif col == 'skills':
+            values = [repr(rng.sample(SKILL_TAGS, rng.randrange(5))) for _ in range(n_players)]
+        elif col in GIOCATORI_TEXT_COLUMNS:
+            values = [rng.choice(['A', 'B', 'C', 'D', None]) for _ in range(n_players)]
+        elif col in GIOCATORI_INTEGER_COLUMNS:
+            values = [rng.choice([np.nan, rng.randrange(100)]) for _ in range(n_players)]
+        else:
+            values = [rng.choice([np.nan, np.inf, 0.0, rng.uniform(0, 10)]) for _ in range(n_players)]
+        data[source_names.get(col, col)] = values
+    return pd.DataFrame(data)
+
+
+def rowwise_canonicalize(df, columns=GIOCATORI_COLUMNS):
+    """The loader's previous per-record path (including its to_dict preparation)."""
+    df = df.replace([float('nan'), float('inf'), float('-inf')], None)
+    df = df.where(pd.notnull(df), None)
+    records = df.to_dict(orient='records')
+    columns = list(columns)
+    rows = []
+    for idx, rec in enumerate(records):
+        canonical_rec = {col: None for col in columns}
+        for k, v in rec.items():
+            canonical_key = GIOCATORI_KEY_MAP.get(k, k)
+            if canonical_key in columns:
+                canonical_rec[canonical_key] = None if isinstance(v, float) and v != v else v
+        if canonical_rec["id"] is None:
+            canonical_rec["id"] = idx
+        skills = parse_skills(canonical_rec['skills'])
+        canonical_rec['skills'] = json.dumps(skills)
+        canonical_rec['skills_mask'] = skills_mask(skills)
+        rows.append([canonical_rec[col] for col in columns])
+    return rows
+
+
+def best_of(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=600)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.players)
+    print(f"dataset: {len(df)} players x {len(df.columns)} columns")
+    t_rows, rows_old = best_of(lambda: rowwise_canonicalize(df), args.repeat)
+    t_cols, rows_new = best_of(lambda: canonicalize_players(df, encode_json=True), args.repeat)
+
+    assert rows_old == rows_new, "the two paths disagree"
+
+    print(f"row-by-row : {t_rows * 1000:8.1f} ms")
+    print(f"columnar   : {t_cols * 1000:8.1f} ms  (x{t_rows / t_cols:.1f})")
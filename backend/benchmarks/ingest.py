@@ -0,0 +1,146 @@
+"""
+Sportmonks ingestion throughput: the previous serial requests walk vs the async engine.
+
+Both run against the local Sportmonks stand-in (benchmarks/standin.py) serving
+synthetic squads and player statistics with a fixed per-request latency,
+paginated squads and an optional per-entity quota (rate_limit block, HTTP 429
+when exhausted). Responses carry an ETag, and --cache re-runs the engine against
+its response cache. --strategies runs the engine once per request shape (league,
+team, player) and reports the planner's estimate against the calls and bytes
+actually transferred. --history runs a full ingestion of the current and
+finished seasons, then a refresh that takes the finished ones from the season
+history, and one with finished seasons only. Recorded Sportmonks responses are
+benchmarked by benchmarks/replay.py.
+
+    python -m backend.benchmarks.ingest --teams 4 --players 25 --latency 0.2 --concurrency 16
+"""
+import os
+import time
+import tempfile
+import asyncio
+import argparse
+
+import pandas as pd
+
+from backend.data import ITALIAN_TEAMS, SEASON_MAPPING
+from backend.benchmarks.standin import StandIn, SyntheticSource, STATS_SEASONS, CURRENT_SEASON
+
+
+def serial_walk(base_url, teams):
+    """The previous __main__ loop: one blocking request at a time, pd.concat per player."""
+    from backend.data import data_loading
+    data_loading.SPORTMONKS_API_URL = base_url
+    statistics = pd.DataFrame()
+    for team_id in teams:
+        for player_id in data_loading.get_season_team_players(team_id, SEASON_MAPPING['2526'], STATS_SEASONS):
+            player_stats = data_loading.get_player_stats(player_id, team_id, season_stats_id=STATS_SEASONS)
+            if isinstance(player_stats, dict) and 'totals' in player_stats:
+                statistics = pd.concat([statistics, player_stats['totals']], axis=0, ignore_index=True, sort=False)
+    return statistics
+
+
+if __name__ == "__main__":
+    from backend.data.ingest import run, PARSE_WORKERS
+    from backend.data.planner import STRATEGIES
+    from backend.data.collector import combine_partitions, list_parts
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--teams', type=int, default=4)
+    parser.add_argument('--players', type=int, default=25, help='players per team')
+    parser.add_argument('--latency', type=float, default=0.2, help='server latency per request (s)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS)
+    parser.add_argument('--quota', type=int, help='calls per entity per --window seconds (default unlimited)')
+    parser.add_argument('--window', type=float, default=1.0)
+    parser.add_argument('--skip-serial', action='store_true')
+    parser.add_argument('--cache', action='store_true', help='also time a cold and a warm cached run')
+    parser.add_argument('--strategies', action='store_true', help='also run each request strategy')
+    parser.add_argument('--max-include-depth', type=int, help='include nesting the stand-in accepts')
+    parser.add_argument('--history', action='store_true', help='also time a full run and refreshes from the history')
+    args = parser.parse_args()
+
+    teams = dict(list(ITALIAN_TEAMS.items())[:args.teams])
+    standin = StandIn(SyntheticSource(teams, args.players), args.latency, args.quota, args.window,
+                      args.max_include_depth)
+    n_players = args.teams * args.players
+    work_dir = tempfile.mkdtemp()
+    print(f"stand-in: {args.teams} teams x {args.players} players, {args.latency * 1000:.0f} ms/request"
+          + (f", quota {args.quota}/{args.window:g}s per entity" if args.quota else ""))
+
+    def engine(label, cache_path=None, strategy='player', stats_seasons=STATS_SEASONS, history_path=None):
+        return asyncio.run(run(standin.base_url, args.concurrency, teams=teams, stats_seasons=stats_seasons,
+                               progress=False, parse_workers=args.parse_workers, cache_path=cache_path,
+                               registry_path=None, strategy=strategy, history_path=history_path,
+                               out_dir=os.path.join(work_dir, label.replace(' ', '_'))))
+
+    def frame(stats):
+        parts = [pd.read_parquet(path) for path in list_parts(stats['out_dir'])]
+        return (pd.concat(parts, ignore_index=True).sort_values(['player_id', 'season_id'])
+                .reset_index(drop=True).sort_index(axis=1))
+
+    try:
+        rows = {}
+        if not args.skip_serial:
+            start = time.perf_counter()
+            rows['serial'] = len(serial_walk(standin.base_url, teams))
+            t_serial = time.perf_counter() - start
+            print(f"serial     : {t_serial:7.2f}s  {n_players / t_serial:7.1f} players/s")
+        stats = engine('async')
+        rows['async'] = stats['rows']
+        t_async = stats['seconds']
+        print(f"async x{args.concurrency:<4}: {t_async:7.2f}s  {n_players / t_async:7.1f} players/s  "
+              f"{stats['calls'] / t_async:.0f} calls/s, {stats['throttled']} throttled, "
+              f"{stats['throttle_wait']:.1f} request-s waiting for quota, {len(stats['failed'])} failed, "
+              f"parse {stats['parse_seconds'] / max(1, rows['async']) * 1000:.1f} ms/row"
+              + (f"  (x{t_serial / t_async:.1f})" if not args.skip_serial else ""))
+        start = time.perf_counter()
+        combine_partitions(stats['out_dir'], parquet_path=os.path.join(work_dir, 'combined.parquet'),
+                           csv_path=os.path.join(work_dir, 'combined.csv'))
+        print(f"combine    : {time.perf_counter() - start:7.2f}s  {stats['parts']} parts")
+        if args.cache:
+            cache_path = os.path.join(work_dir, 'http_cache.sqlite')
+            runs = [('cold cache', None), ('warm cache', None), ('expired', 'expire')]
+            for label, action in runs:
+                if action == 'expire':
+                    # Expire everything but the entries for finished seasons: a routine re-run revalidates
+                    import sqlite3
+                    with sqlite3.connect(cache_path) as conn:
+                        conn.execute("UPDATE responses SET expires_at = 0 WHERE expires_at IS NOT NULL")
+                stats = engine(label, cache_path)
+                rows[label] = stats['rows']
+                cache = stats['cache']
+                print(f"{label:<11}: {stats['seconds']:7.2f}s  {stats['calls']} calls, "
+                      f"{cache['hits']} hits, {cache['revalidated']} revalidated (304), "
+                      f"{stats['bytes'] / 1024:.0f} KB downloaded")
+        if args.strategies:
+            for strategy in STRATEGIES:
+                stats = engine(f"strategy {strategy}", strategy=strategy)
+                rows[strategy] = stats['rows']
+                used = ', '.join(f"{name} {c['calls']} calls / {c['bytes'] / 1024:.0f} KB"
+                                 for name, c in stats['strategies'].items())
+                print(f"{strategy:<11}: {stats['seconds']:7.2f}s  planned ~{stats['plan'][strategy]['calls']} calls; "
+                      f"{used}")
+        assert len(set(rows.values())) == 1, f"row counts differ: {rows}"
+        if args.history:
+            history_path = os.path.join(work_dir, 'season_history.sqlite')
+            seasons = [CURRENT_SEASON] + STATS_SEASONS
+            full = None
+            for label, stats_seasons, strategy in [('full', seasons, 'player'), ('refresh', seasons, 'player'),
+                                                   ('refresh team', seasons, 'team'),
+                                                   ('finished', STATS_SEASONS, 'player')]:
+                stats = engine(f"history {label}", strategy=strategy, stats_seasons=stats_seasons,
+                               history_path=history_path)
+                history = stats['history']
+                if full is None:
+                    full = stats
+                    frames = {'full': frame(stats)}
+                elif stats_seasons == seasons:
+                    # The same rows, the finished seasons coming from the history
+                    pd.testing.assert_frame_equal(frame(stats), frames['full'], check_dtype=False)
+                print(f"{label:<13}: {stats['seconds']:7.2f}s  {stats['calls']} calls "
+                      f"({stats['calls'] / full['calls']:.0%}), {stats['bytes'] / 1024:.0f} KB "
+                      f"({stats['bytes'] / full['bytes']:.0%}), {stats['rows']} rows, "
+                      f"{history['seasons_from_history']} seasons from the history, "
+                      f"{history['players_from_history']} players without a request")
+    finally:
+        standin.close()
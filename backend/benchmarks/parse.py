@@ -0,0 +1,131 @@
+"""
+Per-player statistics parse benchmark: the previous pivot_table path vs the flat parser.
+
+Parses synthetic player payloads (the stand-in's, about 30 statistic
+types per season) with the previous refactor_statistics, which builds the
+overview and details frames, pivots the long frame and infers each column's dtype,
+and with the current one, which walks the details once into one wide row per
+season with the columns and dtypes of the statistic type registry.
+
+    python -m backend.benchmarks.parse --players 200 --repeat 3
+"""
+import time
+import argparse
+
+import pandas as pd
+
+from backend.data import ITALIAN_TEAMS, POSITIONS
+from backend.data.data_loading import INDEX_COLUMNS, refactor_statistics
+from backend.data.sportmonks import SEASON_MAPPING_IDS
+from backend.data.stat_types import StatTypeRegistry
+from backend.benchmarks.standin import synthetic_player
+
+
+def pivot_refactor_statistics(player_data, team_id):
+    """The previous parser: overview and details frames, pivot_table, then _harmonise."""
+    player_name = player_data["display_name"]
+    birthday = player_data["date_of_birth"]
+    position_id = player_data['position_id']
+    position = POSITIONS[position_id] if position_id in POSITIONS else None
+    identity = {"player_name": player_name, "birthday": birthday,
+                "current_team_id": team_id, "current_team": ITALIAN_TEAMS[team_id],
+                "position_id": position_id, "position": position}
+
+    overview_rows = []
+    for stat in player_data['statistics']:
+        overview_rows.append({
+            **identity,
+            'season_id': stat['season_id'],
+            'season': SEASON_MAPPING_IDS[stat['season_id']],
+            'stats_team_id': stat['team_id'],
+            'stats_team': ITALIAN_TEAMS[stat['team_id']] if stat['team_id'] in ITALIAN_TEAMS else None,
+            'appearances': next((d['value']['total'] for d in stat['details'] if d['type_id'] == 321), None),
+            'minutes': next((d['value']['total'] for d in stat['details'] if d['type_id'] == 119), None),
+        })
+    pd.DataFrame(overview_rows)
+
+    detail_rows = []
+    for stat in player_data['statistics']:
+        for d in stat['details']:
+            base = {
+                **identity,
+                'season_id': stat['season_id'],
+                'season': SEASON_MAPPING_IDS[stat['season_id']],
+                'stats_team_id': stat['team_id'],
+                'stats_team': ITALIAN_TEAMS[stat['team_id']] if stat['team_id'] in ITALIAN_TEAMS else None,
+                'type_id': d['type']['id'],
+                'type_name': d['type']['name'],
+                'group': d['type'].get('stat_group'),
+            }
+            for k, v in d['value'].items():
+                row = base.copy()
+                row['metric'] = k
+                row['value'] = v
+                detail_rows.append(row)
+    details_df = pd.DataFrame(detail_rows)
+
+    index_cols = list(INDEX_COLUMNS)
+    pivoted = (
+        details_df.pivot_table(index=index_cols, columns=["type_name", "metric"], values="value", aggfunc="first")
+        .reset_index()
+        if not details_df.empty else pd.DataFrame(columns=index_cols)
+    )
+    if not pivoted.empty:
+        pivoted.columns = ["_".join(map(str, col)).rstrip("_") if isinstance(col, tuple) else col
+                           for col in pivoted.columns]
+        totals_wide = pivoted.copy()
+    else:
+        totals_wide = pd.DataFrame([{
+            **identity, **{c: None for c in index_cols if c.startswith("season") or c.startswith("stats_")}
+        }])
+
+    metric_cols = sorted(c for c in totals_wide.columns if c not in index_cols)
+    totals_wide = totals_wide[index_cols + metric_cols]
+    for col in metric_cols:
+        totals_wide[col] = pd.to_numeric(totals_wide[col], errors="coerce")
+        s = totals_wide[col].dropna()
+        if (s % 1 == 0).all():
+            totals_wide[col] = totals_wide[col].astype("Int64")
+    return totals_wide
+
+
+def per_player(fn, payloads, repeat):
+    best, results = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(data, team_id) for data, team_id in payloads]
+        best = min(best, time.perf_counter() - start)
+    return best / len(payloads), results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    teams = list(ITALIAN_TEAMS)
+    payloads = []
+    for i in range(args.players):
+        team_id = teams[i % len(teams)]
+        payloads.append((synthetic_player(team_id * 1000 + i, team_id), team_id))
+    n_details = sum(len(s['details']) for data, _ in payloads for s in data['statistics'])
+    print(f"payloads: {args.players} players, {n_details / args.players:.0f} details per player")
+
+    registry = StatTypeRegistry()
+    t_pivot, old = per_player(pivot_refactor_statistics, payloads, args.repeat)
+    # The first pass registers the synthetic types, the timed ones parse with a settled schema
+    t_flat, new = per_player(lambda data, team_id: refactor_statistics(data, team_id, registry=registry)['totals'],
+                             payloads, args.repeat + 1)
+    for a, b in zip(old, new):
+        # The registry schema is a superset of each player's columns, with registered dtypes
+        assert b.columns.tolist() == list(INDEX_COLUMNS) + list(registry.columns())
+        pd.testing.assert_frame_equal(a, b[a.columns], check_dtype=False)
+    print(f"schema  : {len(registry.columns())} metric columns for every player ({registry.info()})")
+
+    print(f"pivot_table : {t_pivot * 1000:7.2f} ms/player")
+    print(f"flat parser : {t_flat * 1000:7.2f} ms/player  (x{t_pivot / t_flat:.1f})")
+    t_all, _ = per_player(lambda data, team_id: refactor_statistics(data, team_id, ('overview', 'details', 'totals'),
+                                                                    registry),
+                          payloads, args.repeat)
+    print(f"all frames  : {t_all * 1000:7.2f} ms/player  (overview and details on request)")
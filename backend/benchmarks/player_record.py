@@ -0,0 +1,114 @@
+"""
+Memory and serialization benchmark: dict player rows vs compact PlayerRecords.
+
+Uses the giocatori table of SQLITE_PATH when it has rows, otherwise a synthetic
+dataset with the canonical columns. Both sides serialize with the stdlib json
+encoder: "sorted" is Flask's previous default (sort_keys), "unsorted" the compact
+json.dumps baseline the records are written with (dumps_records), so the
+serialization gain over the old responses comes from dropping key sorting.
+
+    python -m backend.benchmarks.player_record --players 600 --repeat 20
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tracemalloc
+
+from backend.api.utils.player_record import records_from_rows, dumps_records
+from backend.database.schema import GIOCATORI_COLUMNS, GIOCATORI_TEXT_COLUMNS, GIOCATORI_INTEGER_COLUMNS
+
+
+def synthetic_rows(n_players):
+    rng = random.Random(0)
+    teams = [f"Team {i}" for i in range(20)]
+
+    def value(col, i):
+        if col == 'id':
+            return i
+        if col == 'position':
+            return rng.choice('PDCA')
+        if col == 'current_team':
+            return rng.choice(teams)
+        if col in GIOCATORI_TEXT_COLUMNS:
+            return f"{col} {i}" if col == 'player_name' else rng.choice([None, 'low', 'medium', 'high'])
+        if col in GIOCATORI_INTEGER_COLUMNS:
+            return rng.choice([None, 0, rng.randrange(100)])
+        return rng.choice([None, 0.0, round(rng.uniform(0, 10), 3)])
+
+    # Lists, like sqlite3.Row: building a record copies the values into a new tuple
+    return list(GIOCATORI_COLUMNS), [[value(col, i) for col in GIOCATORI_COLUMNS] for i in range(1, n_players + 1)]
+
+
+def load_rows(db_path):
+    if not os.path.exists(db_path):
+        return None, None
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.execute('SELECT * FROM giocatori')
+        rows = cur.fetchall()
+        columns = [d[0] for d in cur.description]
+    except sqlite3.Error:
+        return None, None
+    finally:
+        conn.close()
+    return (columns, rows) if rows else (None, None)
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=600, help='synthetic players (when the DB is empty)')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', default=os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db'))
+    args = parser.parse_args()
+
+    columns, rows = load_rows(args.db)
+    source = args.db
+    if rows is None:
+        columns, rows = synthetic_rows(args.players)
+        source = 'synthetic'
+    print(f"dataset: {len(rows)} players x {len(columns)} columns ({source})")
+
+    dicts, dict_bytes = measure_memory(lambda: [dict(zip(columns, row)) for row in rows])
+    records, record_bytes = measure_memory(lambda: records_from_rows(rows, columns))
+
+    # Flask's previous provider: ensure_ascii, sort_keys
+    dict_json = lambda: json.dumps(dicts, sort_keys=True)
+    dict_json_unsorted = lambda: json.dumps(dicts, separators=(',', ':'))
+    record_json = lambda: dumps_records(records)
+    assert json.loads(record_json()) == json.loads(dict_json())
+
+    t_dict_sorted = timeit(dict_json, args.repeat)
+    t_dict = timeit(dict_json_unsorted, args.repeat)
+    t_record = timeit(record_json, args.repeat)
+    t_build_dict = timeit(lambda: [dict(zip(columns, row)) for row in rows], args.repeat)
+    t_build_record = timeit(lambda: records_from_rows(rows, columns), args.repeat)
+
+    print(f"\n{'':<28}{'dict':>12}{'record':>12}{'ratio':>8}")
+    print(f"{'memory (MB)':<28}{dict_bytes / 2**20:>12.2f}{record_bytes / 2**20:>12.2f}{dict_bytes / record_bytes:>7.1f}x")
+    print(f"{'build from rows (ms)':<28}{t_build_dict * 1000:>12.2f}{t_build_record * 1000:>12.2f}"
+          f"{t_build_dict / t_build_record:>7.1f}x")
+    print(f"{'serialize, sorted (ms)':<28}{t_dict_sorted * 1000:>12.2f}{t_record * 1000:>12.2f}"
+          f"{t_dict_sorted / t_record:>7.1f}x")
+    print(f"{'serialize, unsorted (ms)':<28}{t_dict * 1000:>12.2f}{t_record * 1000:>12.2f}{t_dict / t_record:>7.1f}x")
+    print(f"{'payload (KB)':<28}{len(dict_json_unsorted()) / 1024:>12.1f}{len(record_json()) / 1024:>12.1f}")
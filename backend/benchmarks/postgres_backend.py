@@ -0,0 +1,92 @@
+"""
+Postgres (pooled, prepared statements) vs SQLite (production profile) benchmark.
+
+Runs the read/write mix of benchmarks/sqlite_profile.py from concurrent threads,
+as a threaded gunicorn worker would. Needs a local Postgres reachable through
+the POSTGRES_* environment variables; its tables are migrated and re-seeded.
+
+    python -m backend.benchmarks.postgres_backend --threads 8 --ops 300
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.api.utils.sqlite_profile import connect_sqlite
+from backend.api.utils.pg_backend import get_pg_connection
+from backend.database.migrations import migrate_database
+from backend.benchmarks.sqlite_profile import (
+    MIX, N_USERS, OPERATIONS, SEED_PLAYERS_SQL, SEED_USERS_SQL, percentile, seed_rows, setup_db,
+)
+
+
+def setup_postgres():
+    migrate_database('postgres')
+    players, users = seed_rows()
+    db = get_pg_connection()
+    try:
+        db.execute("TRUNCATE strategy_board_targets, auction_log, strategy_board, giocatori, users CASCADE")
+        db.executemany(SEED_PLAYERS_SQL, players)
+        db.executemany(SEED_USERS_SQL, users)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_thread(connect, n_ops, seed):
+    rng = random.Random(seed)
+    names = [name for name, _ in MIX]
+    weights = [w for _, w in MIX]
+    latencies = {name: [] for name in names}
+    errors = 0
+    for _ in range(n_ops):
+        name = rng.choices(names, weights)[0]
+        sub = f"user-{rng.randrange(N_USERS)}"
+        conn = connect()  # per request, like get_db(): a pool checkout on Postgres
+        start = time.perf_counter()
+        try:
+            OPERATIONS[name](conn, sub)
+            latencies[name].append(time.perf_counter() - start)
+        except Exception:
+            conn.rollback()
+            errors += 1
+        finally:
+            conn.close()
+    return latencies, errors
+
+
+def run_backend(label, connect, threads, ops):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda seed: run_thread(connect, ops, seed), range(threads)))
+    elapsed = time.perf_counter() - start
+    merged = {name: [] for name, _ in MIX}
+    errors = sum(n_errors for _, n_errors in results)
+    for latencies, _ in results:
+        for name, values in latencies.items():
+            merged[name].extend(values)
+    total = sum(len(v) for v in merged.values())
+    print(f"\n== {label} threads={threads} ops/thread={ops} ==")
+    print(f"throughput: {total / elapsed:.1f} ops/s  ({total} ops in {elapsed:.2f}s, {errors} errors)")
+    for name, values in merged.items():
+        print(f"  {name:<18} n={len(values):<6} p50={percentile(values, 0.5) * 1000:7.2f} ms  "
+              f"p99={percentile(values, 0.99) * 1000:7.2f} ms")
+    return total / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=300, help='operations per thread')
+    args = parser.parse_args()
+
+    sqlite_path = os.path.join(tempfile.mkdtemp(prefix='pg_bench_'), 'bench.db')
+    setup_db(sqlite_path)
+    sqlite_tp = run_backend('sqlite (production profile)',
+                            lambda: connect_sqlite(sqlite_path, profile='production', timeout=30, check_same_thread=False),
+                            args.threads, args.ops)
+    setup_postgres()
+    pg_tp = run_backend('postgres (pool + prepared statements)', get_pg_connection, args.threads, args.ops)
+    print(f"\npostgres vs sqlite throughput: x{pg_tp / sqlite_tp:.2f}")
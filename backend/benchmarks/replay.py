@@ -0,0 +1,163 @@
+"""
+Record Sportmonks responses once, then replay them offline.
+
+record fetches the current squads of some teams, the statistics of their
+players and the statistic types from the live API (SPORTMONKS_KEY) into a
+fixtures directory. serve and bench replay the fixtures from the local
+stand-in (benchmarks/standin.py) with configurable latency, page size, quota
+and include nesting limit: serve for manual runs of the ingestion CLI
+(--base-url), bench for an end-to-end ingestion benchmark (throughput, calls/s,
+parse time per player) without live calls.
+
+    python -m backend.benchmarks.replay record --teams 37,43
+    python -m backend.benchmarks.replay serve --latency 0.2 --port 8765
+    python -m backend.benchmarks.replay bench --latency 0.2 --quota 50 --strategy team
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import asyncio
+import argparse
+import datetime
+import tempfile
+
+from backend.data import ITALIAN_TEAMS, SEASON_MAPPING, SPORTMONKS_API_URL, SPORTMONKS_KEY
+from backend.benchmarks.standin import StandIn, FixtureSource
+
+FIXTURES_DIR = os.getenv('SPORTMONKS_FIXTURES_DIR', 'backend/benchmarks/fixtures/sportmonks')
+
+
+def _write(path, data):
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, 'wt') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+async def record(out_dir=FIXTURES_DIR, teams=ITALIAN_TEAMS, current_season=SEASON_MAPPING['2526'],
+                 stats_seasons=(SEASON_MAPPING['2425'], SEASON_MAPPING['2324'], SEASON_MAPPING['2223']),
+                 base_url=SPORTMONKS_API_URL, api_token=SPORTMONKS_KEY, concurrency=4):
+    """Record squads, player payloads (statistics.details.type) and types into `out_dir`."""
+    from backend.data.ingest import FETCH_ERRORS, SportmonksClient, fetch_squad
+
+    os.makedirs(os.path.join(out_dir, 'players'), exist_ok=True)
+    squads = {}
+    async with SportmonksClient(base_url, api_token, concurrency=concurrency) as client:
+        try:
+            _write(os.path.join(out_dir, 'types.json.gz'), await client.paginate('core/types'))
+        except FETCH_ERRORS as e:
+            print(f"\033[93m[Replay] types not recorded: {e}\033[0m", file=sys.stderr)
+
+        async def player(player_id):
+            path = os.path.join(out_dir, 'players', f"{player_id}.json.gz")
+            if os.path.exists(path):
+                return
+            try:
+                payload = await client.get(f"players/{player_id}", {
+                    'filters': f"playerStatisticSeasons:{','.join(map(str, stats_seasons))}",
+                    'include': 'statistics.details.type',
+                })
+            except FETCH_ERRORS as e:
+                print(f"\033[91m[Replay] player {player_id} not recorded: {e}\033[0m", file=sys.stderr)
+                return
+            if payload.get('data'):
+                _write(path, payload['data'])
+
+        for team_id in teams:
+            squads[team_id], _ = await fetch_squad(client, team_id, current_season)
+            await asyncio.gather(*(player(p) for p in squads[team_id]))
+            print(f"\033[92m[Replay] {teams[team_id]}: {len(squads[team_id])} players\033[0m", file=sys.stderr)
+        calls, size = client.stats['calls'], client.stats['bytes']
+    # Only players with a payload are served; the others answer 404, as missing players do
+    recorded = {int(name.split('.')[0]) for name in os.listdir(os.path.join(out_dir, 'players'))}
+    manifest = {
+        'recorded_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'source': base_url,
+        'season_id': current_season,
+        'stats_seasons': list(stats_seasons),
+        'squads': {str(t): [p for p in ids if p in recorded] for t, ids in squads.items()},
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    print(f"\033[92m[Replay] recorded {len(recorded)} players in {out_dir}: {calls} calls, "
+          f"{size / 2**20:.1f} MB\033[0m", file=sys.stderr)
+    return manifest
+
+
+def bench(fixtures, latency, quota=None, window=1.0, max_per_page=50, max_include_depth=None, concurrency=8,
+          strategy=None, parse_workers=None):
+    """One ingestion of the recorded squads from the stand-in; returns its stats."""
+    from backend.data.ingest import run, PARSE_WORKERS
+
+    source = FixtureSource(fixtures)
+    standin = StandIn(source, latency, quota, window, max_include_depth, max_per_page)
+    teams = {team_id: ITALIAN_TEAMS.get(team_id, str(team_id)) for team_id in source.squads}
+    try:
+        return asyncio.run(run(standin.base_url, concurrency, teams=teams,
+                               current_season=source.manifest['season_id'],
+                               stats_seasons=source.manifest['stats_seasons'], progress=False,
+                               parse_workers=PARSE_WORKERS if parse_workers is None else parse_workers,
+                               cache_path=None, registry_path=None, strategy=strategy, history_path=None,
+                               out_dir=tempfile.mkdtemp(prefix='replay_')))
+    finally:
+        standin.close()
+
+
+if __name__ == "__main__":
+    from backend.data.planner import STRATEGIES
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    rec = commands.add_parser('record', help='record live responses into fixtures')
+    rec.add_argument('--out', default=FIXTURES_DIR)
+    rec.add_argument('--teams', help='comma separated team ids (default: every Serie A team)')
+    rec.add_argument('--season', default='2526')
+    rec.add_argument('--stats-seasons', default='2425,2324,2223')
+    rec.add_argument('--base-url', default=SPORTMONKS_API_URL)
+    rec.add_argument('--concurrency', type=int, default=4)
+    for name, help_text in (('serve', 'serve the fixtures until interrupted'),
+                            ('bench', 'benchmark ingestion against the fixtures')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--fixtures', default=FIXTURES_DIR)
+        command.add_argument('--latency', type=float, default=0.2, help='server latency per request (s)')
+        command.add_argument('--quota', type=int, help='calls per entity per --window seconds (default unlimited)')
+        command.add_argument('--window', type=float, default=1.0)
+        command.add_argument('--max-per-page', type=int, default=50)
+        command.add_argument('--max-include-depth', type=int)
+    commands.choices['serve'].add_argument('--port', type=int, default=8765)
+    commands.choices['bench'].add_argument('--concurrency', type=int, default=8)
+    commands.choices['bench'].add_argument('--strategy', choices=STRATEGIES)
+    commands.choices['bench'].add_argument('--parse-workers', type=int)
+    args = parser.parse_args()
+    if args.command != 'record' and not os.path.exists(os.path.join(args.fixtures, 'manifest.json')):
+        parser.error(f"no fixtures in {args.fixtures}: record them first")
+
+    if args.command == 'record':
+        teams = ({int(t): ITALIAN_TEAMS.get(int(t), t) for t in args.teams.split(',')} if args.teams
+                 else ITALIAN_TEAMS)
+        asyncio.run(record(args.out, teams, SEASON_MAPPING[args.season],
+                           [SEASON_MAPPING[s] for s in args.stats_seasons.split(',')], args.base_url,
+                           concurrency=args.concurrency))
+    elif args.command == 'serve':
+        standin = StandIn(FixtureSource(args.fixtures), args.latency, args.quota, args.window,
+                          args.max_include_depth, args.max_per_page, port=args.port)
+        print(f"\033[92m[Replay] serving {args.fixtures} at {standin.base_url} (Ctrl-C to stop)\033[0m",
+              file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            standin.close()
+    else:
+        stats = bench(args.fixtures, args.latency, args.quota, args.window, args.max_per_page,
+                      args.max_include_depth, args.concurrency, args.strategy, args.parse_workers)
+        players = stats['checkpoint']['players_done']
+        print(f"replay ({stats['strategy']}, {args.latency * 1000:.0f} ms/request): {players} players, "
+              f"{stats['rows']} rows in {stats['seconds']:.2f}s")
+        print(f"throughput : {players / stats['seconds']:7.1f} players/s")
+        print(f"calls      : {stats['calls']} ({stats['calls'] / stats['seconds']:.1f}/s), "
+              f"{stats['throttled']} throttled, {stats['retries']} retries, {len(stats['failed'])} failed, "
+              f"{stats['bytes'] / 2**20:.1f} MB")
+        print(f"parse      : {stats['parse_seconds'] / max(1, players) * 1000:7.2f} ms/player")
@@ -0,0 +1,153 @@
+"""
+Read/write mix benchmark for the SQLite connection profiles.
+
+Several worker processes (like gunicorn workers) share one database file and run
+a mix of player-list reads, auction-log saves and strategy-board saves.
+Reports throughput and p50/p99 latency per operation for each profile, and the
+latency of a player-list read on an idle database, which separates the cost of
+the pragmas from contention: with WAL writers no longer block readers, so on few
+CPUs more reads run at once and their p50 under load rises with the overlap.
+
+    python -m backend.benchmarks.sqlite_profile --workers 4 --ops 500
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from multiprocessing import Pool
+
+from backend.api.utils.sqlite_profile import connect_sqlite, sqlite_pragmas
+from backend.database.migrations import migrate_database
+
+N_PLAYERS = 600
+N_USERS = 50
+# Share of each operation in the mix
+MIX = [('read_players', 0.5), ('save_auction_log', 0.3), ('save_strategy', 0.2)]
+
+
+def seed_rows():
+    players = [(i, f"Player {i}", f"Team {i % 20}", random.choice('PDCA'), random.uniform(1, 5), random.uniform(1, 60))
+               for i in range(1, N_PLAYERS + 1)]
+    users = [(f"user-{i}",) for i in range(N_USERS)]
+    return players, users
+
+
+SEED_PLAYERS_SQL = "INSERT INTO giocatori (id, player_name, current_team, position, stars, price_expected) VALUES (?, ?, ?, ?, ?, ?)"
+SEED_USERS_SQL = "INSERT INTO users (google_sub) VALUES (?)"
+
+
+def setup_db(db_path, profile):
+    migrate_database('sqlite', db_path)
+    players, users = seed_rows()
+    conn = sqlite3.connect(db_path)
+    conn.executemany(SEED_PLAYERS_SQL, players)
+    conn.executemany(SEED_USERS_SQL, users)
+    conn.commit()
+    # The migrations connect with SQLITE_PROFILE and journal_mode persists in the
+    # file: put the database in the journal mode of the profile being measured
+    conn.execute(f"PRAGMA journal_mode={sqlite_pragmas(profile).get('journal_mode', 'DELETE')}")
+    conn.close()
+
+
+def read_players(conn, sub):
+    conn.execute('SELECT * FROM giocatori').fetchall()
+
+
+def save_auction_log(conn, sub):
+    log = {str(random.randint(1, N_PLAYERS)): {'buyer': 'me', 'price': random.randint(1, 100)} for _ in range(20)}
+    conn.execute(
+        '''
+        INSERT INTO auction_log (google_sub, auction_log, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(google_sub) DO UPDATE SET auction_log=excluded.auction_log, updated_at=CURRENT_TIMESTAMP
+        ''',
+        (sub, json.dumps(log))
+    )
+    conn.commit()
+
+
+def save_strategy(conn, sub):
+    conn.execute("DELETE FROM strategy_board_targets WHERE google_sub = ?", (sub,))
+    for player_id in random.sample(range(1, N_PLAYERS + 1), 15):
+        conn.execute(
+            "INSERT INTO strategy_board_targets (google_sub, player_id, max_bid) VALUES (?, ?, ?)",
+            (sub, player_id, random.randint(1, 100))
+        )
+    conn.commit()
+
+
+OPERATIONS = {'read_players': read_players, 'save_auction_log': save_auction_log, 'save_strategy': save_strategy}
+
+
+def worker(args):
+    db_path, profile, n_ops, seed = args
+    random.seed(seed)
+    conn = connect_sqlite(db_path, profile=profile, timeout=30)
+    names = [name for name, _ in MIX]
+    weights = [w for _, w in MIX]
+    latencies = {name: [] for name in names}
+    errors = 0
+    for _ in range(n_ops):
+        name = random.choices(names, weights)[0]
+        sub = f"user-{random.randrange(N_USERS)}"
+        start = time.perf_counter()
+        try:
+            OPERATIONS[name](conn, sub)
+        except sqlite3.OperationalError:
+            conn.rollback()
+            errors += 1
+            continue
+        latencies[name].append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def run_profile(profile, workers, ops):
+    tmp_dir = tempfile.mkdtemp(prefix='sqlite_bench_')
+    db_path = os.path.join(tmp_dir, 'bench.db')
+    setup_db(db_path, profile)
+    conn = connect_sqlite(db_path, profile=profile)
+    idle = []
+    for _ in range(20):
+        t = time.perf_counter()
+        read_players(conn, None)
+        idle.append(time.perf_counter() - t)
+    conn.close()
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        results = pool.map(worker, [(db_path, profile, ops, seed) for seed in range(workers)])
+    elapsed = time.perf_counter() - start
+    merged = {name: [] for name, _ in MIX}
+    errors = 0
+    for latencies, n_errors in results:
+        errors += n_errors
+        for name, values in latencies.items():
+            merged[name].extend(values)
+    total = sum(len(v) for v in merged.values())
+    print(f"\n== profile={profile} workers={workers} ops/worker={ops} ==")
+    print(f"throughput: {total / elapsed:.1f} ops/s  ({total} ops in {elapsed:.2f}s, {errors} lock errors)")
+    print(f"  {'read_players idle':<18} n={len(idle):<6} p50={percentile(idle, 0.5) * 1000:7.2f} ms")
+    for name, values in merged.items():
+        print(f"  {name:<18} n={len(values):<6} p50={percentile(values, 0.5) * 1000:7.2f} ms  "
+              f"p99={percentile(values, 0.99) * 1000:7.2f} ms")
+    return total / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=500, help='operations per worker')
+    parser.add_argument('--profiles', nargs='+', default=['default', 'production'])
+    args = parser.parse_args()
+    throughput = {profile: run_profile(profile, args.workers, args.ops) for profile in args.profiles}
+    if 'default' in throughput and 'production' in throughput:
+        print(f"\nproduction vs default throughput: x{throughput['production'] / throughput['default']:.2f}")
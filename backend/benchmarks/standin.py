@@ -0,0 +1,224 @@
+"""
+Local Sportmonks v3 stand-in for benchmarks and offline ingestion runs.
+
+StandIn serves the endpoints ingestion uses (squads, teams by season, seasons,
+players, core types, fixtures between dates) from a source of squads and player payloads:
+SyntheticSource generates them, FixtureSource replays the responses recorded by
+`python -m backend.benchmarks.replay record`. Latency per request, page size
+cap, per-entity quota (rate_limit block, HTTP 429 when exhausted) and include
+nesting limit (HTTP 403) are configurable; responses carry an ETag.
+"""
+import os
+import gzip
+import json
+import time
+import random
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from backend.data import SEASON_MAPPING
+from backend.data.sportmonks import STATISTICS_DETAIL_TYPE_MAPPING
+
+CURRENT_SEASON = SEASON_MAPPING['2526']
+STATS_SEASONS = [SEASON_MAPPING['2425'], SEASON_MAPPING['2324'], SEASON_MAPPING['2223']]
+# The mapped types plus generic ones, so a player carries about as many details as a real one
+STAT_TYPES = {**STATISTICS_DETAIL_TYPE_MAPPING, **{9000 + i: f"Stat {i}" for i in range(40)}}
+
+
+def synthetic_player(player_id, team_id):
+    rng = random.Random(player_id)
+    statistics = []
+    # The season being played, then the finished ones
+    for season_id in [CURRENT_SEASON] + STATS_SEASONS[:rng.randrange(1, len(STATS_SEASONS) + 1)]:
+        details = []
+        for type_id in rng.sample(sorted(STAT_TYPES), 30):
+            value = {'total': rng.randrange(50)}
+            if rng.random() < 0.3:
+                value.update(home=rng.randrange(25), away=rng.randrange(25))
+            details.append({'type_id': type_id, 'value': value,
+                            'type': {'id': type_id, 'name': STAT_TYPES[type_id], 'stat_group': None}})
+        statistics.append({'season_id': season_id, 'team_id': team_id, 'details': details})
+    return {'id': player_id, 'display_name': f"Player {player_id}", 'date_of_birth': '1999-01-01',
+            'position_id': rng.choice([24, 25, 26, 27]), 'statistics': statistics}
+
+
+class SyntheticSource:
+    """`players_per_team` synthetic players (ids team_id * 1000 + i) per team."""
+
+    def __init__(self, teams, players_per_team):
+        self.season_id = CURRENT_SEASON
+        self.squads = {team_id: [team_id * 1000 + i for i in range(players_per_team)] for team_id in teams}
+        self._team_of = {p: t for t, squad in self.squads.items() for p in squad}
+
+    def player(self, player_id):
+        return synthetic_player(player_id, self._team_of[player_id])
+
+    def types(self):
+        return [{'id': type_id, 'name': name, 'code': name.lower().replace(' ', '-'),
+                 'model_type': 'statistic', 'stat_group': None} for type_id, name in STAT_TYPES.items()]
+
+
+class FixtureSource:
+    """The squads and player payloads recorded in `path` (see replay.record)."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        self.path = path
+        self.season_id = self.manifest['season_id']
+        self.squads = {int(team_id): ids for team_id, ids in self.manifest['squads'].items()}
+        self._raw = {}
+
+    def _read(self, name):
+        if name not in self._raw:
+            with gzip.open(os.path.join(self.path, name), 'rb') as f:
+                self._raw[name] = f.read()
+        # A fresh copy per response: the server strips and filters it
+        return json.loads(self._raw[name])
+
+    def player(self, player_id):
+        return self._read(os.path.join('players', f"{player_id}.json.gz"))
+
+    def types(self):
+        if not os.path.exists(os.path.join(self.path, 'types.json.gz')):
+            return []
+        return self._read('types.json.gz')
+
+
+def _filter_seasons(data, filters):
+    # playerStatisticSeasons:<ids> keeps the statistics of those seasons
+    for f in filters.split(';'):
+        name, _, ids = f.partition(':')
+        if name == 'playerStatisticSeasons' and ids:
+            wanted = {int(s) for s in ids.split(',')}
+            data['statistics'] = [s for s in data.get('statistics') or [] if s['season_id'] in wanted]
+    return data
+
+
+class StandIn:
+    """Sportmonks v3 stand-in on 127.0.0.1 (a daemon thread) serving `source`."""
+
+    def __init__(self, source, latency=0.0, quota=None, window=1.0, max_include_depth=None, max_per_page=50,
+                 port=0):
+        self.source = source
+        self.squads = source.squads
+        self.team_of = {p: t for t, squad in self.squads.items() for p in squad}
+        self.latency = latency
+        self.quota, self.window = quota, window
+        self.max_include_depth = max_include_depth  # deeper includes are answered with 403
+        self.max_per_page = max_per_page  # larger per_page values are capped, as the API does
+        self.requests = 0
+        self.unavailable = set()  # player ids answered with 404
+        self.played = set()  # team ids with a fixture in every fixtures/between window
+        self._used = {}  # entity -> (window start, calls)
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body = standin.handle(self.path)
+                data = json.dumps(body).encode()
+                # The quota block changes on every call, so it is left out of the ETag
+                etag = '"%s"' % hashlib.sha1(json.dumps(body.get('data')).encode()).hexdigest()
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    status, data = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v3/football"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _rate_limit(self, entity):
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            start, used = self._used.get(entity, (now, 0))
+            if now - start >= self.window:
+                start, used = now, 0
+            used += 1
+            self._used[entity] = (start, used)
+        resets = max(0.0, self.window - (now - start))
+        if self.quota is None:
+            return True, {'resets_in_seconds': 3600, 'remaining': 3000, 'requested_entity': entity}
+        return used <= self.quota, {'resets_in_seconds': resets, 'remaining': max(0, self.quota - used),
+                                    'requested_entity': entity}
+
+    def player(self, player_id, include, filters=''):
+        data = _filter_seasons(self.source.player(player_id), filters)
+        if not include.endswith('.type'):
+            for stat in data['statistics']:
+                for d in stat['details']:
+                    d.pop('type', None)
+        return data
+
+    def handle(self, path):
+        url = urlparse(path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')[2:]  # drop v3/football (or v3/core)
+        time.sleep(self.latency)
+        allowed, rate_limit = self._rate_limit(parts[0] if parts else '')
+        if not allowed:
+            return 429, {'message': 'Too Many Attempts.', 'rate_limit': rate_limit}
+        include, filters = query.get('include', ''), query.get('filters', '')
+        page, per_page = int(query.get('page', 1)), min(int(query.get('per_page', 25)), self.max_per_page)
+        if self.max_include_depth is not None and len(include.split('.')) > self.max_include_depth:
+            return 403, {'message': 'Include nesting exceeds your plan.', 'rate_limit': rate_limit}
+        if parts[:2] == ['squads', 'seasons'] and len(parts) == 5:
+            squad = self.squads.get(int(parts[4]), [])
+            chunk = squad[(page - 1) * per_page:page * per_page]
+            members = [{'player_id': p, 'team_id': int(parts[4])} for p in chunk]
+            if include.startswith('player.'):
+                for member in members:
+                    member['player'] = self.player(member['player_id'], include, filters)
+            return 200, {
+                'data': members,
+                'pagination': {'count': len(chunk), 'per_page': per_page, 'current_page': page,
+                               'has_more': page * per_page < len(squad)},
+                'rate_limit': rate_limit,
+            }
+        if parts[:2] == ['teams', 'seasons'] and len(parts) == 3:
+            team_ids = sorted(self.squads)[(page - 1) * per_page:page * per_page]
+            teams = [{'id': team_id, 'players': [{'player_id': p, 'team_id': team_id} for p in self.squads[team_id]]}
+                     for team_id in team_ids]
+            if include.startswith('players.player.'):
+                for team in teams:
+                    for member in team['players']:
+                        member['player'] = self.player(member['player_id'], include, filters)
+            return 200, {'data': teams, 'pagination': {'has_more': page * per_page < len(self.squads)},
+                         'rate_limit': rate_limit}
+        if parts == ['types']:
+            types = self.source.types()
+            return 200, {'data': types[(page - 1) * per_page:page * per_page],
+                         'pagination': {'has_more': page * per_page < len(types)}, 'rate_limit': rate_limit}
+        if parts[0] == 'seasons' and len(parts) == 2:
+            # Every season but the one of the squads is over
+            season_id = int(parts[1])
+            return 200, {'data': {'id': season_id, 'finished': season_id != self.source.season_id,
+                                  'is_current': season_id == self.source.season_id}, 'rate_limit': rate_limit}
+        if parts[:2] == ['fixtures', 'between']:
+            kickoff = int(time.time()) - 1
+            fixtures = [{'id': i, 'starting_at_timestamp': kickoff, 'participants': [{'id': team_id}]}
+                        for i, team_id in enumerate(sorted(self.played))]
+            return 200, {'data': fixtures, 'pagination': {'has_more': False}, 'rate_limit': rate_limit}
+        if parts[0] == 'players' and len(parts) == 2 and int(parts[1]) in self.unavailable:
+            return 404, {'message': 'Not found'}
+        if parts[0] == 'players' and len(parts) == 2 and int(parts[1]) in self.team_of:
+            return 200, {'data': self.player(int(parts[1]), include, filters), 'rate_limit': rate_limit}
+        return 404, {'message': 'Not found'}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
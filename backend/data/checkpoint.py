@@ -0,0 +1,149 @@
+"""
+Checkpoint manifest of an ingestion run.
+
+A SQLite file inside the run directory records every squad (its player ids),
+every player (status, fetch time, error, and the Parquet part holding its rows)
+and every player season (content hash of its statistics). A resumed run skips
+what is done and retries what failed; a --since run also refreshes the players
+whose team has played since they were fetched. When a player is refetched its
+rows move to a new part, and combine keeps only each player's latest part.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+
+MANIFEST_FILE = 'manifest.sqlite'
+
+_DDL = [
+    "CREATE TABLE IF NOT EXISTS squads ("
+    " team_id INTEGER NOT NULL, season_id INTEGER NOT NULL, status TEXT NOT NULL, player_ids TEXT,"
+    " fetched_at REAL, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (team_id, season_id))",
+    "CREATE TABLE IF NOT EXISTS players ("
+    " player_id INTEGER PRIMARY KEY, team_id INTEGER, status TEXT NOT NULL, part TEXT,"
+    " fetched_at REAL, error TEXT, attempts INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS player_seasons ("
+    " player_id INTEGER NOT NULL, season_id INTEGER NOT NULL, content_hash TEXT NOT NULL,"
+    " fetched_at REAL NOT NULL, PRIMARY KEY (player_id, season_id))",
+    "CREATE INDEX IF NOT EXISTS idx_players_part ON players (part)",
+]
+
+
+class CheckpointManifest:
+
+    def __init__(self, out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self._conn = sqlite3.connect(os.path.join(out_dir, MANIFEST_FILE))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _DDL:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    # --- Squads ---
+
+    def squad(self, team_id, season_id):
+        """Player ids of a squad fetched by this run, or None."""
+        row = self._conn.execute(
+            "SELECT player_ids FROM squads WHERE team_id = ? AND season_id = ? AND status = 'done'",
+            (team_id, season_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_squad(self, team_id, season_id, player_ids=None, error=None):
+        self._conn.execute(
+            "INSERT INTO squads (team_id, season_id, status, player_ids, fetched_at, error, attempts)"
+            " VALUES (?, ?, ?, ?, ?, ?, 1) ON CONFLICT (team_id, season_id) DO UPDATE SET"
+            " status = excluded.status, player_ids = COALESCE(excluded.player_ids, squads.player_ids),"
+            " fetched_at = excluded.fetched_at, error = excluded.error, attempts = squads.attempts + 1",
+            (team_id, season_id, 'failed' if error else 'done',
+             None if player_ids is None else json.dumps(player_ids), time.time(), error)
+        )
+        self._conn.commit()
+
+    # --- Players ---
+
+    def needs_fetch(self, player_ids, changed_after=None):
+        """
+        The players to fetch: never fetched or failed, plus those fetched before
+        `changed_after` (epoch seconds the player's team last played), if given.
+        """
+        if not player_ids:
+            return []
+        placeholders = ','.join('?' * len(player_ids))
+        done = dict(self._conn.execute(
+            f"SELECT player_id, fetched_at FROM players WHERE status = 'done' AND player_id IN ({placeholders})",
+            list(player_ids)
+        ).fetchall())
+        return [p for p in player_ids
+                if p not in done or (changed_after is not None and done[p] < changed_after)]
+
+    def record_players(self, team_id, fetched, part):
+        """
+        Mark players done: `fetched` is a list of (player_id, season hashes) whose rows
+        were written to `part` (None when they had no statistics).
+        """
+        now = time.time()
+        part = os.path.relpath(part, self.out_dir) if part else None
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO players (player_id, team_id, status, part, fetched_at, error, attempts)"
+                " VALUES (?, ?, 'done', ?, ?, NULL, 1) ON CONFLICT (player_id) DO UPDATE SET"
+                " team_id = excluded.team_id, status = 'done', part = excluded.part,"
+                " fetched_at = excluded.fetched_at, error = NULL, attempts = players.attempts + 1",
+                [(player_id, team_id, part, now) for player_id, _ in fetched]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO player_seasons (player_id, season_id, content_hash, fetched_at)"
+                " VALUES (?, ?, ?, ?)",
+                [(player_id, season_id, content_hash, now)
+                 for player_id, hashes in fetched for season_id, content_hash in (hashes or {}).items()]
+            )
+
+    def record_player_failure(self, player_id, team_id, error):
+        # The part of a previous successful fetch is kept, so its rows stay in the output
+        self._conn.execute(
+            "INSERT INTO players (player_id, team_id, status, error, attempts) VALUES (?, ?, 'failed', ?, 1)"
+            " ON CONFLICT (player_id) DO UPDATE SET status = 'failed', error = excluded.error,"
+            " attempts = players.attempts + 1",
+            (player_id, team_id, error)
+        )
+        self._conn.commit()
+
+    # --- Parts ---
+
+    def current_parts(self):
+        """Absolute part path -> ids of the players whose latest rows it holds."""
+        parts = {}
+        for player_id, part in self._conn.execute("SELECT player_id, part FROM players WHERE part IS NOT NULL"):
+            parts.setdefault(os.path.abspath(os.path.join(self.out_dir, part)), set()).add(player_id)
+        return parts
+
+    def prune_parts(self, part_paths):
+        """Delete parts no player points at (superseded, or written but never recorded)."""
+        current = self.current_parts()
+        removed = 0
+        for path in part_paths:
+            if path not in current:
+                os.remove(path)
+                removed += 1
+        if removed:
+            print(f"\033[93m[Checkpoint] removed {removed} superseded or unrecorded parts\033[0m", file=sys.stderr)
+        return removed
+
+    def summary(self):
+        counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM players GROUP BY status").fetchall())
+        squads = dict(self._conn.execute("SELECT status, COUNT(*) FROM squads GROUP BY status").fetchall())
+        return {'players_done': counts.get('done', 0), 'players_failed': counts.get('failed', 0),
+                'squads_done': squads.get('done', 0), 'squads_failed': squads.get('failed', 0)}
+
+
+def latest_run(ingest_dir):
+    """The most recent run directory with a manifest, or None."""
+    runs = sorted(d for d in os.listdir(ingest_dir)
+                  if os.path.exists(os.path.join(ingest_dir, d, MANIFEST_FILE))) if os.path.isdir(ingest_dir) else []
+    return os.path.join(ingest_dir, runs[-1]) if runs else None
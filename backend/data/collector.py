@@ -0,0 +1,158 @@
+"""
+Streaming, partitioned output for Sportmonks ingestion.
+
+Each finished batch of player rows (one team) is written straight to its own
+Parquet part, out_dir/team=<id>/part-<n>.parquet, so memory holds one batch at
+a time and a crash keeps every batch already written. combine_partitions()
+unifies the part schemas and streams the parts, one at a time, into a single
+Parquet file and/or the CSV the feature pipeline reads.
+
+    python -m backend.data.collector backend/data/ingest_runs/<run> --csv player_statistics.csv
+"""
+import os
+import sys
+import glob
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pandas as pd
+
+
+class PartitionedCollector:
+    """Writes batches of rows as Parquet parts partitioned by a key (team id)."""
+
+    def __init__(self, out_dir, partition='team'):
+        self.out_dir = out_dir
+        self.partition = partition
+        self.stats = {'rows': 0, 'parts': 0, 'bytes': 0}
+        self._next_part = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _partition_dir(self, key):
+        return os.path.join(self.out_dir, f"{self.partition}={key}")
+
+    def write(self, key, frames):
+        """Write the frames of one batch as a new part of partition `key`; returns its path."""
+        frames = [f for f in frames if f is not None and not f.empty]
+        if not frames:
+            return None
+        # Concatenating one batch is cheap; the accumulated output is never held in memory
+        table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True, sort=False), preserve_index=False)
+        directory = self._partition_dir(key)
+        os.makedirs(directory, exist_ok=True)
+        n = self._next_part.get(key)
+        if n is None:
+            # After the parts of an earlier (resumed) run
+            existing = [int(os.path.basename(p)[5:10]) for p in glob.glob(os.path.join(directory, 'part-*.parquet'))]
+            n = max(existing, default=-1) + 1
+        self._next_part[key] = n + 1
+        path = os.path.join(directory, f"part-{n:05d}.parquet")
+        tmp = f"{path}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        self.stats['rows'] += table.num_rows
+        self.stats['parts'] += 1
+        self.stats['bytes'] += os.path.getsize(path)
+        return path
+
+
+def list_parts(out_dir):
+    return sorted(os.path.abspath(p) for p in glob.glob(os.path.join(out_dir, '*=*', 'part-*.parquet')))
+
+
+def _unified_type(types):
+    types = [t for t in types if not pa.types.is_null(t)]
+    if not types:
+        return pa.null()
+    if any(pa.types.is_string(t) or pa.types.is_large_string(t) for t in types):
+        return pa.string()
+    if any(pa.types.is_floating(t) for t in types):
+        return pa.float64()
+    if all(pa.types.is_integer(t) for t in types):
+        return pa.int64()
+    if all(pa.types.is_boolean(t) for t in types):
+        return pa.bool_()
+    return types[0]
+
+
+def unified_schema(parts, leading_columns=()):
+    """One schema for all parts: `leading_columns` first, then the other columns sorted."""
+    types = {}
+    for path in parts:
+        for field in pq.read_schema(path):
+            types.setdefault(field.name, []).append(field.type)
+    leading = [c for c in leading_columns if c in types]
+    names = leading + sorted(c for c in types if c not in leading)
+    return pa.schema([(name, _unified_type(types[name])) for name in names])
+
+
+def _conform(table, schema):
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            column = table.column(field.name)
+            columns.append(column if column.type == field.type else column.cast(field.type))
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def combine_partitions(out_dir, parquet_path=None, csv_path=None, leading_columns=(), keep=None):
+    """
+    Stream every part into one Parquet and/or CSV file with a unified schema; returns
+    the row count. `keep` (part path -> player ids, from the checkpoint manifest)
+    takes from each part only the players whose latest rows it holds.
+    """
+    parts = list_parts(out_dir)
+    if keep is not None:
+        keep = {os.path.abspath(path): ids for path, ids in keep.items()}
+        parts = [path for path in parts if path in keep]
+    if not parts:
+        print(f"\033[93m[Collector] no parts in {out_dir}\033[0m", file=sys.stderr)
+        return 0
+    schema = unified_schema(parts, leading_columns)
+    parquet_writer = pq.ParquetWriter(parquet_path, schema) if parquet_path else None
+    csv_writer = pa_csv.CSVWriter(csv_path, schema) if csv_path else None
+    rows = 0
+    try:
+        for path in parts:
+            table = pq.read_table(path)
+            if keep is not None:
+                ids = pa.array(sorted(keep[path]), type=table.schema.field('player_id').type)
+                table = table.filter(pc.is_in(table['player_id'], value_set=ids))
+            table = _conform(table, schema)
+            rows += table.num_rows
+            if parquet_writer is not None:
+                parquet_writer.write_table(table)
+            if csv_writer is not None:
+                csv_writer.write_table(table)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if csv_writer is not None:
+            csv_writer.close()
+    print(f"\033[92m[Collector] combined {len(parts)} parts, {rows} rows, {len(schema)} columns -> "
+          f"{', '.join(p for p in (parquet_path, csv_path) if p)}\033[0m", file=sys.stderr)
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    from backend.data.data_loading import INDEX_COLUMNS
+    from backend.data.checkpoint import CheckpointManifest, MANIFEST_FILE
+
+    parser = argparse.ArgumentParser(description="Combine the Parquet partitions of an ingestion run")
+    parser.add_argument('out_dir', help='run directory with the <partition>=<key>/part-*.parquet files')
+    parser.add_argument('--parquet', help='combined Parquet file')
+    parser.add_argument('--csv', help='combined CSV file')
+    args = parser.parse_args()
+    if not (args.parquet or args.csv):
+        parser.error('give --parquet and/or --csv')
+    keep = None
+    if os.path.exists(os.path.join(args.out_dir, MANIFEST_FILE)):
+        manifest = CheckpointManifest(args.out_dir)
+        keep = manifest.current_parts()
+        manifest.close()
+    combine_partitions(args.out_dir, args.parquet, args.csv, leading_columns=['player_id'] + INDEX_COLUMNS, keep=keep)
@@ -1,11 +1,18 @@
 
 
-import datetime
+import numpy as np
 import pandas as pd
 import requests
-from tqdm import tqdm
-from backend.data import ITALIAN_TEAMS, POSITIONS, SEASON_MAPPING, SPORTMONKS_API_URL, SPORTMONKS_KEY
+from backend.data import ITALIAN_TEAMS, POSITIONS, SPORTMONKS_API_URL, SPORTMONKS_KEY
 from backend.data.sportmonks import SEASON_MAPPING_IDS
+from backend.data.stat_types import INT, StatTypeRegistry, to_number
+
+# Identifying columns of a totals row; the metric columns follow
+INDEX_COLUMNS = ["player_name", "birthday",
+                 "season_id", "season",
+                 "stats_team_id", "stats_team",
+                 "current_team_id", "current_team",
+                 "position_id", "position"]
 
 
 def get_season_team_players(team_id, season_id, season_stats_id, per_page=50, max_pages=10):
@@ -75,179 +82,121 @@ def get_player_stats(player_id, team_id, season_stats_id=None, max_pages=10, per
 
     return stats
 
-def refactor_statistics(player_data, team_id):
-    import pandas as pd
-    from collections import defaultdict
-    from itertools import chain
+def _player_columns(player_data, team_id):
+    position_id = player_data['position_id']
+    return {
+        "player_name"     : player_data["display_name"],
+        "birthday"        : player_data["date_of_birth"],
+        "current_team_id" : team_id,
+        "current_team"    : ITALIAN_TEAMS[team_id],
+        "position_id"     : position_id,
+        "position"        : POSITIONS[position_id] if position_id in POSITIONS else None,
+    }
 
-    # --------------------------------------------------
-    # 1)  Put the API response in `player`
-    # --------------------------------------------------
-    # player = requests.get(...).json()['data']        # usual way
-    # --- for this example assume you've placed the big dict in `player` ---
 
-    # --------------------------------------------------
-    # 2)  High‑level season overview  (one row per season)
-    # --------------------------------------------------
-    
-    player_name = player_data["display_name"]
-    birthday    = player_data["date_of_birth"]
-    current_team_id = team_id
-    current_team = ITALIAN_TEAMS[team_id]
-    position_id = player_data['position_id']
-    position = POSITIONS[position_id] if position_id in POSITIONS else None
-    
-    stats_bool = len(player_data['statistics']) > 0
-    
-    overview_rows = []
+def _season_columns(stat):
+    return {
+        'season_id'     : stat['season_id'],
+        'season'        : SEASON_MAPPING_IDS[stat['season_id']],
+        'stats_team_id' : stat['team_id'],
+        'stats_team'    : ITALIAN_TEAMS[stat['team_id']] if stat['team_id'] in ITALIAN_TEAMS else None,
+    }
+
+
+_registry = None
+
+
+def default_registry():
+    """The statistic type registry saved by the last ingestion (or the seed), loaded once."""
+    global _registry
+    if _registry is None:
+        _registry = StatTypeRegistry.load()
+    return _registry
+
+
+def _wide_totals(player_data, team_id, registry):
+    """
+    One row per season (and stats team): INDEX_COLUMNS, then every metric column of
+    `registry` (`<type name>_<metric>`, A-Z) with its registered dtype. The details
+    are walked once; the first non-null value of a column wins.
+    """
+    player = _player_columns(player_data, team_id)
+    seasons = {}
     for stat in player_data['statistics']:
-        overview_rows.append({
-            "player_name" : player_name,
-            "birthday"    : birthday,
-            "current_team_id" : current_team_id,
-            "current_team"    : current_team,
-            "position_id" : position_id,
-            "position"    : position,
-            
-            'season_id'   : stat['season_id'],
-            'season'      : SEASON_MAPPING_IDS[stat['season_id']],
-            'stats_team_id'     : stat['team_id'],
-            'stats_team'        : ITALIAN_TEAMS[stat['team_id']] if stat['team_id'] in ITALIAN_TEAMS else None,
-            #  convenience: total appearances / minutes if present
-            'appearances' : next((d['value']['total']
-                                for d in stat['details'] if d['type_id'] == 321),
-                                None),
-            'minutes'     : next((d['value']['total']
-                                for d in stat['details'] if d['type_id'] == 119),
-                                None),
-        })
-    stats_df = pd.DataFrame(overview_rows)
-
-    # --------------------------------------------------
-    # 3)  Full detail table  (one row per statistic detail)
-    #     We *explode* each nested value‑dict into flat columns
-    # --------------------------------------------------
-    detail_rows = []
+        values = seasons.setdefault((stat['season_id'], stat['team_id']), (_season_columns(stat), {}))[1]
+        for d in stat['details']:
+            for metric, value in d['value'].items():
+                value = to_number(value)
+                if value is not None:
+                    column = registry.column(d['type_id'], metric, value, (d.get('type') or {}).get('name'))
+                    values.setdefault(column, value)
+    seasons = [seasons[key] for key in sorted(seasons) if seasons[key][1]]
+    if not seasons:
+        # No statistics: the player's columns only
+        seasons = [({c: None for c in INDEX_COLUMNS if c not in player}, {})]
+
+    columns = {c: [player[c]] * len(seasons) if c in player else [season[c] for season, _ in seasons]
+               for c in INDEX_COLUMNS}
+    # Preallocated blocks (metric column x season): integer values with a null mask, floats
+    schema = registry.columns()
+    position = {c: i for i, c in enumerate(schema)}
+    integers = np.zeros((len(schema), len(seasons)), dtype=np.int64)
+    floats = np.full((len(schema), len(seasons)), np.nan)
+    missing = np.ones((len(schema), len(seasons)), dtype=bool)
+    for j, (_, values) in enumerate(seasons):
+        for c, value in values.items():
+            if schema[c] == INT:
+                integers[position[c], j] = value
+                missing[position[c], j] = False
+            else:
+                floats[position[c], j] = value
+    for i, (c, dtype) in enumerate(schema.items()):
+        columns[c] = pd.arrays.IntegerArray(integers[i], missing[i]) if dtype == INT else floats[i]
+    return pd.DataFrame(columns)
+
+
+def _overview(player_data, team_id):
+    player = _player_columns(player_data, team_id)
+    return pd.DataFrame([{
+        **player,
+        **_season_columns(stat),
+        #  convenience: total appearances / minutes if present
+        'appearances' : next((d['value']['total'] for d in stat['details'] if d['type_id'] == 321), None),
+        'minutes'     : next((d['value']['total'] for d in stat['details'] if d['type_id'] == 119), None),
+    } for stat in player_data['statistics']])
+
+
+def _details(player_data, team_id):
+    # One row per statistic value, the value-dict exploded into metric/value
+    player = _player_columns(player_data, team_id)
+    rows = []
     for stat in player_data['statistics']:
+        season = _season_columns(stat)
         for d in stat['details']:
-            base = {
-                "player_name" : player_name,
-                "birthday"    : birthday,
-                'current_team_id' : current_team_id,
-                'current_team'    : current_team,
-                'position_id' : position_id,
-                'position'    : position,
-                'season_id' : stat['season_id'],
-                'season'      : SEASON_MAPPING_IDS[stat['season_id']],
-                'stats_team_id'   : stat['team_id'],
-                'stats_team'        : ITALIAN_TEAMS[stat['team_id']] if stat['team_id'] in ITALIAN_TEAMS else None,
-                'type_id'   : d['type']['id'],
-                'type_name' : d['type']['name'],
-                'group'     : d['type'].get('stat_group'),
-            }
-            # expand the value‑dict (keys vary by type)
+            detail_type = d.get('type') or {}
+            detail = {'type_id': d['type_id'], 'type_name': detail_type.get('name'), 'group': detail_type.get('stat_group')}
             for k, v in d['value'].items():
-                row          = base.copy()
-                row['metric'] = k
-                row['value']  = v
-                detail_rows.append(row)
-
-    details_df = pd.DataFrame(detail_rows)
-
-    # --------------------------------------------------
-    # 4)  (Optional) Pivot `details_df` to wide format
-    #     — keeps one metric per statistic type (e.g. the 'total' figure)
-    # --------------------------------------------------
-    index_cols = ["player_name", "birthday",
-                "season_id", "season",
-                "stats_team_id", "stats_team",
-                "current_team_id", "current_team",
-                "position_id", "position"]
-
-    pivoted = (
-        details_df
-        .pivot_table(index=index_cols,
-                    columns=["type_name", "metric"],
-                    values="value",
-                    aggfunc="first")
-        .reset_index()
-        if not details_df.empty else
-        pd.DataFrame(columns=index_cols)
-    )
-
-    # ------ flatten columns if we pivoted ------------------------------
-    if not pivoted.empty:
-        flat = []
-        for col in pivoted.columns:
-            flat.append("_".join(map(str, col)).rstrip("_") if isinstance(col, tuple) else col)
-        pivoted.columns = flat
-    # -------------------------------------------------------------------
-
-    if pivoted.empty:                       # ← only now we build the stub
-        stub_row = {
-            "player_name"     : player_name,
-            "birthday"        : birthday,
-            "current_team_id" : current_team_id,
-            "current_team"    : current_team,
-            "position_id"     : position_id,
-            "position"        : position,
-            **{c: None for c in index_cols if c.startswith("season") or c.startswith("stats_")}
-        }
-        totals_wide = pd.DataFrame([stub_row])
-    else:
-        totals_wide = pivoted.copy()  
-        
-    totals_wide = _harmonise(totals_wide, index_cols)
+                rows.append({**player, **season, **detail, 'metric': k, 'value': v})
+    return pd.DataFrame(rows)
 
-    return {'overview': stats_df, 'details': details_df, 'totals': totals_wide}
 
-def _harmonise(df: pd.DataFrame, index_cols: list[str]) -> pd.DataFrame:
+def refactor_statistics(player_data, team_id, frames=('totals',), registry=None):
     """
-    1. guarantees every metric column exists (adds all‑NaN if missing)
-    2. orders cols -> id‑columns first, metrics A‑Z
-    3. converts metrics to Float64 / nullable Int64
+    Statistics of one player (a /players/{id} payload with statistics.details.type):
+    'totals' has one wide row per season with the columns of the statistic type
+    `registry` (default_registry() if None, see _wide_totals), 'overview' one summary
+    row per season and 'details' one row per statistic value. Only the `frames`
+    asked for are built.
     """
-    import numpy as np
-    metric_cols = sorted(c for c in df.columns if c not in index_cols)
-
-    # add missing metric columns
-    for col in metric_cols:
-        if col not in df.columns:
-            df[col] = np.nan
-
-    # reorder
-    df = df[index_cols + metric_cols]
-
-    # cast metrics
-    for col in metric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")   # float64 or Int64
-
-        # ---- safe "is whole number" test -----------------
-        s = df[col].dropna()
-        if (s % 1 == 0).all():              # works for int & float
-            df[col] = df[col].astype("Int64")
-    return df
-
+    registry = default_registry() if registry is None else registry
+    builders = {'totals': lambda: _wide_totals(player_data, team_id, registry),
+                'overview': lambda: _overview(player_data, team_id),
+                'details': lambda: _details(player_data, team_id)}
+    return {name: builders[name]() for name in frames}
 
 
 if __name__ == "__main__":
-    current_season = SEASON_MAPPING['2526']
-    statistics_seasons = [SEASON_MAPPING['2425'], SEASON_MAPPING['2324'], SEASON_MAPPING['2223']]
-    team_players = {}
-    statistics = pd.DataFrame()
-    # Generate a readable timestamp for the filename
-    readable_timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    for team_id, team_name in tqdm(ITALIAN_TEAMS.items()):
-        print(f"\nTeam: {team_name}, ID: {team_id}")
-        temp_team_players = get_season_team_players(team_id, current_season, statistics_seasons, max_pages=10)
-        if len(temp_team_players) > 0:
-            team_players[team_id] = temp_team_players
-            for player_id in temp_team_players:
-                player_stats = get_player_stats(player_id, team_id, season_stats_id=statistics_seasons, max_pages=10)
-                if isinstance(player_stats, dict) and 'totals' in player_stats:
-                    stats = player_stats['totals']
-                    # Align columns by index, ignore columns that don't match
-                    statistics = pd.concat([statistics, stats], axis=0, ignore_index=True, sort=False)
-    
-    statistics.to_csv(f'player_statistics_{readable_timestamp}.csv', index=False)
+    # The serial team/player walk is now the concurrent engine in backend.data.ingest
+    from backend.data.ingest import main
+    main()
     
\ No newline at end of file
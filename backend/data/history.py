@@ -0,0 +1,119 @@
+"""
+Frozen statistics of finished seasons, per player and season.
+
+A finished season's statistics never change, so once fetched they are kept in a
+SQLite file (HISTORY_PATH) shared by all ingestion runs: the statistics entries
+of each (player, season) - or the fact that the player has none that season -
+and the player's own fields. A refresh then only requests the seasons still
+being played (and finished ones not stored yet) and merges the stored history
+into the payload before parsing; a player with nothing live is built from the
+store without a request.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+
+HISTORY_PATH = os.getenv('SPORTMONKS_HISTORY_PATH', 'backend/data/cache/season_history.sqlite')
+
+
+def _pack(data):
+    return zlib.compress(json.dumps(data).encode(), 6)
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class SeasonHistory:
+    """Stored statistics of the `finished` seasons among `stats_seasons`."""
+
+    def __init__(self, stats_seasons, finished, path=HISTORY_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.stats_seasons = list(stats_seasons)
+        self.finished = {s for s in self.stats_seasons if s in finished}
+        self.stats = {'players_from_history': 0, 'seasons_from_history': 0, 'seasons_frozen': 0}
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS player_seasons ("
+            " player_id INTEGER NOT NULL, season_id INTEGER NOT NULL, statistics BLOB NOT NULL,"
+            " fetched_at REAL NOT NULL, PRIMARY KEY (player_id, season_id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS players (player_id INTEGER PRIMARY KEY, player BLOB NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        # (player_id, season_id) stored for the finished seasons of this run
+        placeholders = ','.join('?' * len(self.finished))
+        self._stored = set(self._conn.execute(
+            f"SELECT player_id, season_id FROM player_seasons WHERE season_id IN ({placeholders})",
+            sorted(self.finished)
+        ).fetchall()) if self.finished else set()
+
+    def close(self):
+        self._conn.close()
+
+    @property
+    def live(self):
+        """The stats seasons still being played."""
+        return [s for s in self.stats_seasons if s not in self.finished]
+
+    def live_seasons(self, player_id):
+        """The seasons to request for a player: the live ones and the finished ones not stored."""
+        return [s for s in self.stats_seasons if s not in self.finished or (player_id, s) not in self._stored]
+
+    def bulk_seasons(self):
+        """
+        The season filter of a team or league request: the live seasons once some
+        history is stored (players missing theirs are then fetched on their own),
+        every stats season before that.
+        """
+        return self.live if self._stored else list(self.stats_seasons)
+
+    def freeze(self, player_id, data, seasons):
+        """Store the finished seasons among `seasons` (the ones `data` was requested for)."""
+        now = time.time()
+        frozen = [s for s in seasons if s in self.finished]
+        entries = {s: [] for s in frozen}
+        for stat in data.get('statistics') or []:
+            if stat['season_id'] in entries:
+                entries[stat['season_id']].append(stat)
+        player = {k: v for k, v in data.items() if k != 'statistics'}
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO players (player_id, player, fetched_at) VALUES (?, ?, ?)",
+                               (player_id, _pack(player), now))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO player_seasons (player_id, season_id, statistics, fetched_at)"
+                " VALUES (?, ?, ?, ?)",
+                [(player_id, s, _pack(stats), now) for s, stats in entries.items()]
+            )
+        self._stored.update((player_id, s) for s in frozen)
+        self.stats['seasons_frozen'] += len(frozen)
+
+    def merge(self, player_id, data, seasons):
+        """`data` (requested for `seasons`) with the stored statistics of the other stats seasons."""
+        stored = [s for s in self.stats_seasons if s not in seasons and (player_id, s) in self._stored]
+        if not stored:
+            return data
+        placeholders = ','.join('?' * len(stored))
+        rows = self._conn.execute(
+            f"SELECT statistics FROM player_seasons WHERE player_id = ? AND season_id IN ({placeholders})",
+            [player_id] + stored
+        ).fetchall()
+        self.stats['seasons_from_history'] += len(stored)
+        return {**data, 'statistics': list(data.get('statistics') or []) + [s for (blob,) in rows for s in _unpack(blob)]}
+
+    def payload(self, player_id):
+        """The player built from the store alone (every stats season stored), or None."""
+        row = self._conn.execute("SELECT player FROM players WHERE player_id = ?", (player_id,)).fetchone()
+        if row is None:
+            return None
+        self.stats['players_from_history'] += 1
+        return self.merge(player_id, {**_unpack(row[0]), 'statistics': []}, [])
+
+    def info(self):
+        return {**self.stats, 'finished': sorted(self.finished), 'live': self.live, 'stored': len(self._stored)}
@@ -0,0 +1,152 @@
+"""
+Persistent response cache for the Sportmonks ingestion client.
+
+Responses are stored in a SQLite file keyed by endpoint and query (without the
+api_token). A fresh entry is served without a request; an expired one is
+revalidated with If-None-Match / If-Modified-Since, so an unchanged payload costs
+a 304 instead of a download. Requests that only concern finished seasons never
+expire.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+from urllib.parse import urlencode
+
+from backend.data import SEASON_MAPPING
+
+CACHE_PATH = os.getenv('SPORTMONKS_CACHE_PATH', 'backend/data/cache/sportmonks_http.sqlite')
+
+# Seconds an entry is served without revalidation, by entity (first path segment)
+ENDPOINT_TTLS = {
+    'types': 30 * 24 * 3600,
+    'leagues': 7 * 24 * 3600,
+    'seasons': 24 * 3600,
+    'teams': 24 * 3600,
+    'squads': 12 * 3600,
+    'players': 6 * 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def _finished_seasons():
+    # Every season before the last two, unless listed explicitly ('2223,2324')
+    names = os.getenv('SPORTMONKS_FINISHED_SEASONS')
+    names = names.split(',') if names else sorted(SEASON_MAPPING)[:-2]
+    return {SEASON_MAPPING[n.strip()] for n in names if n.strip() in SEASON_MAPPING}
+
+
+FINISHED_SEASONS = _finished_seasons()
+_SEASON_FILTER = re.compile(r'[Ss]easons?:([\d,]+)')
+_SEASON_PATH = re.compile(r'(?:^|/)seasons/(\d+)')
+
+
+def season_ids(path, params):
+    """Season ids a request is restricted to (path segments and season filters)."""
+    ids = {int(s) for s in _SEASON_PATH.findall(path)}
+    for match in _SEASON_FILTER.findall(str((params or {}).get('filters', ''))):
+        ids.update(int(s) for s in match.split(',') if s)
+    return ids
+
+
+class ResponseCache:
+    """SQLite-backed cache of JSON responses with conditional revalidation."""
+
+    def __init__(self, path=CACHE_PATH, ttls=None, finished_seasons=None):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttls = {**ENDPOINT_TTLS, **(ttls or {})}
+        self.finished_seasons = FINISHED_SEASONS if finished_seasons is None else set(finished_seasons)
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'changed': 0, 'unchanged': 0, 'bytes_saved': 0}
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, path TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " content_hash TEXT NOT NULL, body BLOB NOT NULL, size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL, expires_at REAL)"  # expires_at NULL: never
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def key(path, params):
+        query = sorted((k, str(v)) for k, v in (params or {}).items() if k != 'api_token')
+        return f"{path.strip('/')}?{urlencode(query)}"
+
+    def ttl(self, path, params):
+        """Seconds to keep a response, or None when it only concerns finished seasons."""
+        seasons = season_ids(path, params)
+        if seasons and seasons <= self.finished_seasons:
+            return None
+        segments = path.strip('/').split('/')
+        entity = segments[1] if segments[0] == 'core' and len(segments) > 1 else segments[0]
+        return self.ttls.get(entity, DEFAULT_TTL)
+
+    def lookup(self, key):
+        row = self._conn.execute(
+            "SELECT etag, last_modified, content_hash, body, size, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, body, size, expires_at = row
+        return {'etag': etag, 'last_modified': last_modified, 'content_hash': content_hash, 'body': body,
+                'size': size, 'fresh': expires_at is None or expires_at > time.time()}
+
+    def hit(self, entry):
+        """Payload of a fresh entry, served without a request."""
+        self.stats['hits'] += 1
+        self.stats['bytes_saved'] += entry['size']
+        return json.loads(zlib.decompress(entry['body']))
+
+    @staticmethod
+    def validators(entry):
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def revalidated(self, key, entry, path, params):
+        """304 Not Modified: extend the entry and return its payload."""
+        ttl = self.ttl(path, params)
+        self._conn.execute("UPDATE responses SET fetched_at = ?, expires_at = ? WHERE key = ?",
+                           (time.time(), None if ttl is None else time.time() + ttl, key))
+        self._conn.commit()
+        self.stats['revalidated'] += 1
+        self.stats['bytes_saved'] += entry['size']
+        return json.loads(zlib.decompress(entry['body']))
+
+    def store(self, key, path, params, response, previous=None):
+        """Store a 200 response; returns its content hash."""
+        content = response.content
+        content_hash = hashlib.sha256(content).hexdigest()
+        self.stats['misses'] += 1
+        if previous is not None:
+            self.stats['unchanged' if previous['content_hash'] == content_hash else 'changed'] += 1
+        ttl = self.ttl(path, params)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, path, etag, last_modified, content_hash, body, size,"
+            " fetched_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, path.strip('/'), response.headers.get('ETag'), response.headers.get('Last-Modified'),
+             content_hash, zlib.compress(content, 6), len(content), time.time(),
+             None if ttl is None else time.time() + ttl)
+        )
+        self._conn.commit()
+        return content_hash
+
+    def info(self):
+        entries, size, forever = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(expires_at IS NULL), 0) FROM responses"
+        ).fetchone()
+        lookups = self.stats['hits'] + self.stats['revalidated'] + self.stats['misses']
+        return {**self.stats, 'entries': entries, 'forever': forever, 'cached_mb': round(size / 2**20, 2),
+                'hit_rate': round((self.stats['hits'] + self.stats['revalidated']) / lookups, 3) if lookups else None}
@@ -0,0 +1,622 @@
+"""
+Concurrent Sportmonks ingestion.
+
+One pooled httpx.AsyncClient with at most `concurrency` requests in flight and a
+rate limiter that follows the quota Sportmonks reports (the `rate_limit` block of
+each response, Retry-After / X-RateLimit-* headers, HTTP 429). The squads of all
+teams are fetched together, then the statistics of every player; each team's
+rows are written as a Parquet partition and combined into one file at the end.
+
+    python -m backend.data.ingest --concurrency 8
+    python -m backend.data.ingest --base-url http://127.0.0.1:8765/v3/football
+    python -m backend.data.ingest --resume                    # finish the latest run
+    python -m backend.data.ingest --resume --since 2025-09-01  # refresh it
+    python -m backend.data.ingest --stats-seasons 2526,2425,2324  # finished seasons from the history
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import json
+import hashlib
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+from tqdm import tqdm
+
+from backend.data import ITALIAN_TEAMS, SEASON_MAPPING, SPORTMONKS_API_URL, SPORTMONKS_KEY
+from backend.data.data_loading import INDEX_COLUMNS, refactor_statistics
+from backend.data.sportmonks import SERIE_A_ID
+from backend.data.collector import PartitionedCollector, combine_partitions, list_parts
+from backend.data.checkpoint import CheckpointManifest, latest_run
+from backend.data.http_cache import ResponseCache, CACHE_PATH, FINISHED_SEASONS
+from backend.data.history import SeasonHistory, HISTORY_PATH
+from backend.data.stat_types import StatTypeRegistry, REGISTRY_PATH
+from backend.data.planner import PER_PAGE, MAX_INCLUDE_DEPTH, STRATEGIES, includes, plan
+
+CONCURRENCY = int(os.getenv('SPORTMONKS_CONCURRENCY', 8))
+# Teams whose rows are held in memory at once (each team is written as one Parquet part)
+TEAM_CONCURRENCY = int(os.getenv('SPORTMONKS_TEAM_CONCURRENCY', 4))
+INGEST_DIR = os.getenv('SPORTMONKS_INGEST_DIR', 'backend/data/ingest_runs')
+# Players per Parquet part (and checkpoint): an interruption loses at most this many per team
+FLUSH_PLAYERS = int(os.getenv('SPORTMONKS_FLUSH_PLAYERS', 10))
+# Player payloads are parsed in worker processes so parsing overlaps the downloads
+PARSE_WORKERS = int(os.getenv('SPORTMONKS_PARSE_WORKERS', min(4, os.cpu_count() or 1) if (os.cpu_count() or 1) > 1 else 0))
+MAX_RETRIES = 5
+MAX_BACKOFF = 60.0
+
+
+class IngestError(Exception):
+    pass
+
+
+FETCH_ERRORS = (IngestError, httpx.HTTPError, KeyError, TypeError, ValueError)
+
+
+def _backoff(attempt):
+    return min(MAX_BACKOFF, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def _seconds_until(value):
+    """X-RateLimit-Reset / Retry-After: either seconds or an epoch timestamp."""
+    seconds = float(value)
+    return max(0.0, seconds - time.time()) if seconds > 1e9 else seconds
+
+
+class RateLimiter:
+    """
+    Paces requests to `rate` per second (0 = unpaced) and spends the quota the
+    server reports per entity (squads, players, ...): once the remaining calls of
+    the current window are used up, requests for that entity wait for the reset.
+    """
+
+    def __init__(self, rate=0.0):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.waited = 0.0  # summed over the waiting requests
+        self.quota = {}  # entity -> [remaining calls, window reset (monotonic)]
+        self._next_slot = 0.0
+
+    async def acquire(self, entity):
+        while True:
+            now = time.monotonic()
+            quota = self.quota.get(entity)
+            if quota is None or now >= quota[1]:
+                # Unknown or a new window: the next response reports the quota
+                self.quota.pop(entity, None)
+                break
+            if quota[0] > 0:
+                quota[0] -= 1
+                break
+            self.waited += quota[1] - now
+            await asyncio.sleep(quota[1] - now)
+        if self.interval:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            if slot > now:
+                self.waited += slot - now
+                await asyncio.sleep(slot - now)
+
+    def _update(self, entity, remaining, reset_in):
+        reset_at = time.monotonic() + reset_in
+        quota = self.quota.get(entity)
+        if quota is not None and time.monotonic() < quota[1]:
+            # Same window: requests spent locally may not be counted by the server yet
+            quota[0] = min(quota[0], remaining)
+            quota[1] = max(quota[1], reset_at) if remaining <= 0 else quota[1]
+        else:
+            self.quota[entity] = [remaining, reset_at]
+        if remaining <= 0 and reset_in >= 1:
+            print(f"\033[93m[Ingest] {entity}: quota exhausted, pausing {reset_in:.0f}s\033[0m", file=sys.stderr)
+
+    def observe(self, entity, response, payload):
+        """Update the quota of `entity` from a response."""
+        headers = response.headers
+        quota = payload.get('rate_limit') if isinstance(payload, dict) else None
+        if response.status_code == 429:
+            if 'Retry-After' in headers:
+                wait = _seconds_until(headers['Retry-After'])
+            elif quota and quota.get('resets_in_seconds') is not None:
+                wait = float(quota['resets_in_seconds'])
+            else:
+                wait = 5.0
+            self._update(entity, 0, wait)
+        elif quota and quota.get('remaining') is not None:
+            self._update(entity, int(quota['remaining']), float(quota.get('resets_in_seconds') or 0))
+        elif 'X-RateLimit-Remaining' in headers:
+            self._update(entity, int(headers['X-RateLimit-Remaining']),
+                         _seconds_until(headers.get('X-RateLimit-Reset', 60)))
+
+
+class SportmonksClient:
+    """Async Sportmonks v3 client: pooled connections, bounded concurrency, retries."""
+
+    def __init__(self, base_url=SPORTMONKS_API_URL, api_token=SPORTMONKS_KEY, concurrency=CONCURRENCY,
+                 rate=0.0, max_retries=MAX_RETRIES, timeout=30.0, transport=None, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache  # http_cache.ResponseCache or None
+        self.api_token = api_token
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate)
+        self.stats = {'calls': 0, 'bytes': 0, 'retries': 0, 'throttled': 0, 'parse_seconds': 0.0, 'failed': [],
+                      'strategies': {}}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._http = httpx.AsyncClient(
+            timeout=timeout, transport=transport,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._http.aclose()
+
+    async def get(self, path, params=None, label=None):
+        """
+        JSON payload of GET {base_url}/{path}; retries 429, 5xx and transport errors.
+        With a cache, fresh responses are served locally and expired ones revalidated.
+        Calls and bytes are also counted under stats['strategies'][label], if given.
+        """
+        path = path.strip('/')
+        entity = path.split('/')[0]
+        url = f"{self.base_url}/{path}"
+        if entity == 'core':
+            # Core entities (types, countries...) sit next to the football API: /v3/core/...
+            entity = path.split('/')[1]
+            url = f"{self.base_url.rsplit('/', 1)[0]}/{path}"
+        params = {'api_token': self.api_token, **(params or {})}
+        key = entry = None
+        headers = {}
+        if self.cache is not None:
+            key = self.cache.key(path, params)
+            entry = self.cache.lookup(key)
+            if entry is not None and entry['fresh']:
+                return self.cache.hit(entry)
+            headers = self.cache.validators(entry)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._slots:
+                    # Inside the slot: at most `concurrency` requests spend an unknown quota
+                    await self.limiter.acquire(entity)
+                    resp = await self._http.get(url, params=params, headers=headers)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                self.stats['retries'] += 1
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            self.stats['calls'] += 1
+            self.stats['bytes'] += len(resp.content)
+            if label is not None:
+                counts = self.stats['strategies'].setdefault(label, {'calls': 0, 'bytes': 0})
+                counts['calls'] += 1
+                counts['bytes'] += len(resp.content)
+            if resp.status_code == 304 and entry is not None:
+                return self.cache.revalidated(key, entry, path, params)
+            try:
+                payload = resp.json()
+            except ValueError:
+                payload = None
+            self.limiter.observe(entity, resp, payload)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                error = f"HTTP {resp.status_code}"
+                self.stats['retries'] += 1
+                if resp.status_code == 429:
+                    self.stats['throttled'] += 1
+                else:
+                    await asyncio.sleep(_backoff(attempt))
+                continue
+            resp.raise_for_status()
+            if payload is None:
+                raise IngestError(f"GET {path}: response is not JSON")
+            if self.cache is not None:
+                self.cache.store(key, path, params, resp, entry)
+            return payload
+        raise IngestError(f"GET {path}: giving up after {self.max_retries + 1} attempts ({error})")
+
+    async def paginate(self, path, params=None, per_page=PER_PAGE, max_pages=None, label=None):
+        """All the `data` items of a paginated endpoint, following pagination.has_more."""
+        items, page = [], 1
+        while True:
+            payload = await self.get(path, {**(params or {}), 'per_page': per_page, 'page': page}, label)
+            data = payload.get('data') or []
+            items.extend(data if isinstance(data, list) else [data])
+            if not (payload.get('pagination') or {}).get('has_more'):
+                return items
+            if max_pages is not None and page >= max_pages:
+                print(f"\033[93m[Ingest] {path}: stopping at max_pages={max_pages}\033[0m", file=sys.stderr)
+                return items
+            page += 1
+
+
+def _season_filter(season_ids):
+    return ",".join(map(str, season_ids)) if isinstance(season_ids, (list, tuple)) else str(season_ids)
+
+
+async def fetch_squad(client, team_id, season_id, stats_seasons=None, include=None):
+    """
+    Player ids in the squad of `team_id` for `season_id`, and player_id -> player
+    payload when the players come with it (`include`, the team strategy).
+    """
+    if include is None:
+        # Only player_id is used, so the player include is not requested
+        squad = await client.paginate(f"squads/seasons/{season_id}/teams/{team_id}", label='player')
+        return [x['player_id'] for x in squad], {}
+    squad = await client.paginate(f"squads/seasons/{season_id}/teams/{team_id}", {
+        'filters': f"playerStatisticSeasons:{_season_filter(stats_seasons)}",
+        'include': include,
+    }, label='team')
+    return [x['player_id'] for x in squad], {x['player_id']: x['player'] for x in squad if x.get('player')}
+
+
+async def fetch_league(client, season_id, stats_seasons, include):
+    """team_id -> (squad player ids, player_id -> player payload) of every team of `season_id`."""
+    teams = await client.paginate(f"teams/seasons/{season_id}", {
+        'filters': f"playerStatisticSeasons:{_season_filter(stats_seasons)}",
+        'include': include,
+    }, label='league')
+    return {team['id']: ([x['player_id'] for x in team.get('players') or []],
+                         {x['player_id']: x['player'] for x in team.get('players') or [] if x.get('player')})
+            for team in teams}
+
+
+def _parse_totals(data, player_id, team_id, registry):
+    start = time.perf_counter()
+    registry.learned.clear()
+    totals = refactor_statistics(data, team_id, registry=registry)['totals']
+    totals.insert(0, 'player_id', player_id)
+    return totals, list(registry.learned), time.perf_counter() - start
+
+
+def _season_hashes(data):
+    return {stat['season_id']: hashlib.sha1(json.dumps(stat, sort_keys=True).encode()).hexdigest()
+            for stat in data.get('statistics') or []}
+
+
+async def parse_player(client, data, player_id, team_id, registry, pool=None):
+    """
+    Wide per-season statistics of one player payload (refactor_statistics totals plus
+    player_id) and the content hash of each season's statistics. Metrics `registry`
+    has not seen yet are registered in it.
+    """
+    if pool is None:
+        totals, _, seconds = _parse_totals(data, player_id, team_id, registry)
+    else:
+        # The worker parses with a copy of the registry; what it learned is merged back
+        totals, learned, seconds = await asyncio.get_running_loop().run_in_executor(
+            pool, _parse_totals, data, player_id, team_id, registry)
+        registry.learn(learned)
+    client.stats['parse_seconds'] += seconds
+    return totals, _season_hashes(data)
+
+
+async def fetch_player(client, player_id, stats_seasons, include='statistics.details.type'):
+    """The player payload of players/{player_id} with the statistics of `stats_seasons`, or None."""
+    payload = await client.get(f"players/{player_id}", {
+        'filters': f"playerStatisticSeasons:{_season_filter(stats_seasons)}",
+        'include': include,
+    }, label='player')
+    return payload.get('data') or None
+
+
+async def finished_seasons(client, season_ids):
+    """
+    The finished seasons among `season_ids`, from seasons/{id}; FINISHED_SEASONS
+    decides for the seasons that cannot be fetched.
+    """
+    finished = set()
+    for season_id in season_ids:
+        try:
+            payload = await client.get(f"seasons/{season_id}")
+            done = bool((payload.get('data') or {}).get('finished'))
+        except FETCH_ERRORS as e:
+            done = season_id in FINISHED_SEASONS
+            print(f"\033[93m[Ingest] season {season_id} not fetched ({e}), "
+                  f"{'finished' if done else 'not finished'} by default\033[0m", file=sys.stderr)
+        if done:
+            finished.add(season_id)
+    return finished
+
+
+async def teams_played_since(client, since, league_id=SERIE_A_ID):
+    """team_id -> epoch seconds of its last fixture of `league_id` from `since` (YYYY-MM-DD) to today."""
+    today = datetime.date.today().isoformat()
+    fixtures = await client.paginate(f"fixtures/between/{since}/{today}",
+                                     {'filters': f"fixtureLeagues:{league_id}", 'include': 'participants'})
+    last_played = {}
+    for fixture in fixtures:
+        kickoff = fixture.get('starting_at_timestamp') or 0
+        if kickoff > time.time():
+            continue
+        for team in fixture.get('participants') or []:
+            last_played[team['id']] = max(last_played.get(team['id'], 0), kickoff)
+    return last_played
+
+
+async def refresh_stat_types(client, registry):
+    """Update `registry` from the types endpoint; False when it failed and the saved types are used."""
+    try:
+        added = registry.refresh(await client.paginate('core/types'))
+    except FETCH_ERRORS as e:
+        print(f"\033[93m[Ingest] types not refreshed ({e}), using the saved registry\033[0m", file=sys.stderr)
+        return False
+    if added:
+        print(f"\033[92m[Ingest] {added} new statistic types\033[0m", file=sys.stderr)
+    return True
+
+
+def _failed(client, label, error):
+    client.stats['failed'].append(label)
+    print(f"\033[91m[Ingest] {label} failed: {error}\033[0m", file=sys.stderr)
+
+
+async def ingest_statistics(client, teams, current_season, stats_seasons, collector, manifest, registry,
+                            progress=True, pool=None, team_concurrency=TEAM_CONCURRENCY, reuse_squads=True,
+                            last_played=None, strategy='player', include=None, history=None):
+    """
+    Statistics of the players in the current squads of `teams` (team_id -> name), one
+    row per player and season, written to `collector` every FLUSH_PLAYERS players and
+    checkpointed in `manifest`. Players the manifest has as done are skipped, unless
+    `last_played` (team_id -> epoch seconds) says their team played after their fetch.
+    `strategy` (see planner) is the request shape, with `include` (strategy -> include);
+    a failed league request falls back to per-team ones and a failed team request to
+    per-player ones. With a `history` (history.SeasonHistory), only the seasons not
+    stored there are requested and the stored ones are merged into the payloads. At
+    most `team_concurrency` teams are held in memory. Returns the rows written.
+    """
+    include = include or includes(type_names=True)
+    # Seasons requested with the squads: players missing others are fetched on their own
+    bulk_seasons = stats_seasons if history is None else history.bulk_seasons()
+    bar = tqdm(total=0, desc='players', disable=not progress)
+    team_slots = asyncio.Semaphore(team_concurrency)
+    league = {}
+    if strategy == 'league':
+        try:
+            league = await fetch_league(client, current_season, bulk_seasons, include['league'])
+        except FETCH_ERRORS as e:
+            print(f"\033[93m[Ingest] league request failed ({e}), falling back to per-team requests\033[0m",
+                  file=sys.stderr)
+
+    async def one(player_id, team_id, data):
+        try:
+            seasons = stats_seasons if history is None else history.live_seasons(player_id)
+            if data is not None and not set(seasons) <= set(bulk_seasons):
+                data = None
+            if data is not None:
+                requested = bulk_seasons
+            elif seasons:
+                data, requested = await fetch_player(client, player_id, seasons, include['player']), seasons
+            else:
+                # Every season is finished and stored: no request
+                data, requested = history.payload(player_id), None
+            if data is None:
+                return player_id, None, {}
+            if history is not None and requested is not None:
+                history.freeze(player_id, data, requested)
+                data = history.merge(player_id, data, requested)
+            totals, hashes = await parse_player(client, data, player_id, team_id, registry, pool)
+            return player_id, totals, hashes
+        except FETCH_ERRORS as e:
+            _failed(client, f"player {player_id}", e)
+            manifest.record_player_failure(player_id, team_id, str(e))
+            return None
+        finally:
+            bar.update()
+
+    async def squad_request(team_id, bulk):
+        if bulk:
+            try:
+                return await fetch_squad(client, team_id, current_season, bulk_seasons, include['team'])
+            except FETCH_ERRORS as e:
+                print(f"\033[93m[Ingest] squad {teams[team_id]} with its players failed ({e}), "
+                      f"falling back to per-player requests\033[0m", file=sys.stderr)
+        try:
+            return await fetch_squad(client, team_id, current_season)
+        except FETCH_ERRORS as e:
+            _failed(client, f"squad {teams[team_id]}", e)
+            manifest.record_squad(team_id, current_season, error=str(e))
+            return None, {}
+
+    async def team(team_id):
+        async with team_slots:
+            changed_after = last_played.get(team_id, 0) if last_played is not None else None
+            # Teams missing from the league response get a request of their own
+            squad, payloads = league.pop(team_id, (None, {}))
+            fetched = squad is not None
+            if squad is None and reuse_squads:
+                squad = manifest.squad(team_id, current_season)
+                if squad is not None and strategy != 'player' and manifest.needs_fetch(squad, changed_after):
+                    squad = None  # its players come with the squad request
+            if squad is None:
+                squad, payloads = await squad_request(team_id, bulk=strategy != 'player')
+                if squad is None:
+                    return
+                fetched = True
+            if fetched:
+                manifest.record_squad(team_id, current_season, squad)
+            todo = manifest.needs_fetch(squad, changed_after)
+            bar.total += len(todo)
+            bar.refresh()
+
+            batch = []
+
+            async def flush():
+                fetched = batch[:]
+                batch.clear()
+                part = await asyncio.to_thread(collector.write, team_id, [totals for _, totals, _ in fetched])
+                manifest.record_players(team_id, [(p, h) for p, totals, h in fetched if totals is not None], part)
+                manifest.record_players(team_id, [(p, h) for p, totals, h in fetched if totals is None], None)
+
+            for next_done in asyncio.as_completed([one(p, team_id, payloads.get(p)) for p in todo]):
+                result = await next_done
+                if result is not None:
+                    batch.append(result)
+                    if len(batch) >= FLUSH_PLAYERS:
+                        await flush()
+            if batch:
+                await flush()
+
+    await asyncio.gather(*(team(t) for t in teams))
+    bar.close()
+    return collector.stats['rows']
+
+
+def _work_left(manifest, teams, current_season, last_played, history=None):
+    """
+    Squad sizes and players still to request per team (None where the squad is
+    unknown); players whose seasons are all in `history` need no request.
+    """
+    squads, todo = {}, {}
+    for team_id in teams:
+        squad = manifest.squad(team_id, current_season)
+        changed_after = last_played.get(team_id, 0) if last_played is not None else None
+        squads[team_id] = None if squad is None else len(squad)
+        if squad is not None:
+            players = manifest.needs_fetch(squad, changed_after)
+            todo[team_id] = len([p for p in players if history is None or history.live_seasons(p)])
+        else:
+            todo[team_id] = None
+    return squads, todo
+
+
+def _print_plan(strategy, estimates):
+    for name, e in estimates.items():
+        mark = '>' if name == strategy else ' '
+        note = '' if e['allowed'] else '  (include too deep for the plan)'
+        print(f"\033[92m[Ingest] {mark} {name:<6}: ~{e['calls']} calls, ~{e['payloads']} player payloads, "
+              f"include={e['include']}{note}\033[0m", file=sys.stderr)
+
+
+async def run(base_url=SPORTMONKS_API_URL, concurrency=CONCURRENCY, rate=0.0, teams=ITALIAN_TEAMS,
+              current_season=SEASON_MAPPING['2526'],
+              stats_seasons=(SEASON_MAPPING['2425'], SEASON_MAPPING['2324'], SEASON_MAPPING['2223']),
+              progress=True, parse_workers=PARSE_WORKERS, cache_path=CACHE_PATH, out_dir=None, since=None,
+              registry_path=REGISTRY_PATH, strategy=None, max_include_depth=MAX_INCLUDE_DEPTH,
+              history_path=HISTORY_PATH):
+    """
+    Ingest into Parquet partitions under `out_dir` and return the client stats, with
+    'rows', 'out_dir' and the checkpoint summary. An existing `out_dir` is resumed:
+    only the players not done yet are fetched, and with `since` (YYYY-MM-DD) the
+    squads are refreshed along with the players whose team has played since their
+    last fetch. The statistic type registry is refreshed from the types endpoint and
+    saved back to `registry_path` (None: start from the seed, do not save). The request
+    shape is planned from the work left (planner.plan, `strategy` forces one); the
+    stats report the estimates and the calls and bytes of each strategy used. The
+    statistics of finished seasons are kept per player in `history_path` and only
+    requested once (None: request every stats season).
+    cache_path=None disables the response cache.
+    """
+    out_dir = out_dir or os.path.join(INGEST_DIR, datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
+    manifest = CheckpointManifest(out_dir)
+    # Parts written by an interrupted run but never checkpointed
+    manifest.prune_parts(list_parts(out_dir))
+    collector = PartitionedCollector(out_dir)
+    pool = ProcessPoolExecutor(parse_workers) if parse_workers else None
+    cache = ResponseCache(cache_path) if cache_path else None
+    registry = StatTypeRegistry.load(registry_path) if registry_path else StatTypeRegistry()
+    history = None
+    try:
+        async with SportmonksClient(base_url, concurrency=concurrency, rate=rate, cache=cache) as client:
+            start = time.perf_counter()
+            # Without a refreshed registry the type names come with every statistic detail
+            type_names = not await refresh_stat_types(client, registry)
+            last_played = await teams_played_since(client, since) if since else None
+            if history_path:
+                history = SeasonHistory(stats_seasons, await finished_seasons(client, stats_seasons), history_path)
+            squads, todo = _work_left(manifest, teams, current_season, last_played, history)
+            strategy, estimates = plan(squads, todo, refresh_squads=since is not None, type_names=type_names,
+                                       max_include_depth=max_include_depth, strategy=strategy)
+            if history is not None and not history.bulk_seasons():
+                # Every stats season is finished and stored: players only come with the squads
+                strategy = 'player'
+            if progress:
+                _print_plan(strategy, estimates)
+            await ingest_statistics(client, teams, current_season, list(stats_seasons), collector, manifest,
+                                    registry, progress, pool, reuse_squads=since is None, last_played=last_played,
+                                    strategy=strategy, include={name: e['include'] for name, e in estimates.items()},
+                                    history=history)
+            client.stats['seconds'] = time.perf_counter() - start
+            client.stats['throttle_wait'] = client.limiter.waited
+            # Parts whose players have all been refetched into newer ones
+            manifest.prune_parts(list_parts(out_dir))
+            client.stats.update(rows=collector.stats['rows'], parts=collector.stats['parts'], out_dir=out_dir,
+                                checkpoint=manifest.summary(), stat_types=registry.info(), strategy=strategy,
+                                plan=estimates)
+            if registry_path:
+                registry.save(registry_path)
+            if cache is not None:
+                client.stats['cache'] = cache.info()
+            if history is not None:
+                client.stats['history'] = history.info()
+            return client.stats
+    finally:
+        manifest.close()
+        if pool is not None:
+            pool.shutdown()
+        if cache is not None:
+            cache.close()
+        if history is not None:
+            history.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent Sportmonks player statistics ingestion")
+    parser.add_argument('--base-url', default=os.getenv('SPORTMONKS_API_URL', SPORTMONKS_API_URL))
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=0.0, help='max requests per second (0 = quota headers only)')
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS, help='0 = parse in the event loop')
+    parser.add_argument('--season', default='2526', help='season of the current squads')
+    parser.add_argument('--stats-seasons', default='2425,2324,2223')
+    parser.add_argument('--out', help='output CSV (default player_statistics_<timestamp>.csv)')
+    parser.add_argument('--parquet', help='combined Parquet file (default: the CSV name with .parquet)')
+    parser.add_argument('--out-dir', help='run directory of the Parquet partitions (default a new run in INGEST_DIR)')
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_DIR',
+                        help='continue a run (default the latest in INGEST_DIR): fetch only what is not done')
+    parser.add_argument('--since', metavar='YYYY-MM-DD',
+                        help='refresh a run: squads, plus players whose team has played since their last fetch')
+    parser.add_argument('--strategy', choices=STRATEGIES, help='request shape (default: planned, fewest calls)')
+    parser.add_argument('--max-include-depth', type=int, default=MAX_INCLUDE_DEPTH,
+                        help='deepest include nesting the subscription allows')
+    parser.add_argument('--cache', default=CACHE_PATH, help='response cache file')
+    parser.add_argument('--no-cache', action='store_true', help='always download')
+    parser.add_argument('--history', default=HISTORY_PATH, help='statistics of finished seasons, per player')
+    parser.add_argument('--no-history', action='store_true', help='request every stats season')
+    args = parser.parse_args(argv)
+
+    out_dir = args.out_dir
+    if args.resume or args.since:
+        out_dir = args.resume if args.resume not in (None, 'latest') else out_dir or latest_run(INGEST_DIR)
+        if not out_dir or not os.path.isdir(out_dir):
+            parser.error(f"no run to resume in {args.resume or INGEST_DIR}")
+    stats_seasons = [SEASON_MAPPING[s] for s in args.stats_seasons.split(',')]
+    stats = asyncio.run(run(args.base_url, args.concurrency, args.rate,
+                            current_season=SEASON_MAPPING[args.season], stats_seasons=stats_seasons,
+                            parse_workers=args.parse_workers, cache_path=None if args.no_cache else args.cache,
+                            out_dir=out_dir, since=args.since, strategy=args.strategy,
+                            max_include_depth=args.max_include_depth,
+                            history_path=None if args.no_history else args.history))
+    out = args.out or f"player_statistics_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+    manifest = CheckpointManifest(stats['out_dir'])
+    keep = manifest.current_parts()
+    manifest.close()
+    combine_partitions(stats['out_dir'], parquet_path=args.parquet or f"{os.path.splitext(out)[0]}.parquet",
+                       csv_path=out, leading_columns=['player_id'] + INDEX_COLUMNS, keep=keep)
+    print(f"\033[92m[Ingest] {stats['rows']} rows -> {out}: {stats['calls']} calls, "
+          f"{stats['bytes'] / 2**20:.1f} MB, {stats['retries']} retries, {len(stats['failed'])} failed, "
+          f"{stats['seconds']:.1f}s\033[0m", file=sys.stderr)
+    print(f"\033[92m[Ingest] checkpoint {stats['out_dir']}: {stats['checkpoint']}\033[0m", file=sys.stderr)
+    for name, counts in stats['strategies'].items():
+        print(f"\033[92m[Ingest] {name}: {counts['calls']} calls, {counts['bytes'] / 2**20:.1f} MB\033[0m",
+              file=sys.stderr)
+    if 'cache' in stats:
+        print(f"\033[92m[Ingest] cache: {stats['cache']}\033[0m", file=sys.stderr)
+    if 'history' in stats:
+        print(f"\033[92m[Ingest] history: {stats['history']}\033[0m", file=sys.stderr)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
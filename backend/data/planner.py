@@ -0,0 +1,79 @@
+"""
+Request planning for Sportmonks ingestion.
+
+The statistics of the players of a squad can be fetched in three shapes:
+
+- league: teams/seasons/{season} including players.player.statistics.details,
+  a page of teams (with their whole squads) per call;
+- team:   squads/seasons/{season}/teams/{team} including player.statistics.details,
+  a page of squad members per call;
+- player: the squad pages, then players/{id} per player.
+
+plan() estimates the calls and player payloads of each shape for the work left
+(squad sizes and players still to fetch, from the checkpoint manifest), rules out
+the shapes whose include nesting exceeds the subscription's limit, and picks the
+one with the fewest calls (then the fewest payloads). Statistic type names are
+only included when the type registry could not be refreshed.
+"""
+import os
+import math
+
+# Subscription limits: page size and include nesting (players.player.statistics.details is 4)
+PER_PAGE = int(os.getenv('SPORTMONKS_PER_PAGE', 50))
+MAX_INCLUDE_DEPTH = int(os.getenv('SPORTMONKS_MAX_INCLUDE_DEPTH', 4))
+# Assumed size of a squad that has not been fetched yet
+SQUAD_SIZE = 30
+STRATEGIES = ('league', 'team', 'player')
+
+
+def includes(type_names=False):
+    """Include of each strategy; `type_names` adds the type of every statistic detail."""
+    statistics = 'statistics.details.type' if type_names else 'statistics.details'
+    return {'league': f"players.player.{statistics}", 'team': f"player.{statistics}", 'player': statistics}
+
+
+def include_depth(include):
+    return max(len(relation.split('.')) for relation in include.split(';'))
+
+
+def _pages(n, per_page):
+    return max(1, math.ceil(n / per_page))
+
+
+def estimate(squads, todo, refresh_squads=False, per_page=PER_PAGE):
+    """
+    Calls and player payloads of each strategy. `squads` is team_id -> squad size
+    (None: not fetched yet), `todo` team_id -> players to fetch (None: all of them);
+    with `refresh_squads` every squad is requested again.
+    """
+    sizes = {team_id: SQUAD_SIZE if size is None else size for team_id, size in squads.items()}
+    todo = {team_id: sizes[team_id] if n is None else n for team_id, n in todo.items()}
+    # Squads requested anyway (new, or refreshed), and those requested for their players
+    listed = [t for t in sizes if refresh_squads or squads[t] is None]
+    bulk = [t for t in sizes if t in listed or todo[t]]
+    return {
+        'league': {'calls': _pages(len(sizes), per_page) if bulk else 0,
+                   'payloads': sum(sizes.values()) if bulk else 0},
+        'team': {'calls': sum(_pages(sizes[t], per_page) for t in bulk),
+                 'payloads': sum(sizes[t] for t in bulk)},
+        'player': {'calls': sum(_pages(sizes[t], per_page) for t in listed) + sum(todo.values()),
+                   'payloads': sum(todo.values())},
+    }
+
+
+def plan(squads, todo, refresh_squads=False, type_names=False, per_page=PER_PAGE,
+         max_include_depth=MAX_INCLUDE_DEPTH, strategy=None):
+    """
+    The strategy to use (`strategy` forces one) and the estimate of each, with its
+    include and whether the subscription allows it.
+    """
+    estimates = estimate(squads, todo, refresh_squads, per_page)
+    for name, include in includes(type_names).items():
+        estimates[name].update(include=include, allowed=include_depth(include) <= max_include_depth)
+    if strategy is None:
+        allowed = [name for name in STRATEGIES if estimates[name]['allowed']] or ['player']
+        strategy = min(allowed, key=lambda name: (estimates[name]['calls'], estimates[name]['payloads']))
+        if estimates[strategy]['calls'] == 0:
+            # Nothing to fetch: per-player requests are only made for players to fetch
+            strategy = 'player'
+    return strategy, estimates
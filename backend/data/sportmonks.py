@@ -1,7 +1,5 @@
 import requests
 import pandas as pd
-from tqdm import tqdm
-import datetime
 
 SPORTMONKS_KEY = "G0XEVwvQ9LFlc3CVqfBRvTANgQtjFe2gb2ZrenhUBgxcWOP7FDN32weoWCpR"
 SPORTMONKS_API_URL = "https://api.sportmonks.com/v3/football"
@@ -520,22 +518,7 @@ if __name__ == "__main__":
     # italian_teams = get_team_serie_a()
     
     
-    current_season = SEASON_MAPPING['2526']
-    statistics_seasons = [SEASON_MAPPING['2425'], SEASON_MAPPING['2324'], SEASON_MAPPING['2223']]
-    team_players = {}
-    statistics = pd.DataFrame()
-    # Generate a readable timestamp for the filename
-    readable_timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    for team_id, team_name in tqdm(ITALIAN_TEAMS.items()):
-        print(f"\nTeam: {team_name}, ID: {team_id}")
-        temp_team_players = get_season_team_players(team_id, current_season, statistics_seasons, max_pages=10)
-        if len(temp_team_players) > 0:
-            team_players[team_id] = temp_team_players
-            for player_id in temp_team_players:
-                player_stats = get_player_stats(player_id, team_id, season_stats_id=statistics_seasons, max_pages=10)
-                if isinstance(player_stats, dict) and 'totals' in player_stats:
-                    stats = player_stats['totals']
-                    # Align columns by index, ignore columns that don't match
-                    statistics = pd.concat([statistics, stats], axis=0, ignore_index=True, sort=False)
-    statistics.to_csv(f'player_statistics_{readable_timestamp}.csv', index=False)
+    # The serial team/player walk is now the concurrent engine in backend.data.ingest
+    from backend.data.ingest import main
+    main()
     
\ No newline at end of file
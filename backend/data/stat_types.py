@@ -0,0 +1,149 @@
+"""
+Registry of Sportmonks statistic types: the schema of the wide statistics rows.
+
+Every type id has a name (its column prefix), a stat_group, and the metrics of its
+value dict, each with a fixed dtype (nullable Int64, or float64 once a fractional
+value has been seen). Parsed rows take their columns and dtypes from here, so they
+all share one schema and nothing is inferred per frame. The registry is seeded
+from STATISTICS_DETAIL_TYPE_MAPPING, refreshed from the Sportmonks types endpoint,
+learns the metrics it has not seen yet while parsing, and persists in
+REGISTRY_PATH between runs.
+
+    python -m backend.data.stat_types --refresh
+"""
+import os
+import sys
+import json
+
+from backend.data.sportmonks import STATISTICS_DETAIL_TYPE_MAPPING
+
+REGISTRY_PATH = os.getenv('SPORTMONKS_STAT_TYPES_PATH', 'backend/data/cache/stat_types.json')
+INT, FLOAT = 'Int64', 'float64'
+
+
+def to_number(value):
+    """A statistic value as int/float, or None (what pd.to_numeric(errors="coerce") made NaN)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+class StatTypeRegistry:
+
+    def __init__(self, types=None):
+        # type_id -> {'name', 'code', 'stat_group', 'metrics': {metric: dtype}}
+        self.types = {type_id: {'name': name, 'code': None, 'stat_group': None, 'metrics': {'total': INT}}
+                      for type_id, name in STATISTICS_DETAIL_TYPE_MAPPING.items()}
+        for type_id, entry in (types or {}).items():
+            self.types[int(type_id)] = entry
+        # (type_id, name, metric, dtype) registered since the last clear(); a parse
+        # in a worker process returns them so the ingesting process can learn them
+        self.learned = []
+        self._columns = None
+        self._names = None
+
+    @classmethod
+    def load(cls, path=REGISTRY_PATH):
+        """The registry saved in `path`, or the seed when there is none."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(json.load(f)['types'])
+
+    def save(self, path=REGISTRY_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'types': {str(k): v for k, v in sorted(self.types.items())}}, f, indent=1)
+        os.replace(tmp, path)
+
+    def refresh(self, types):
+        """
+        Update from the items of the types endpoint; returns the number of new types.
+        The name of a registered type is kept, since it is part of its column names.
+        """
+        added = 0
+        for item in types:
+            entry = self.types.get(item['id'])
+            if entry is None:
+                entry = self.types[item['id']] = {'name': item['name'], 'code': None, 'stat_group': None,
+                                                  'metrics': {}}
+                added += 1
+            entry['code'] = item.get('code')
+            entry['stat_group'] = item.get('stat_group')
+        self._columns = None
+        return added
+
+    def column(self, type_id, metric, value, name=None):
+        """
+        Column of `metric` of type `type_id` for a numeric `value`, registering the
+        type (as `name`) or metric when unknown and widening Int64 to float64 when
+        `value` is fractional.
+        """
+        entry = self.types.get(type_id)
+        dtype = entry['metrics'].get(metric) if entry is not None else None
+        if dtype is None or (dtype == INT and isinstance(value, float) and not value.is_integer()):
+            dtype = INT if float(value).is_integer() else FLOAT
+            self.learn([(type_id, name, metric, dtype)])
+            self.learned.append((type_id, name, metric, dtype))
+            entry = self.types[type_id]
+        return f"{entry['name']}_{metric}"
+
+    def learn(self, entries):
+        """Merge (type_id, name, metric, dtype) entries, e.g. those learned by a worker."""
+        for type_id, name, metric, dtype in entries:
+            entry = self.types.setdefault(type_id, {'name': name or str(type_id), 'code': None,
+                                                    'stat_group': None, 'metrics': {}})
+            if entry['metrics'].get(metric) != FLOAT:
+                entry['metrics'][metric] = dtype
+                self._columns = None
+
+    def columns(self):
+        """Metric column -> dtype, A-Z; float64 wins when two types share a name."""
+        if self._columns is None:
+            columns = {}
+            for entry in self.types.values():
+                for metric, dtype in entry['metrics'].items():
+                    column = f"{entry['name']}_{metric}"
+                    columns[column] = FLOAT if FLOAT in (dtype, columns.get(column)) else dtype
+            self._columns = dict(sorted(columns.items()))
+        return self._columns
+
+    def info(self):
+        return {'types': len(self.types), 'columns': len(self.columns()),
+                'float_columns': sum(d == FLOAT for d in self.columns().values())}
+
+
+if __name__ == "__main__":
+    import argparse
+    import requests
+    from backend.data import SPORTMONKS_API_URL, SPORTMONKS_KEY
+
+    parser = argparse.ArgumentParser(description="Sportmonks statistic type registry")
+    parser.add_argument('--path', default=REGISTRY_PATH)
+    parser.add_argument('--refresh', action='store_true', help='update the types from the Sportmonks types endpoint')
+    args = parser.parse_args()
+
+    registry = StatTypeRegistry.load(args.path)
+    if args.refresh:
+        types, page = [], 1
+        while True:
+            resp = requests.get(f"{SPORTMONKS_API_URL.rsplit('/', 1)[0]}/core/types",
+                                params={'api_token': SPORTMONKS_KEY, 'per_page': 50, 'page': page})
+            resp.raise_for_status()
+            payload = resp.json()
+            types.extend(payload['data'])
+            if not payload.get('pagination', {}).get('has_more'):
+                break
+            page += 1
+        print(f"\033[92m[StatTypes] {registry.refresh(types)} new types\033[0m", file=sys.stderr)
+        registry.save(args.path)
+    for column, dtype in registry.columns().items():
+        print(f"{column:<50} {dtype}")
+    print(f"\033[92m[StatTypes] {registry.info()}\033[0m", file=sys.stderr)
@@ -0,0 +1,181 @@
+"""
+Versioned player dataset artifacts.
+
+The pipeline publishes the canonical player rows as an immutable, gzip-compressed
+JSON file named after its version, with its sha256 in a LATEST.json pointer.
+API nodes read the pointer from a directory or an http(s) base URL, verify the
+checksum and swap datasets in memory, so a reload needs no per-node DB writes.
+Repointing LATEST.json to an older version (promote) rolls every node back.
+
+    python -m backend.database.artifact publish --csv players.csv --store /srv/artifacts
+    python -m backend.database.artifact list --store /srv/artifacts
+    python -m backend.database.artifact promote 20250801T101500Z-1a2b3c4d5e6f --store /srv/artifacts
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+
+from backend.database.schema import GIOCATORI_COLUMNS
+
+ARTIFACT_FORMAT = 1
+POINTER_FILE = 'LATEST.json'
+ARTIFACTS_TO_KEEP = int(os.getenv('DATASET_ARTIFACTS_TO_KEEP', 5))
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def dataset_version(giocatori):
+    """Content hash of the player list (used as ETag / players_version)."""
+    return hashlib.sha1(json.dumps(giocatori, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _artifact_name(version):
+    return f"players-{version}.json.gz"
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def publish_artifact(rows, store_dir, columns=GIOCATORI_COLUMNS):
+    """
+    Write `rows` (canonical row matrix, skills as lists) as a new artifact and point
+    LATEST.json at it. Returns the manifest.
+    """
+    columns = list(columns)
+    players = [dict(zip(columns, row)) for row in rows]
+    if not players:
+        raise ArtifactError("refusing to publish an empty player dataset")
+    content_version = dataset_version(players)
+    # Sortable by publication time; the suffix identifies the content
+    version = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime()) + f"-{content_version[:12]}"
+    payload = json.dumps({'format': ARTIFACT_FORMAT, 'columns': columns, 'rows': rows},
+                         separators=(',', ':'), default=str).encode()
+    # mtime=0: the same rows always compress to the same bytes
+    data = gzip.compress(payload, compresslevel=9, mtime=0)
+    manifest = {
+        'version': version,
+        'file': _artifact_name(version),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'bytes': len(data),
+        'rows': len(players),
+        'columns': len(columns),
+        'dataset_version': content_version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    os.makedirs(store_dir, exist_ok=True)
+    _write_atomic(os.path.join(store_dir, manifest['file']), data)
+    _write_atomic(os.path.join(store_dir, f"players-{version}.manifest.json"), json.dumps(manifest, indent=2).encode())
+    _write_atomic(os.path.join(store_dir, POINTER_FILE), json.dumps(manifest, indent=2).encode())
+    _prune_artifacts(store_dir, keep=manifest['file'])
+    print(f"\033[92m[Artifact] published {version}: {manifest['rows']} players, "
+          f"{len(payload) / 1024:.0f} KB -> {len(data) / 1024:.0f} KB\033[0m", file=sys.stderr)
+    return manifest
+
+
+def list_artifacts(store_dir):
+    """Manifests of the artifacts in a local store, oldest first."""
+    manifests = []
+    for name in sorted(os.listdir(store_dir)):
+        if name.startswith('players-') and name.endswith('.manifest.json'):
+            with open(os.path.join(store_dir, name), 'r') as f:
+                manifests.append(json.load(f))
+    return manifests
+
+
+def promote_artifact(store_dir, version):
+    """Point LATEST.json at an already published version (e.g. to roll back)."""
+    path = os.path.join(store_dir, f"players-{version}.manifest.json")
+    if not os.path.exists(path):
+        raise ArtifactError(f"unknown artifact version {version}")
+    with open(path, 'rb') as f:
+        data = f.read()
+    _write_atomic(os.path.join(store_dir, POINTER_FILE), data)
+    return json.loads(data)
+
+
+def _prune_artifacts(store_dir, keep):
+    manifests = list_artifacts(store_dir)
+    for manifest in manifests[:-ARTIFACTS_TO_KEEP]:
+        if manifest['file'] == keep:
+            continue
+        for name in (manifest['file'], f"players-{manifest['version']}.manifest.json"):
+            try:
+                os.remove(os.path.join(store_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+# --- Reading (API nodes) ---
+
+def _read(uri, name, timeout=30):
+    if uri.startswith(('http://', 'https://')):
+        import requests
+        resp = requests.get(f"{uri.rstrip('/')}/{name}", timeout=timeout)
+        if resp.status_code != 200:
+            raise ArtifactError(f"GET {name}: HTTP {resp.status_code}")
+        return resp.content
+    try:
+        with open(os.path.join(uri, name), 'rb') as f:
+            return f.read()
+    except FileNotFoundError as e:
+        raise ArtifactError(f"{name} not found in {uri}") from e
+
+
+def fetch_manifest(uri):
+    """The manifest LATEST.json points at."""
+    try:
+        return json.loads(_read(uri, POINTER_FILE, timeout=10))
+    except ValueError as e:
+        raise ArtifactError(f"invalid {POINTER_FILE}: {e}") from e
+
+
+def load_artifact(uri, manifest):
+    """Download and verify an artifact; returns the player dicts."""
+    data = _read(uri, manifest['file'])
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != manifest['sha256']:
+        raise ArtifactError(f"checksum mismatch for {manifest['file']}: {digest} != {manifest['sha256']}")
+    payload = json.loads(gzip.decompress(data))
+    if payload.get('format') != ARTIFACT_FORMAT:
+        raise ArtifactError(f"unsupported artifact format {payload.get('format')}")
+    columns = payload['columns']
+    players = [dict(zip(columns, row)) for row in payload['rows']]
+    if len(players) != manifest['rows']:
+        raise ArtifactError(f"{manifest['file']} has {len(players)} rows, manifest says {manifest['rows']}")
+    return players
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish and manage player dataset artifacts")
+    parser.add_argument('command', choices=['publish', 'list', 'promote'])
+    parser.add_argument('version', nargs='?', help='version to promote')
+    parser.add_argument('--store', default=os.getenv('DATASET_ARTIFACT_DIR', 'backend/database/artifacts'))
+    parser.add_argument('--csv', help='player statistics CSV to publish')
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        if not args.csv:
+            parser.error('publish needs --csv')
+        import pandas as pd
+        from backend.database.canonicalize import canonicalize_players
+        rows = canonicalize_players(pd.read_csv(args.csv, sep=','))
+        print(json.dumps(publish_artifact(rows, args.store), indent=2))
+    elif args.command == 'list':
+        for m in list_artifacts(args.store):
+            print(f"{m['version']}  {m['rows']} players  {m['bytes'] / 1024:.0f} KB  {m['created_at']}")
+    else:
+        if not args.version:
+            parser.error('promote needs a version')
+        print(json.dumps(promote_artifact(args.store, args.version), indent=2))
@@ -0,0 +1,119 @@
+import io
+import os
+import csv
+import sys
+import json
+import time
+
+from backend.database.schema import GIOCATORI_COLUMNS, GIOCATORI_INDEXES, giocatori_ddl, giocatori_index_ddl
+from backend.database.skills import load_skill_index
+
+# Bulk, all-or-nothing reload of the giocatori table: rows go into a staging
+# table in one transaction (executemany on SQLite, COPY on Postgres), the row
+# count is validated, then staging replaces giocatori in the same transaction.
+# Readers see either the old dataset or the new one, never a partial load.
+
+STAGING_TABLE = 'giocatori_staging'
+# Refuse a reload that would shrink the table below this share of its current size
+BULK_LOAD_MIN_RATIO = float(os.getenv('BULK_LOAD_MIN_RATIO', 0.5))
+
+
+class BulkLoadError(Exception):
+    pass
+
+
+def _count(cur, table):
+    cur.execute(f"SELECT COUNT(*) FROM {table}")
+    row = cur.fetchone()
+    return list(row.values())[0] if isinstance(row, dict) else row[0]
+
+
+def _table_exists(cur, dialect, table):
+    if dialect == 'postgres':
+        cur.execute("SELECT 1 FROM information_schema.tables WHERE table_name = %s", (table,))
+    else:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cur.fetchone() is not None
+
+
+def _skills_list(value):
+    # Rows carry skills JSON-encoded, as stored
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [value]
+    return value if isinstance(value, list) else []
+
+
+def _copy_rows(cur, rows, columns):
+    """Stream rows into the staging table with COPY (None -> NULL)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(['' if v is None else v for v in row])
+    buf.seek(0)
+    cur.copy_expert(f"COPY {STAGING_TABLE} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def bulk_load_giocatori(rows, conn, dialect='sqlite', columns=GIOCATORI_COLUMNS, min_ratio=BULK_LOAD_MIN_RATIO):
+    """
+    Replace the giocatori table with `rows` (sequences ordered like `columns`).
+    Returns {'rows', 'previous_rows', 'seconds'}; raises BulkLoadError and leaves
+    the live table untouched if validation fails.
+    """
+    start = time.time()
+    rows = list(rows)
+    if not rows:
+        raise BulkLoadError("refusing to load an empty player dataset")
+    cur = conn.cursor()
+    if dialect == 'postgres':
+        cur.execute("SET LOCAL lock_timeout = '10s'")
+    else:
+        conn.commit()  # close any implicit transaction before taking the write lock
+        cur.execute('BEGIN IMMEDIATE')
+    try:
+        previous = _count(cur, 'giocatori') if _table_exists(cur, dialect, 'giocatori') else 0
+        if previous and len(rows) < previous * min_ratio:
+            raise BulkLoadError(f"new dataset has {len(rows)} rows, current has {previous} (min ratio {min_ratio})")
+
+        cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        cur.execute(giocatori_ddl(dialect, table=STAGING_TABLE))
+        if dialect == 'postgres':
+            _copy_rows(cur, rows, columns)
+        else:
+            placeholders = ', '.join(['?'] * len(columns))
+            cur.executemany(f"INSERT INTO {STAGING_TABLE} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+        loaded = _count(cur, STAGING_TABLE)
+        if loaded != len(rows):
+            raise BulkLoadError(f"staging has {loaded} rows, expected {len(rows)}")
+        if 'skills' in columns and _table_exists(cur, dialect, 'giocatori_skills'):
+            # Join table rewritten in the same transaction, so it always matches the live players
+            id_col, skills_col = columns.index('id'), columns.index('skills')
+            load_skill_index(cur, dialect, [(row[id_col], _skills_list(row[skills_col])) for row in rows])
+
+        if dialect == 'postgres':
+            # Build indexes before the swap so the exclusive lock is held only for the renames
+            for stmt in giocatori_index_ddl(STAGING_TABLE):
+                cur.execute(stmt)
+            cur.execute("DROP TABLE IF EXISTS giocatori")
+            cur.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO giocatori")
+            for name in GIOCATORI_INDEXES:
+                cur.execute(f"ALTER INDEX idx_{STAGING_TABLE}_{name} RENAME TO idx_giocatori_{name}")
+        else:
+            # Drop-then-rename: renaming giocatori itself would rewrite the other tables' foreign keys
+            cur.execute("DROP TABLE IF EXISTS giocatori")
+            cur.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO giocatori")
+            for stmt in giocatori_index_ddl('giocatori'):
+                cur.execute(stmt)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    stats = {'rows': len(rows), 'previous_rows': previous, 'seconds': round(time.time() - start, 3)}
+    print(f"\033[92m[BulkLoad] giocatori: {stats['rows']} rows (was {previous}) loaded in {stats['seconds']}s\033[0m",
+          file=sys.stderr)
+    return stats
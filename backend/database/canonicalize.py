@@ -0,0 +1,177 @@
+import ast
+import json
+
+import numpy as np
+import pandas as pd
+
+from backend.database.schema import (
+    GIOCATORI_COLUMNS, GIOCATORI_INTEGER_COLUMNS, GIOCATORI_JSON_COLUMNS, GIOCATORI_TEXT_COLUMNS,
+)
+from backend.database.skills import skills_mask
+
+# Columnar canonicalization of the player DataFrame, shared by the SQL and
+# Firestore writers: one rename/reindex to the canonical schema, per-column type
+# coercion, NaN/inf -> NULL, and skills parsed once per distinct value. The
+# output is a row matrix in GIOCATORI_COLUMNS order, ready to bind.
+
+# Source column (CSV / DataFrame) -> canonical column; unmapped names are kept as is
+GIOCATORI_KEY_MAP = {
+    'id': 'id',
+    'player_name': 'player_name', 'birthday': 'birthday', 'season_id': 'season_id', 'season': 'season',
+    'stats_team_id': 'stats_team_id', 'stats_team': 'stats_team', 'current_team_id': 'current_team_id', 'current_team': 'current_team',
+    'position_id': 'position_id', 'position': 'position', 'Accurate_Crosses_total': 'accurate_crosses_total',
+    'Accurate_Passes_Percentage_total': 'accurate_passes_percentage_total', 'Accurate_Passes_total': 'accurate_passes_total',
+    'Aerials_Won_total': 'aerials_won_total', 'Appearances_total': 'appearances_total', 'Assists_total': 'assists_total',
+    'Average_Points_Per_Game_average': 'average_points_per_game_average', 'Bench_total': 'bench_total',
+    'Big_Chances_Created_total': 'big_chances_created_total', 'Big_Chances_Missed_total': 'big_chances_missed_total',
+    'Cleansheets_away': 'cleansheets_away', 'Cleansheets_home': 'cleansheets_home', 'Cleansheets_total': 'cleansheets_total',
+    'Clearances_total': 'clearances_total', 'Crosses_Blocked_crosses_blocked': 'crosses_blocked_crosses_blocked',
+    'Dispossessed_total': 'dispossessed_total', 'Dribble_Attempts_total': 'dribble_attempts_total',
+    'Dribbled_Past_total': 'dribbled_past_total', 'Duels_Won_total': 'duels_won_total', 'Fouls_Drawn_total': 'fouls_drawn_total',
+    'Fouls_total': 'fouls_total', 'Goals_Conceded_total': 'goals_conceded_total', 'Goals_goals': 'goals_goals',
+    'Goals_penalties': 'goals_penalties', 'Goals_total': 'goals_total', 'Injuries_total': 'injuries_total',
+    'Interceptions_total': 'interceptions_total', 'Key_Passes_total': 'key_passes_total', 'Lineups_total': 'lineups_total',
+    'Long_Balls_Won_total': 'long_balls_won_total', 'Long_Balls_total': 'long_balls_total', 'Minutes_Played_total': 'minutes_played_total',
+    'Passes_total': 'passes_total', 'Rating_average': 'rating_average', 'Rating_highest': 'rating_highest',
+    'Rating_lowest': 'rating_lowest', 'Shots_Blocked_total': 'shots_blocked_total', 'Shots_Off_Target_total': 'shots_off_target_total',
+    'Shots_On_Target_total': 'shots_on_target_total', 'Shots_Total_total': 'shots_total_total', 'Substitutions_in': 'substitutions_in',
+    'Substitutions_out': 'substitutions_out', 'Successful_Dribbles_total': 'successful_dribbles_total', 'Tackles_total': 'tackles_total',
+    'Team_Draws_total': 'team_draws_total', 'Team_Lost_total': 'team_lost_total', 'Team_Wins_total': 'team_wins_total',
+    'Through_Balls_total': 'through_balls_total', 'Total_Crosses_total': 'total_crosses_total', 'Total_Duels_total': 'total_duels_total',
+    'Yellowcards_away': 'yellowcards_away', 'Yellowcards_home': 'yellowcards_home', 'Yellowcards_total': 'yellowcards_total',
+    'Blocked_Shots_total': 'blocked_shots_total', 'Own_Goals_total': 'own_goals_total', 'Penalties_committed': 'penalties_committed',
+    'Penalties_missed': 'penalties_missed', 'Penalties_saved': 'penalties_saved', 'Penalties_scored': 'penalties_scored',
+    'Penalties_total': 'penalties_total', 'Penalties_won': 'penalties_won', 'Redcards_away': 'redcards_away',
+    'Redcards_home': 'redcards_home', 'Redcards_total': 'redcards_total', 'Captain_total': 'captain_total',
+    'Hit_Woodwork_total': 'hit_woodwork_total', 'Offsides_total': 'offsides_total', 'Through_Balls_Won_total': 'through_balls_won_total',
+    'Yellowred_Cards_away': 'yellowred_cards_away', 'Yellowred_Cards_home': 'yellowred_cards_home', 'Yellowred_Cards_total': 'yellowred_cards_total',
+    'Error_Lead_To_Goal_total': 'error_lead_to_goal_total', 'Saves_Insidebox_total': 'saves_insidebox_total', 'Saves_total': 'saves_total',
+    'Hattricks_average': 'hattricks_average', 'Hattricks_total': 'hattricks_total', 'years_old': 'years_old', 'goals_per_90': 'goals_per_90',
+    'assists_per_90': 'assists_per_90', 'big_chances_created_per_90': 'big_chances_created_per_90', 'conversion_rate': 'conversion_rate',
+    'key_passes_per_90': 'key_passes_per_90', 'crosses_per_90': 'crosses_per_90', 'accurate_crosses_per_90': 'accurate_crosses_per_90',
+    'cross_accuracy': 'cross_accuracy', 'dribble_success_rate': 'dribble_success_rate', 'aerial_duels_win_rate': 'aerial_duels_win_rate',
+    'aerials_won_per_90': 'aerials_won_per_90', 'duels_won_rate': 'duels_won_rate', 'blocked_shots_per_90': 'blocked_shots_per_90',
+    'clearances_per_90': 'clearances_per_90', 'def_actions': 'def_actions', 'def_actions_per_90': 'def_actions_per_90',
+    'tackle_success_rate': 'tackle_success_rate', 'clean_sheet_rate': 'clean_sheet_rate', 'goals_conceded_per_90': 'goals_conceded_per_90',
+    'cards_total': 'cards_total', 'cards_per_90': 'cards_per_90', 'fouls_drawn_per_90': 'fouls_drawn_per_90', 'starting_rate': 'starting_rate',
+    'minutes_share': 'minutes_share', 'bench_rate': 'bench_rate', 'injury_risk': 'injury_risk', 'injury_risk_band': 'injury_risk_band',
+    'penalty_success_rate': 'penalty_success_rate', 'saves_per_90': 'saves_per_90', 'save_success_rate': 'save_success_rate',
+    'pen_save_rate': 'pen_save_rate', 'def_actions_per_90_rank': 'def_actions_per_90_rank', 'rating_std': 'rating_std',
+    'volatility_index': 'volatility_index', 'pen_save_rate_z': 'pen_save_rate_z', 'key_passes_per_90_z': 'key_passes_per_90_z',
+    'goals_conceded_per_90_z': 'goals_conceded_per_90_z', 'Rating_average_z': 'rating_average_z', 'starting_rate_z': 'starting_rate_z',
+    'def_actions_per_90_z': 'def_actions_per_90_z', 'minutes_share_z': 'minutes_share_z', 'assists_per_90_z': 'assists_per_90_z',
+    'big_chances_created_per_90_z': 'big_chances_created_per_90_z', 'clean_sheet_rate_z': 'clean_sheet_rate_z',
+    'saves_per_90_z': 'saves_per_90_z', 'aerial_duels_win_rate_z': 'aerial_duels_win_rate_z', 'goals_per_90_z': 'goals_per_90_z',
+    'dribble_success_rate_z': 'dribble_success_rate_z', 'conversion_rate_z': 'conversion_rate_z', 'injury_risk_z': 'injury_risk_z',
+    'tackle_success_rate_z': 'tackle_success_rate_z', 'crosses_per_90_z': 'crosses_per_90_z', 'cards_per_90_z': 'cards_per_90_z',
+    'save_success_rate_z': 'save_success_rate_z', 'ATT_perf': 'att_perf', 'CEN_perf': 'cen_perf', 'DIF_perf': 'dif_perf',
+    'POR_perf': 'por_perf', 'role_perf': 'role_perf', 'stars': 'stars', 'skills': 'skills', 'QuotaTarget': 'quotatarget',
+    'predicted_price': 'predicted_price',
+    'yellowcards_per_90': 'yellowcards_per_90',
+    'redcards_per_90': 'redcards_per_90',
+    'own_goals_per_90': 'own_goals_per_90',
+    'penalties_saved_per_90': 'penalties_saved_per_90',
+    'gol_bonus': 'gol_bonus',
+    'assist_bonus': 'assist_bonus',
+    'clean_sheet_bonus': 'clean_sheet_bonus',
+    'titolarita': 'titolarita',
+    'malus_risk_raw': 'malus_risk_raw',
+    'pen_save_bonus': 'pen_save_bonus',
+    'xfp_90': 'xfp_90',
+    'xfp_per_game': 'xfp_per_game',
+    'xfp_season': 'xfp_season',
+    'price_expected': 'price_expected',
+    'risk_coeff': 'risk_coeff',
+    'hype_coeff': 'hype_coeff',
+    'range_low': 'range_low',
+    'range_high': 'range_high',
+}
+
+
+def parse_skills(skills_val):
+    """Skills as a list, whether they come as a list, a repr'd list or a comma-separated string."""
+    if isinstance(skills_val, list):
+        return skills_val
+    if not isinstance(skills_val, str) or not skills_val.strip():
+        return []
+    try:
+        val = ast.literal_eval(skills_val)
+        return val if isinstance(val, list) else [skills_val]
+    except Exception:
+        if ',' in skills_val:
+            return [s.strip() for s in skills_val.split(',') if s.strip()]
+        return [skills_val.strip()]
+
+
+def _parse_skills_column(series):
+    # The same few tag combinations repeat across players: parse each string once
+    parsed = {value: parse_skills(value) for value in pd.unique(series[series.map(type) == str])}
+    return [list(parsed[v]) if isinstance(v, str) else parse_skills(v) if isinstance(v, list) else []
+            for v in series]
+
+
+def _numeric_block(df, columns):
+    """float64 matrix of `columns` (non-numeric values and +-inf -> NaN)."""
+    block = df[columns]
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in block.dtypes):
+        block = block.apply(pd.to_numeric, errors='coerce')
+    values = block.to_numpy(dtype='float64', na_value=np.nan, copy=True)
+    values[~np.isfinite(values)] = np.nan
+    return values
+
+
+def _to_objects(values, missing):
+    out = values.astype(object)
+    out[missing] = None
+    return out
+
+
+def canonicalize_players(df, columns=GIOCATORI_COLUMNS, encode_json=False):
+    """
+    Canonical row matrix (list of lists in `columns` order) from a player DataFrame.
+    Missing ids are numbered after the largest id, skills become lists (JSON text with
+    encode_json=True, for SQL) and skills_mask is derived from them.
+    """
+    columns = list(columns)
+    df = df.rename(columns=lambda c: GIOCATORI_KEY_MAP.get(c, c))
+    df = df.loc[:, ~df.columns.duplicated()].reindex(columns=columns)
+    df = df.reset_index(drop=True)
+    n = len(df)
+    position = {column: i for i, column in enumerate(columns)}
+    matrix = np.empty((n, len(columns)), dtype=object)
+
+    text = [c for c in columns if c in GIOCATORI_TEXT_COLUMNS]
+    if text:
+        values = df[text].to_numpy(dtype=object)
+        missing = df[text].isna().to_numpy()
+        values = np.where(missing, None, values.astype(str).astype(object))
+        matrix[:, [position[c] for c in text]] = values
+
+    integers = [c for c in columns if c in GIOCATORI_INTEGER_COLUMNS and c != 'skills_mask']
+    if integers:
+        values = _numeric_block(df, integers)
+        if 'id' in integers:
+            # Missing ids are numbered after the largest id, as SQLite numbers NULL rowids
+            ids = values[:, integers.index('id')]
+            missing_ids = np.isnan(ids)
+            if missing_ids.any():
+                start = 1 if missing_ids.all() else int(np.nanmax(ids)) + 1
+                ids[missing_ids] = np.arange(start, start + missing_ids.sum())
+        missing = np.isnan(values)
+        ints = np.rint(np.where(missing, 0, values)).astype(np.int64)
+        matrix[:, [position[c] for c in integers]] = _to_objects(ints, missing)
+
+    reals = [c for c in columns if c not in GIOCATORI_TEXT_COLUMNS and c not in GIOCATORI_INTEGER_COLUMNS
+             and c not in GIOCATORI_JSON_COLUMNS]
+    if reals:
+        values = _numeric_block(df, reals)
+        matrix[:, [position[c] for c in reals]] = _to_objects(values, np.isnan(values))
+
+    if 'skills' in position:
+        skills = _parse_skills_column(df['skills'])
+        column = [json.dumps(s) for s in skills] if encode_json else skills
+        # The trailing None keeps numpy from turning equal-length lists into a 2-D array
+        matrix[:, position['skills']] = np.array(column + [None], dtype=object)[:-1]
+        if 'skills_mask' in position:
+            matrix[:, position['skills_mask']] = [skills_mask(s) for s in skills]
+    return matrix.tolist()
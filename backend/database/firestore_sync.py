@@ -0,0 +1,70 @@
+import sys
+import json
+import time
+import hashlib
+import threading
+
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, SendMode
+
+# Diff-based sync of the player collection: a content hash is stored on every
+# document, existing hashes are read with a field mask, and only new or changed
+# players are written (removed ones are deleted), all through a parallel BulkWriter.
+
+CONTENT_HASH_FIELD = 'content_hash'
+MAX_WRITE_ATTEMPTS = 5
+
+
+def content_hash(doc):
+    payload = {k: v for k, v in doc.items() if k != CONTENT_HASH_FIELD}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def sync_firestore_players(db, docs, collection='giocatori', exclude_ids=('init',)):
+    """
+    Make `collection` match `docs` ({doc_id: dict}).
+    Returns {'written', 'skipped', 'deleted', 'failed', 'seconds'}, counted from the
+    completed writes (a failure counts once its retries are exhausted).
+    """
+    start = time.time()
+    coll = db.collection(collection)
+    existing = {
+        doc.id: (doc.to_dict() or {}).get(CONTENT_HASH_FIELD)
+        for doc in coll.select([CONTENT_HASH_FIELD]).stream()
+        if doc.id not in exclude_ids
+    }
+
+    bulk_writer = db.bulk_writer(options=BulkWriterOptions(mode=SendMode.parallel))
+    stats = {'written': 0, 'skipped': 0, 'deleted': 0, 'failed': 0}
+    deletes = set()
+    lock = threading.Lock()  # the callbacks run on the writer's threads
+
+    def on_result(reference, _result, _writer):
+        with lock:
+            stats['deleted' if reference.path in deletes else 'written'] += 1
+
+    def on_error(failure, _writer):
+        retry = failure.attempts < MAX_WRITE_ATTEMPTS
+        if not retry:
+            with lock:
+                stats['failed'] += 1
+            print(f"\033[91m[FirestoreSync] {failure.operation.reference.path}: {failure.message}\033[0m", file=sys.stderr)
+        return retry
+
+    bulk_writer.on_write_result(on_result)
+    bulk_writer.on_write_error(on_error)
+    for doc_id, doc in docs.items():
+        digest = content_hash(doc)
+        if existing.get(doc_id) == digest:
+            stats['skipped'] += 1
+            continue
+        bulk_writer.set(coll.document(doc_id), {**doc, CONTENT_HASH_FIELD: digest})
+    for doc_id in existing.keys() - docs.keys():
+        reference = coll.document(doc_id)
+        deletes.add(reference.path)
+        bulk_writer.delete(reference)
+    bulk_writer.close()  # flushes and waits for every pending write
+
+    stats['seconds'] = round(time.time() - start, 2)
+    print(f"\033[92m[FirestoreSync] {collection}: {stats['written']} written, {stats['skipped']} unchanged, "
+          f"{stats['deleted']} deleted, {stats['failed']} failed in {stats['seconds']}s\033[0m", file=sys.stderr)
+    return stats
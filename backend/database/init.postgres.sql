@@ -0,0 +1,83 @@
+-- Script di inizializzazione per PostgreSQL
+-- The giocatori table is created by the migrations (backend/database/migrations.py)
+
+CREATE TABLE IF NOT EXISTS login (
+    id SERIAL PRIMARY KEY,
+    google_sub TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_login TIMESTAMP
+);
+
+-- USERS & PLANS TABLES FOR LOGIN/SUBSCRIPTION MANAGEMENT
+CREATE TABLE IF NOT EXISTS users (
+  id SERIAL PRIMARY KEY,
+  google_sub TEXT UNIQUE NOT NULL,
+  plan TEXT NOT NULL DEFAULT 'free',
+  ai_credits INTEGER NOT NULL DEFAULT 0,
+  spent_credits INTEGER NOT NULL DEFAULT 0,
+  api_cost NUMERIC NOT NULL DEFAULT 0,
+  last_credits_update TIMESTAMP,
+  last_session_id TEXT,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS plans (
+  key TEXT PRIMARY KEY,
+  price NUMERIC,
+  features TEXT
+);
+
+CREATE TABLE IF NOT EXISTS league_settings (
+    google_sub TEXT PRIMARY KEY,
+    participants INTEGER,
+    budget INTEGER,
+    participant_names TEXT,
+    n_gk_players INTEGER,
+    n_def_players INTEGER,
+    n_mid_players INTEGER,
+    n_fwd_players INTEGER,
+    use_clean_sheet_bonus INTEGER,
+    use_defensive_modifier INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS strategy_board (
+    google_sub TEXT PRIMARY KEY REFERENCES users(google_sub),
+    role_budget_gk INTEGER,
+    role_budget_def INTEGER,
+    role_budget_mid INTEGER,
+    role_budget_fwd INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS strategy_board_targets (
+    google_sub TEXT NOT NULL REFERENCES users(google_sub),
+    player_id BIGINT NOT NULL,
+    max_bid INTEGER DEFAULT 0,
+    PRIMARY KEY (google_sub, player_id)
+);
+
+CREATE TABLE IF NOT EXISTS auction_log (
+    google_sub TEXT PRIMARY KEY REFERENCES users(google_sub),
+    auction_log TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS processed_sessions (
+    session_id TEXT PRIMARY KEY,
+    google_sub TEXT,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tos_acceptance (
+    google_sub TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    accepted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Locally cached Stripe checkout session status, written by the webhook
+CREATE TABLE IF NOT EXISTS checkout_sessions (
+    session_id TEXT PRIMARY KEY,
+    google_sub TEXT,
+    payment_status TEXT NOT NULL,
+    metadata TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
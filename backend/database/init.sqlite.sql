@@ -1,46 +1,5 @@
--- Script di inizializzazione tabella giocatori per SQLite
-CREATE TABLE IF NOT EXISTS giocatori (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    nome TEXT NOT NULL,
-    cognome TEXT,
-    punteggio REAL,
-    fantamedia_2024_2025 REAL,
-    fantamedia_2023_2024 REAL,
-    fantamedia_2022_2023 REAL,
-    presenze_2024_2025 REAL,
-    fanta_media_2024_2025 REAL,
-    fm_su_tot_gare_2024_2025 REAL,
-    presenze_previste TEXT,
-    gol_previsti TEXT,
-    assist_previsti REAL,
-    ruolo TEXT,
-    ruolo_m TEXT,
-    ruolo_quote TEXT,
-    skills TEXT,
-    buon_investimento REAL,
-    resistenza_infortuni REAL,
-    consigliato INTEGER,
-    infortunato INTEGER,
-    nuovo_acquisto INTEGER,
-    squadra TEXT,
-    squadra_quote TEXT,
-    quota_attuale INTEGER,
-    quota_iniziale INTEGER,
-    diff INTEGER,
-    quota_attuale_m INTEGER,
-    quota_iniziale_m INTEGER,
-    diff_m INTEGER,
-    fvm INTEGER,
-    fvm_m INTEGER,
-    trend TEXT,
-    presenze INTEGER,
-    appetibilita REAL,
-    recommendation INTEGER,
-    fvm_recommendation INTEGER,
-    suggested_bid_min INTEGER,
-    suggested_bid_max INTEGER,
-    last_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+-- Script di inizializzazione per SQLite
+-- The giocatori table is created by the migrations (backend/database/migrations.py)
 
 CREATE TABLE IF NOT EXISTS login (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -129,3 +88,18 @@ CREATE TABLE IF NOT EXISTS processed_sessions (
     google_sub TEXT,
     processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+CREATE TABLE IF NOT EXISTS tos_acceptance (
+    google_sub TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    accepted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Locally cached Stripe checkout session status, written by the webhook
+CREATE TABLE IF NOT EXISTS checkout_sessions (
+    session_id TEXT PRIMARY KEY,
+    google_sub TEXT,
+    payment_status TEXT NOT NULL,
+    metadata TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
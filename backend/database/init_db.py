@@ -16,7 +16,8 @@ def init_db():
         print(f"Using Firestore database: {firestore_db}")
         # Optionally create collections with a dummy doc (Firestore is schemaless)
         collections = [
-            'giocatori', 'users', 'league_settings', 'strategy_board', 'strategy_board_targets'
+            'giocatori', 'users', 'league_settings', 'strategy_board', 'strategy_board_targets',
+            'processed_sessions', 'checkout_sessions'
         ]
         for col in collections:
             doc_ref = db.collection(col).document('init')
@@ -32,9 +33,9 @@ def init_db():
         sql = f.read()
 
     if db_type == 'sqlite':
-        import sqlite3
+        from backend.api.utils.sqlite_profile import connect_sqlite
         db_path = os.environ.get('SQLITE_PATH', os.path.join(os.path.dirname(__file__), 'fantacalcio.db'))
-        conn = sqlite3.connect(db_path)
+        conn = connect_sqlite(db_path)
         cursor = conn.cursor()
         for statement in sql.split(';'):
             stmt = statement.strip()
@@ -46,6 +47,8 @@ def init_db():
         conn.commit()
         cursor.close()
         conn.close()
+        from backend.database.migrations import migrate_database
+        migrate_database('sqlite', db_path)
     else:
         import mysql.connector
         db_config = {
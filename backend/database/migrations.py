@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import time
+
+from backend.database.skills import SKILL_TABLES_DDL, load_skill_index, skills_mask
+
+# Versioned schema migrations for the SQL backends (sqlite, postgres).
+# Applied versions are recorded in schema_migrations; each migration runs in its
+# own transaction under a lock, so concurrent workers starting up apply it once.
+# A migration is frozen once released: it carries its own column lists and DDL
+# instead of reading the live schema (backend/database/schema.py), and later
+# schema changes go in new numbered migrations.
+
+DATABASE_DIR = os.path.dirname(__file__)
+PG_MIGRATION_LOCK_ID = 72_201_001  # arbitrary key for pg_advisory_xact_lock
+
+
+def _sql_statements(script):
+    """Split a SQL script into statements, dropping `--` comment lines."""
+    lines = [line for line in script.splitlines() if not line.strip().startswith('--')]
+    return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+
+def _first(row):
+    # Works for tuples, sqlite3.Row and psycopg2 RealDictRow
+    return list(row.values())[0] if isinstance(row, dict) else row[0]
+
+
+def table_columns(cur, dialect, table):
+    """Column names of `table` (empty set if it does not exist)."""
+    if dialect == 'postgres':
+        cur.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s", (table,))
+        return {_first(row) for row in cur.fetchall()}
+    cur.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cur.fetchall()}
+
+
+def _begin(cur, dialect):
+    if dialect == 'postgres':
+        # The transaction is implicit; the advisory lock is released at commit/rollback
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (PG_MIGRATION_LOCK_ID,))
+    else:
+        cur.execute('BEGIN IMMEDIATE')
+
+
+def _end(conn, cur, dialect, commit=True):
+    if dialect == 'postgres' and commit:
+        conn.commit()
+    elif dialect == 'postgres':
+        conn.rollback()
+    else:
+        cur.execute('COMMIT' if commit else 'ROLLBACK')
+
+
+# --- Migrations ---
+
+# giocatori as created by 002 (skills as JSON text; 004 makes it JSONB on Postgres)
+_V002_GIOCATORI_COLUMNS = (
+    "id", "player_name", "birthday", "season_id", "season", "stats_team_id", "stats_team", "current_team_id",
+    "current_team", "position_id", "position", "accurate_crosses_total", "accurate_passes_percentage_total",
+    "accurate_passes_total", "aerials_won_total", "appearances_total", "assists_total",
+    "average_points_per_game_average", "bench_total", "big_chances_created_total", "big_chances_missed_total",
+    "cleansheets_away", "cleansheets_home", "cleansheets_total", "clearances_total",
+    "crosses_blocked_crosses_blocked", "dispossessed_total", "dribble_attempts_total", "dribbled_past_total",
+    "duels_won_total", "fouls_drawn_total", "fouls_total", "goals_conceded_total", "goals_goals", "goals_penalties",
+    "goals_total", "injuries_total", "interceptions_total", "key_passes_total", "lineups_total",
+    "long_balls_won_total", "long_balls_total", "minutes_played_total", "passes_total", "rating_average",
+    "rating_highest", "rating_lowest", "shots_blocked_total", "shots_off_target_total", "shots_on_target_total",
+    "shots_total_total", "substitutions_in", "substitutions_out", "successful_dribbles_total", "tackles_total",
+    "team_draws_total", "team_lost_total", "team_wins_total", "through_balls_total", "total_crosses_total",
+    "total_duels_total", "yellowcards_away", "yellowcards_home", "yellowcards_total", "blocked_shots_total",
+    "own_goals_total", "penalties_committed", "penalties_missed", "penalties_saved", "penalties_scored",
+    "penalties_total", "penalties_won", "redcards_away", "redcards_home", "redcards_total", "captain_total",
+    "hit_woodwork_total", "offsides_total", "through_balls_won_total", "yellowred_cards_away",
+    "yellowred_cards_home", "yellowred_cards_total", "error_lead_to_goal_total", "saves_insidebox_total",
+    "saves_total", "hattricks_average", "hattricks_total", "years_old", "goals_per_90", "assists_per_90",
+    "big_chances_created_per_90", "conversion_rate", "key_passes_per_90", "crosses_per_90",
+    "accurate_crosses_per_90", "cross_accuracy", "dribble_success_rate", "aerial_duels_win_rate",
+    "aerials_won_per_90", "duels_won_rate", "blocked_shots_per_90", "clearances_per_90", "def_actions",
+    "def_actions_per_90", "tackle_success_rate", "clean_sheet_rate", "goals_conceded_per_90", "cards_total",
+    "cards_per_90", "fouls_drawn_per_90", "starting_rate", "minutes_share", "bench_rate", "injury_risk",
+    "injury_risk_band", "penalty_success_rate", "saves_per_90", "save_success_rate", "pen_save_rate",
+    "def_actions_per_90_rank", "rating_std", "volatility_index", "pen_save_rate_z", "key_passes_per_90_z",
+    "goals_conceded_per_90_z", "rating_average_z", "starting_rate_z", "def_actions_per_90_z", "minutes_share_z",
+    "assists_per_90_z", "big_chances_created_per_90_z", "clean_sheet_rate_z", "saves_per_90_z",
+    "aerial_duels_win_rate_z", "goals_per_90_z", "dribble_success_rate_z", "conversion_rate_z", "injury_risk_z",
+    "tackle_success_rate_z", "crosses_per_90_z", "cards_per_90_z", "save_success_rate_z", "att_perf", "cen_perf",
+    "dif_perf", "por_perf", "role_perf", "stars", "skills", "quotatarget", "predicted_price", "yellowcards_per_90",
+    "redcards_per_90", "own_goals_per_90", "penalties_saved_per_90", "gol_bonus", "assist_bonus",
+    "clean_sheet_bonus", "titolarita", "malus_risk_raw", "pen_save_bonus", "xfp_90", "xfp_per_game",
+    "price_expected", "xfp_season", "risk_coeff", "hype_coeff", "range_low", "range_high",
+)
+_V002_TEXT_COLUMNS = {
+    "player_name", "birthday", "season", "stats_team", "current_team", "position", "injury_risk_band", "skills",
+}
+_V002_INTEGER_COLUMNS = {"id", "season_id", "stats_team_id", "current_team_id", "position_id"}
+_V002_TYPES = {
+    'sqlite': {'text': 'TEXT', 'integer': 'INTEGER', 'real': 'REAL'},
+    'postgres': {'text': 'TEXT', 'integer': 'BIGINT', 'real': 'DOUBLE PRECISION'},
+}
+# giocatori indexes created by 003: name -> columns
+_V003_GIOCATORI_INDEXES = {
+    'position': ['position'],
+    'current_team': ['current_team'],
+    'stars': ['stars'],
+    'price_expected': ['price_expected'],
+}
+_V005_INTEGER_TYPE = {'sqlite': 'INTEGER', 'postgres': 'BIGINT'}
+
+
+def _v002_giocatori_ddl(dialect):
+    types = _V002_TYPES[dialect]
+
+    def column_type(col):
+        if col in _V002_TEXT_COLUMNS:
+            return types['text']
+        return types['integer'] if col in _V002_INTEGER_COLUMNS else types['real']
+
+    defs = [f"    id {column_type('id')} PRIMARY KEY"]
+    defs += [f"    {col} {column_type(col)}" for col in _V002_GIOCATORI_COLUMNS if col != 'id']
+    defs.append("    last_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+    return "CREATE TABLE IF NOT EXISTS giocatori (\n" + ",\n".join(defs) + "\n)"
+
+
+def _baseline(cur, dialect):
+    """All tables from the init script (CREATE TABLE IF NOT EXISTS, safe on existing databases)."""
+    with open(os.path.join(DATABASE_DIR, f'init.{dialect}.sql'), 'r') as f:
+        for stmt in _sql_statements(f.read()):
+            cur.execute(stmt)
+
+
+def _giocatori_canonical_schema(cur, dialect):
+    """
+    Rebuild giocatori with the canonical columns and numeric types.
+    Rows already in canonical form are carried over; an old scraper-format table
+    is kept as giocatori_legacy instead of being copied.
+    """
+    existing = table_columns(cur, dialect, 'giocatori')
+    if not existing:
+        cur.execute(_v002_giocatori_ddl(dialect))
+        return
+    if dialect == 'sqlite':
+        # Otherwise SQLite rewrites the other tables' FOREIGN KEY ... REFERENCES giocatori to giocatori_legacy
+        cur.execute("PRAGMA legacy_alter_table=ON")
+    cur.execute("ALTER TABLE giocatori RENAME TO giocatori_legacy")
+    if dialect == 'sqlite':
+        cur.execute("PRAGMA legacy_alter_table=OFF")
+    cur.execute(_v002_giocatori_ddl(dialect))
+    cur.execute("SELECT COUNT(*) FROM giocatori_legacy")
+    legacy_rows = _first(cur.fetchone())
+    if 'player_name' in existing:
+        common = [col for col in _V002_GIOCATORI_COLUMNS if col in existing]
+        cur.execute(f"INSERT INTO giocatori ({', '.join(common)}) SELECT {', '.join(common)} FROM giocatori_legacy")
+        cur.execute("DROP TABLE giocatori_legacy")
+    elif legacy_rows == 0:
+        cur.execute("DROP TABLE giocatori_legacy")
+    else:
+        print("\033[93m[Migrations] old-format giocatori kept as giocatori_legacy; reload the players\033[0m", file=sys.stderr)
+
+
+def _api_indexes(cur, dialect):
+    # strategy_board_targets(google_sub) needs no index: it is the leading column of the primary key
+    for name, columns in _V003_GIOCATORI_INDEXES.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_giocatori_{name} ON giocatori ({', '.join(columns)})")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_processed_sessions_google_sub ON processed_sessions (google_sub)")
+
+
+def _postgres_jsonb(cur, dialect):
+    """JSON payloads as JSONB on Postgres; SQLite keeps them as TEXT."""
+    if dialect != 'postgres':
+        return
+    for table, column in [('auction_log', 'auction_log'), ('league_settings', 'participant_names'),
+                          ('checkout_sessions', 'metadata'), ('giocatori', 'skills')]:
+        cur.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb")
+
+
+def _skills_index(cur, dialect):
+    """skill_tags dictionary, giocatori_skills join table and giocatori.skills_mask, backfilled from skills."""
+    for stmt in SKILL_TABLES_DDL:
+        cur.execute(stmt)
+    # Databases whose 002 ran while it still read the live schema already have the column
+    if 'skills_mask' not in table_columns(cur, dialect, 'giocatori'):
+        cur.execute(f"ALTER TABLE giocatori ADD COLUMN skills_mask {_V005_INTEGER_TYPE[dialect]}")
+    cur.execute("SELECT id, skills FROM giocatori")
+    players = []
+    for player_id, skills in cur.fetchall():
+        if isinstance(skills, str):
+            try:
+                skills = json.loads(skills)
+            except ValueError:
+                skills = [skills]
+        players.append((player_id, skills if isinstance(skills, list) else []))
+    ph = '%s' if dialect == 'postgres' else '?'
+    cur.executemany(f"UPDATE giocatori SET skills_mask = {ph} WHERE id = {ph}",
+                    [(skills_mask(skills), player_id) for player_id, skills in players])
+    load_skill_index(cur, dialect, players)
+
+
+MIGRATIONS = [
+    (1, 'baseline', _baseline),
+    (2, 'giocatori_canonical_schema', _giocatori_canonical_schema),
+    (3, 'api_indexes', _api_indexes),
+    (4, 'postgres_jsonb', _postgres_jsonb),
+    (5, 'skills_index', _skills_index),
+]
+
+
+def run_migrations(conn, dialect='sqlite'):
+    """
+    Apply pending migrations and return the list of versions applied now.
+    For sqlite `conn` must be opened with isolation_level=None (explicit transactions).
+    """
+    ph = '%s' if dialect == 'postgres' else '?'
+    cur = conn.cursor()
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    )
+    if dialect == 'postgres':
+        conn.commit()
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        start = time.time()
+        _begin(cur, dialect)
+        try:
+            cur.execute(f"SELECT 1 FROM schema_migrations WHERE version = {ph}", (version,))
+            if cur.fetchone() is not None:
+                _end(conn, cur, dialect)
+                continue
+            migrate(cur, dialect)
+            cur.execute(f"INSERT INTO schema_migrations (version, name) VALUES ({ph}, {ph})", (version, name))
+            _end(conn, cur, dialect)
+        except Exception:
+            _end(conn, cur, dialect, commit=False)
+            raise
+        applied.append(version)
+        print(f"\033[92m[Migrations] applied {version:03d}_{name} in {time.time() - start:.2f}s\033[0m", file=sys.stderr)
+    cur.close()
+    return applied
+
+
+def migrate_database(db_type=None, sqlite_path=None):
+    """Open a dedicated connection for DB_TYPE and run the pending migrations."""
+    db_type = db_type or os.getenv('DB_TYPE', 'sqlite')
+    if db_type == 'postgres':
+        import psycopg2
+        conn = psycopg2.connect(
+            dbname=os.getenv('POSTGRES_DB'),
+            user=os.getenv('POSTGRES_USER'),
+            password=os.getenv('POSTGRES_PASSWORD'),
+            host=os.getenv('POSTGRES_HOST'),
+            port=os.getenv('POSTGRES_PORT', 5432)
+        )
+    elif db_type == 'sqlite':
+        from backend.api.utils.sqlite_profile import connect_sqlite
+        conn = connect_sqlite(sqlite_path or os.getenv('SQLITE_PATH', 'backend/database/fantacalcio.db'),
+                              isolation_level=None)
+    else:
+        return []
+    try:
+        return run_migrations(conn, db_type)
+    finally:
+        conn.close()
@@ -0,0 +1,90 @@
+# Canonical schema of the `giocatori` table, shared by the loaders and the
+# migrations. Column order is the one written by insert_giocatori_from_csv_records.
+GIOCATORI_COLUMNS = [
+    "id",
+    "player_name", "birthday", "season_id", "season", "stats_team_id", "stats_team", "current_team_id",
+    "current_team", "position_id", "position", "accurate_crosses_total", "accurate_passes_percentage_total",
+    "accurate_passes_total", "aerials_won_total", "appearances_total", "assists_total",
+    "average_points_per_game_average", "bench_total", "big_chances_created_total", "big_chances_missed_total",
+    "cleansheets_away", "cleansheets_home", "cleansheets_total", "clearances_total",
+    "crosses_blocked_crosses_blocked", "dispossessed_total", "dribble_attempts_total", "dribbled_past_total",
+    "duels_won_total", "fouls_drawn_total", "fouls_total", "goals_conceded_total", "goals_goals",
+    "goals_penalties", "goals_total", "injuries_total", "interceptions_total", "key_passes_total",
+    "lineups_total", "long_balls_won_total", "long_balls_total", "minutes_played_total", "passes_total",
+    "rating_average", "rating_highest", "rating_lowest", "shots_blocked_total", "shots_off_target_total",
+    "shots_on_target_total", "shots_total_total", "substitutions_in", "substitutions_out",
+    "successful_dribbles_total", "tackles_total", "team_draws_total", "team_lost_total", "team_wins_total",
+    "through_balls_total", "total_crosses_total", "total_duels_total", "yellowcards_away", "yellowcards_home",
+    "yellowcards_total", "blocked_shots_total", "own_goals_total", "penalties_committed", "penalties_missed",
+    "penalties_saved", "penalties_scored", "penalties_total", "penalties_won", "redcards_away", "redcards_home",
+    "redcards_total", "captain_total", "hit_woodwork_total", "offsides_total", "through_balls_won_total",
+    "yellowred_cards_away", "yellowred_cards_home", "yellowred_cards_total", "error_lead_to_goal_total",
+    "saves_insidebox_total", "saves_total", "hattricks_average", "hattricks_total", "years_old", "goals_per_90",
+    "assists_per_90", "big_chances_created_per_90", "conversion_rate", "key_passes_per_90", "crosses_per_90",
+    "accurate_crosses_per_90", "cross_accuracy", "dribble_success_rate", "aerial_duels_win_rate",
+    "aerials_won_per_90", "duels_won_rate", "blocked_shots_per_90", "clearances_per_90", "def_actions",
+    "def_actions_per_90", "tackle_success_rate", "clean_sheet_rate", "goals_conceded_per_90", "cards_total",
+    "cards_per_90", "fouls_drawn_per_90", "starting_rate", "minutes_share", "bench_rate", "injury_risk",
+    "injury_risk_band", "penalty_success_rate", "saves_per_90", "save_success_rate", "pen_save_rate",
+    "def_actions_per_90_rank", "rating_std", "volatility_index", "pen_save_rate_z", "key_passes_per_90_z",
+    "goals_conceded_per_90_z", "rating_average_z", "starting_rate_z", "def_actions_per_90_z", "minutes_share_z",
+    "assists_per_90_z", "big_chances_created_per_90_z", "clean_sheet_rate_z", "saves_per_90_z",
+    "aerial_duels_win_rate_z", "goals_per_90_z", "dribble_success_rate_z", "conversion_rate_z", "injury_risk_z",
+    "tackle_success_rate_z", "crosses_per_90_z", "cards_per_90_z", "save_success_rate_z", "att_perf", "cen_perf",
+    "dif_perf", "por_perf", "role_perf", "stars", "skills", "quotatarget", "predicted_price",
+    "yellowcards_per_90", "redcards_per_90", "own_goals_per_90", "penalties_saved_per_90", "gol_bonus",
+    "assist_bonus", "clean_sheet_bonus", "titolarita", "malus_risk_raw", "pen_save_bonus", "xfp_90",
+    "xfp_per_game", "price_expected", "xfp_season", "risk_coeff", "hype_coeff", "range_low", "range_high",
+    "skills_mask",
+]
+
+GIOCATORI_TEXT_COLUMNS = {
+    "player_name", "birthday", "season", "stats_team", "current_team", "position", "injury_risk_band",
+}
+GIOCATORI_JSON_COLUMNS = {"skills"}  # JSON-encoded list (TEXT on SQLite, JSONB on Postgres)
+# skills_mask: bit i set if the player has backend.database.skills.SKILL_TAGS[i]
+GIOCATORI_INTEGER_COLUMNS = {"id", "season_id", "stats_team_id", "current_team_id", "position_id", "skills_mask"}
+
+# Indexes for the API access paths (filter by role/team, sort by stars/price)
+GIOCATORI_INDEXES = {
+    'position': ['position'],
+    'current_team': ['current_team'],
+    'stars': ['stars'],
+    'price_expected': ['price_expected'],
+}
+
+_TYPES = {
+    'sqlite': {'text': 'TEXT', 'integer': 'INTEGER', 'real': 'REAL', 'json': 'TEXT'},
+    'postgres': {'text': 'TEXT', 'integer': 'BIGINT', 'real': 'DOUBLE PRECISION', 'json': 'JSONB'},
+}
+
+
+def giocatori_column_type(column, dialect='sqlite'):
+    types = _TYPES[dialect]
+    if column in GIOCATORI_JSON_COLUMNS:
+        return types['json']
+    if column in GIOCATORI_TEXT_COLUMNS:
+        return types['text']
+    if column in GIOCATORI_INTEGER_COLUMNS:
+        return types['integer']
+    return types['real']
+
+
+def giocatori_ddl(dialect='sqlite', table='giocatori'):
+    """CREATE TABLE statement for the canonical giocatori schema."""
+    defs = [f"    id {giocatori_column_type('id', dialect)} PRIMARY KEY"]
+    defs += [f"    {col} {giocatori_column_type(col, dialect)}" for col in GIOCATORI_COLUMNS if col != 'id']
+    defs.append("    last_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+    return f"CREATE TABLE IF NOT EXISTS {table} (\n" + ",\n".join(defs) + "\n)"
+
+
+def giocatori_index_ddl(table='giocatori', index_table=None):
+    """
+    CREATE INDEX statements for `table`. Index names are derived from `index_table`
+    (default: `table`) so a staging table can be built with the final index names.
+    """
+    index_table = index_table or table
+    return [
+        f"CREATE INDEX IF NOT EXISTS idx_{index_table}_{name} ON {table} ({', '.join(columns)})"
+        for name, columns in GIOCATORI_INDEXES.items()
+    ]
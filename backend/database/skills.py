@@ -0,0 +1,91 @@
+import sys
+
+# Skill tag dictionary. The tags are the ones emitted by
+# backend.data.feature_engineering.tag_rules; a tag's position in SKILL_TAGS is
+# its bit in giocatori.skills_mask and its id in the skill_tags table, so new
+# tags must be appended, never inserted or reordered.
+SKILL_TAGS = [
+    "Titolare", "Bomber", "Rifinitore", "Playmaker", "Cross Master", "Piazzati",
+    "Dominio Aereo", "Fisico", "Wall", "Pulitore D'area", "Cartellino Facile", "Falloso",
+    "Fragile", "Super Panchinaro", "Goal Testa", "Rigorista", "Pararigori", "Paratutto",
+]
+SKILL_BITS = {tag: bit for bit, tag in enumerate(SKILL_TAGS)}
+_BY_KEY = {tag.casefold(): tag for tag in SKILL_TAGS}
+
+assert len(SKILL_TAGS) <= 63, "skills_mask is a signed 64-bit integer"
+
+
+def normalize_skill(tag):
+    """Canonical spelling of a tag, or None if it is not in the dictionary."""
+    if not isinstance(tag, str):
+        return None
+    return _BY_KEY.get(tag.strip().casefold())
+
+
+def skills_mask(skills):
+    """Bitmask of a player's skills list; tags outside the dictionary are ignored."""
+    mask = 0
+    for tag in skills or []:
+        canonical = normalize_skill(tag)
+        if canonical is not None:
+            mask |= 1 << SKILL_BITS[canonical]
+    return mask
+
+
+def mask_for(tags):
+    """Bitmask for a query on `tags`; raises ValueError on an unknown tag."""
+    mask = 0
+    for tag in tags:
+        canonical = normalize_skill(tag)
+        if canonical is None:
+            raise ValueError(f"unknown skill tag: {tag}")
+        mask |= 1 << SKILL_BITS[canonical]
+    return mask
+
+
+def tags_from_mask(mask):
+    return [tag for bit, tag in enumerate(SKILL_TAGS) if mask >> bit & 1]
+
+
+def mask_matches(mask, query_mask, match='any'):
+    """True if a player's mask has any (or all) of the query bits."""
+    if match == 'all':
+        return mask & query_mask == query_mask
+    return mask & query_mask != 0
+
+
+# --- SQL: skill_tags dictionary and giocatori_skills join table ---
+
+SKILL_TABLES_DDL = [
+    "CREATE TABLE IF NOT EXISTS skill_tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    # No foreign key to giocatori: the player table is replaced wholesale by the bulk loader
+    "CREATE TABLE IF NOT EXISTS giocatori_skills ("
+    " player_id BIGINT NOT NULL, tag_id INTEGER NOT NULL, PRIMARY KEY (tag_id, player_id))",
+    "CREATE INDEX IF NOT EXISTS idx_giocatori_skills_player_id ON giocatori_skills (player_id)",
+]
+
+
+def load_skill_index(cur, dialect, players):
+    """
+    Rewrite the skill_tags dictionary and the giocatori_skills join table from
+    (player_id, skills list) pairs, inside the caller's transaction.
+    """
+    ph = '%s' if dialect == 'postgres' else '?'
+    cur.executemany(
+        f"INSERT INTO skill_tags (id, name) VALUES ({ph}, {ph}) ON CONFLICT(id) DO UPDATE SET name = excluded.name",
+        list(enumerate(SKILL_TAGS))
+    )
+    cur.execute("DELETE FROM giocatori_skills")
+    pairs, unknown = set(), set()
+    for player_id, skills in players:
+        for tag in skills or []:
+            canonical = normalize_skill(tag)
+            if canonical is None:
+                unknown.add(tag)
+            else:
+                pairs.add((player_id, SKILL_BITS[canonical]))
+    cur.executemany(f"INSERT INTO giocatori_skills (player_id, tag_id) VALUES ({ph}, {ph})", sorted(pairs))
+    if unknown:
+        print(f"\033[93m[Skills] tags not in SKILL_TAGS (not indexed): {sorted(map(str, unknown))}\033[0m",
+              file=sys.stderr)
+    return len(pairs)
@@ -0,0 +1,125 @@
+"""
+Spending AI credits: /api/use-ai-credit on a temporary SQLite database, directly,
+through the single-writer queue and behind a stand-in for the Postgres facade.
+
+    python -m pytest backend/tests
+"""
+import os
+import sqlite3
+from decimal import Decimal
+
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+import pytest
+
+from backend.api.utils.writes import spend_ai_credit
+from backend.api.utils.user_cache import _load_user_profile
+
+USER = 'google-sub-1'
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'credit.db')
+    monkeypatch.setenv('SQLITE_PATH', db_path)
+    monkeypatch.setenv('DB_TYPE', 'sqlite')
+    from backend.api.util import init_db
+    init_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO users (google_sub, plan, ai_credits) VALUES (?, 'free', 2)", (USER,))
+    return db_path
+
+
+@pytest.fixture(params=[False, True], ids=['direct', 'write_queue'])
+def client(request, db_path, monkeypatch):
+    from backend.api import util
+    from backend.api.utils import sqlite_writer
+    from backend.api.app import create_app
+    monkeypatch.setattr(util, 'verify_google_token', lambda token: {'sub': USER})
+    monkeypatch.setattr(sqlite_writer, 'SQLITE_WRITE_QUEUE', request.param)
+    monkeypatch.setattr(sqlite_writer, '_writer', None)
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def use_credit(client, cost):
+    return client.post('/api/use-ai-credit', json={'cost': cost}, headers={'Authorization': 'Bearer token'})
+
+
+def users_row(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT ai_credits, api_cost, spent_credits FROM users WHERE google_sub = ?",
+                            (USER,)).fetchone()
+
+
+def test_spend_returns_the_updated_row(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        assert spend_ai_credit(conn, USER, 0.5) == {'ai_credits': 1, 'api_cost': 0.5, 'spent_credits': 1}
+        assert spend_ai_credit(conn, USER, 0.5) == {'ai_credits': 0, 'api_cost': 1.0, 'spent_credits': 2}
+        assert spend_ai_credit(conn, USER, 0.5) is None
+        assert spend_ai_credit(conn, 'unknown', 0.5) is None
+    assert users_row(db_path) == (0, 1.0, 2)
+
+
+def test_use_ai_credit_until_exhausted(client, db_path):
+    resp = use_credit(client, 0.25)
+    assert resp.status_code == 200
+    assert resp.get_json()['data'] == {'ai_credits': 1, 'api_cost': 0.25, 'spent_credits': 1, 'call_cost': 0.25}
+    assert use_credit(client, 0.25).get_json()['data']['ai_credits'] == 0
+    resp = use_credit(client, 0.25)
+    assert resp.status_code == 403
+    assert resp.get_json()['error']['code'] == 'no_credits'
+    assert users_row(db_path) == (0, 0.5, 2)
+
+
+class DecimalDB:
+    """PostgresDB stand-in over SQLite: psycopg2 returns the NUMERIC api_cost as a Decimal."""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+
+    def execute(self, sql, params=()):
+        return _DecimalCursor(self.conn.execute(sql, params))
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+class _DecimalCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        row = dict(row)
+        if 'api_cost' in row:
+            row['api_cost'] = Decimal(str(row['api_cost']))
+        return row
+
+
+def test_use_ai_credit_with_numeric_api_cost(db_path, monkeypatch):
+    from backend.api import util
+    from backend.api.app import create_app
+    monkeypatch.setenv('RUN_MIGRATIONS', '0')
+    monkeypatch.setenv('DB_TYPE', 'postgres')
+    monkeypatch.setattr(util, 'verify_google_token', lambda token: {'sub': USER})
+    monkeypatch.setattr(util, 'get_pg_connection', lambda: DecimalDB(db_path))
+    app = create_app()
+    app.config['TESTING'] = True
+    resp = use_credit(app.test_client(), 0.25)
+    assert resp.status_code == 200
+    assert resp.get_json()['data'] == {'ai_credits': 1, 'api_cost': 0.25, 'spent_credits': 1, 'call_cost': 0.25}
+    assert users_row(db_path) == (1, 0.25, 1)
+    profile = _load_user_profile(DecimalDB(db_path), 'postgres', USER)
+    assert profile['api_cost'] == 0.25 and isinstance(profile['api_cost'], float)
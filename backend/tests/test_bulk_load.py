@@ -0,0 +1,94 @@
+"""
+Bulk reload of giocatori: staging table, validation and atomic swap on a migrated
+SQLite database, and the record loader's checks before anything is written.
+
+    python -m pytest backend/tests
+"""
+import json
+import sqlite3
+
+import pytest
+
+from backend.database.bulk_load import BulkLoadError, bulk_load_giocatori
+from backend.database.insert_giocatori import insert_giocatori_from_records
+from backend.database.migrations import migrate_database
+from backend.database.schema import GIOCATORI_INDEXES
+from backend.database.skills import skills_mask
+
+COLUMNS = ['id', 'player_name', 'goals_total', 'skills', 'skills_mask']
+
+
+def player_rows(n, start=1):
+    return [(i, f'Player {i}', float(i % 7), json.dumps(['Bomber'] if i % 2 else []), skills_mask(['Bomber'] if i % 2 else []))
+            for i in range(start, start + n)]
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'bulk.db')
+    monkeypatch.setenv('DB_TYPE', 'sqlite')
+    migrate_database('sqlite', db_path)
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def players(conn):
+    return conn.execute("SELECT id, player_name, goals_total, skills, skills_mask FROM giocatori ORDER BY id").fetchall()
+
+
+def test_reload_swaps_in_the_staged_rows(conn):
+    first = player_rows(10)
+    assert bulk_load_giocatori(first, conn, columns=COLUMNS)['rows'] == 10
+    second = player_rows(8, start=100)
+    stats = bulk_load_giocatori(second, conn, columns=COLUMNS)
+    assert (stats['rows'], stats['previous_rows']) == (8, 10)
+    assert players(conn) == second
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'giocatori_staging' not in tables
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'giocatori'")}
+    assert {f'idx_giocatori_{name}' for name in GIOCATORI_INDEXES} <= indexes
+    # the skill join table is rewritten with the players it belongs to
+    assert conn.execute("SELECT player_id FROM giocatori_skills ORDER BY player_id").fetchall() == \
+        [(i,) for i in range(100, 108) if i % 2]
+    targets = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'strategy_board_targets'").fetchone()[0]
+    assert 'REFERENCES giocatori(id)' in targets
+
+
+@pytest.mark.parametrize('rows, message', [([], 'empty'), (player_rows(4), 'min ratio')])
+def test_rejected_reload_leaves_the_table_untouched(conn, rows, message):
+    bulk_load_giocatori(player_rows(10), conn, columns=COLUMNS)
+    with pytest.raises(BulkLoadError, match=message):
+        bulk_load_giocatori(rows, conn, columns=COLUMNS)
+    assert players(conn) == player_rows(10)
+
+
+def test_failed_staging_insert_rolls_back(conn):
+    bulk_load_giocatori(player_rows(10), conn, columns=COLUMNS)
+    duplicate_ids = player_rows(10) + player_rows(1)
+    with pytest.raises(sqlite3.IntegrityError):
+        bulk_load_giocatori(duplicate_ids, conn, columns=COLUMNS)
+    assert players(conn) == player_rows(10)
+
+
+def test_records_are_canonicalized_and_loaded(conn):
+    records = [{'id': 7, 'player_name': 'Mario Rossi', 'Goals_total': 12, 'skills': "['Bomber', 'Rigorista']",
+                'scraper_only_field': 'x'},
+               {'player_name': 'Luca Bianchi', 'Goals_total': None, 'skills': None}]
+    insert_giocatori_from_records(records, conn=conn)
+    assert conn.execute("SELECT id, player_name, goals_total, skills, skills_mask FROM giocatori ORDER BY id").fetchall() == [
+        (7, 'Mario Rossi', 12.0, json.dumps(['Bomber', 'Rigorista']), skills_mask(['Bomber', 'Rigorista'])),
+        (8, 'Luca Bianchi', None, json.dumps([]), 0),
+    ]
+
+
+@pytest.mark.parametrize('records, message', [
+    ([], 'empty'),
+    # a renamed scraper field: as many rows as before, but every data column would be NULL
+    ([{'id': i, 'nome_giocatore': f'Player {i}', 'gol': 1} for i in range(1, 11)], 'maps to a giocatori column'),
+])
+def test_unusable_records_are_refused_before_the_swap(conn, records, message):
+    bulk_load_giocatori(player_rows(10), conn, columns=COLUMNS)
+    with pytest.raises(BulkLoadError, match=message):
+        insert_giocatori_from_records(records, conn=conn)
+    assert players(conn) == player_rows(10)
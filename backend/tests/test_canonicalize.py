@@ -0,0 +1,82 @@
+"""
+Columnar canonicalization of the player loaders against the previous row-by-row
+path, its edge cases, and the round trip through SQLite back to load_players().
+
+    python -m pytest backend/tests
+"""
+import os
+import json
+import math
+
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+import numpy as np
+import pandas as pd
+
+from backend.api.utils.sqlite_profile import connect_sqlite
+from backend.benchmarks.canonicalize import rowwise_canonicalize, synthetic_frame
+from backend.database.bulk_load import bulk_load_giocatori
+from backend.database.canonicalize import canonicalize_players
+from backend.database.migrations import migrate_database
+from backend.database.schema import GIOCATORI_COLUMNS
+from backend.database.skills import skills_mask
+
+COLUMNS = ['id', 'player_name', 'season_id', 'goals_total', 'stars', 'skills', 'skills_mask']
+
+
+def test_matches_the_rowwise_path():
+    df = synthetic_frame(200)
+    assert canonicalize_players(df, encode_json=True) == rowwise_canonicalize(df)
+
+
+def test_nulls_types_and_ids():
+    df = pd.DataFrame({
+        'id': [10, None, 3, None],
+        'player_name': ['Rossi', None, np.nan, 7],
+        'season_id': [2024.0, np.nan, '2025', 'n/a'],
+        'Goals_total': [1, np.inf, -np.inf, '3.5'],
+        'stars': [4.5, None, 'x', 2],
+        'unmapped': [1, 2, 3, 4],
+    })
+    rows = canonicalize_players(df, COLUMNS)
+    assert [row[:5] for row in rows] == [
+        [10, 'Rossi', 2024, 1.0, 4.5],
+        [11, None, None, None, None],
+        [3, None, 2025, None, None],
+        [12, '7', None, 3.5, 2.0],
+    ]
+    assert all(type(row[0]) is int for row in rows) and type(rows[0][2]) is int
+
+
+def test_skills_lists_and_mask():
+    skills = [['Bomber', 'Rigorista'], "['Titolare']", 'Bomber, Piazzati', 'Wall', '', None, np.nan, ['Bomber', 'Bomber']]
+    df = pd.DataFrame({'id': range(1, len(skills) + 1), 'skills': pd.Series(skills, dtype=object)})
+    expected = [['Bomber', 'Rigorista'], ['Titolare'], ['Bomber', 'Piazzati'], ['Wall'], [], [], [], ['Bomber', 'Bomber']]
+    rows = canonicalize_players(df, COLUMNS)
+    assert [row[5] for row in rows] == expected
+    assert [row[6] for row in rows] == [skills_mask(s) for s in expected]
+    # equal-length lists stay lists, and SQL gets JSON text
+    assert [row[5] for row in canonicalize_players(df, COLUMNS, encode_json=True)] == [json.dumps(s) for s in expected]
+
+
+def test_round_trip_through_sqlite(tmp_path, monkeypatch):
+    from backend.api.routes.giocatori import load_players
+    db_path = str(tmp_path / 'players.db')
+    monkeypatch.setenv('DB_TYPE', 'sqlite')
+    migrate_database('sqlite', db_path)
+    df = synthetic_frame(50)
+    conn = connect_sqlite(db_path)
+    bulk_load_giocatori(canonicalize_players(df, encode_json=True), conn)
+    conn.close()
+
+    expected = [dict(zip(GIOCATORI_COLUMNS, row)) for row in canonicalize_players(df)]
+    loaded = sorted(load_players('sqlite', db_path), key=lambda p: p['id'])
+    assert len(loaded) == len(expected)
+    for got, want in zip(loaded, expected):
+        assert got.pop('last_modified')
+        assert got.keys() == want.keys()
+        for column, value in want.items():
+            if isinstance(value, float):
+                assert math.isclose(got[column], value), column
+            else:
+                assert got[column] == value, column
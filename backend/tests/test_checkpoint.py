@@ -0,0 +1,93 @@
+"""
+Checkpoint manifest of an ingestion run: resuming, retrying failed players,
+--since refreshes and pruning of superseded Parquet parts.
+
+    python -m pytest backend/tests
+"""
+import os
+import time
+
+import pytest
+
+from backend.data.checkpoint import CheckpointManifest, latest_run
+
+TEAM = 7
+SEASON = 2024
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    return str(tmp_path / 'ingest' / 'run-001')
+
+
+def write_part(run_dir, name):
+    path = os.path.join(run_dir, 'parts', name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'PAR1')
+    return os.path.abspath(path)
+
+
+def test_resumed_run_skips_what_is_done(run_dir):
+    manifest = CheckpointManifest(run_dir)
+    manifest.record_squad(TEAM, SEASON, [1, 2, 3, 4])
+    manifest.record_players(TEAM, [(1, {SEASON: 'h1'}), (2, {SEASON: 'h2'})], write_part(run_dir, 'a.parquet'))
+    manifest.close()
+
+    resumed = CheckpointManifest(run_dir)
+    assert resumed.squad(TEAM, SEASON) == [1, 2, 3, 4]
+    assert resumed.squad(TEAM, SEASON + 1) is None
+    assert resumed.needs_fetch(resumed.squad(TEAM, SEASON)) == [3, 4]
+    assert resumed.needs_fetch([]) == []
+    assert resumed.summary() == {'players_done': 2, 'players_failed': 0, 'squads_done': 1, 'squads_failed': 0}
+    resumed.close()
+    assert latest_run(os.path.dirname(run_dir)) == run_dir
+
+
+def test_failed_squad_is_refetched(run_dir):
+    manifest = CheckpointManifest(run_dir)
+    manifest.record_squad(TEAM, SEASON, error='HTTP 500')
+    assert manifest.squad(TEAM, SEASON) is None
+    manifest.record_squad(TEAM, SEASON, [1, 2])
+    assert manifest.squad(TEAM, SEASON) == [1, 2]
+    assert manifest.summary()['squads_failed'] == 0
+
+
+def test_failed_player_is_retried(run_dir):
+    manifest = CheckpointManifest(run_dir)
+    manifest.record_player_failure(5, TEAM, 'timeout')
+    assert manifest.needs_fetch([5, 6]) == [5, 6]
+    assert manifest.summary()['players_failed'] == 1
+
+    part = write_part(run_dir, 'a.parquet')
+    manifest.record_players(TEAM, [(5, {SEASON: 'h5'})], part)
+    assert manifest.needs_fetch([5, 6]) == [6]
+    assert manifest.summary()['players_failed'] == 0
+
+    # a later failure is retried, but the rows of the previous fetch stay in the output
+    manifest.record_player_failure(5, TEAM, 'timeout')
+    assert manifest.needs_fetch([5]) == [5]
+    assert manifest.current_parts() == {part: {5}}
+
+
+def test_since_refreshes_players_fetched_before_the_team_played(run_dir):
+    manifest = CheckpointManifest(run_dir)
+    manifest.record_players(TEAM, [(1, None), (2, None)], None)
+    assert manifest.needs_fetch([1, 2, 3], changed_after=0) == [3]
+    assert manifest.needs_fetch([1, 2, 3], changed_after=time.time() + 60) == [1, 2, 3]
+
+
+def test_prune_keeps_only_each_players_latest_part(run_dir):
+    manifest = CheckpointManifest(run_dir)
+    first, second = write_part(run_dir, 'a.parquet'), write_part(run_dir, 'b.parquet')
+    unrecorded = write_part(run_dir, 'c.parquet')
+    manifest.record_players(TEAM, [(1, None), (2, None)], first)
+    manifest.record_players(TEAM, [(1, None)], second)  # player 1 refetched
+    assert manifest.current_parts() == {first: {2}, second: {1}}
+    assert manifest.prune_parts([first, second, unrecorded]) == 1
+    assert not os.path.exists(unrecorded)
+
+    manifest.record_players(TEAM, [(2, None)], second)
+    assert manifest.prune_parts([first, second]) == 1
+    assert not os.path.exists(first) and os.path.exists(second)
+    assert manifest.prune_parts([second]) == 0
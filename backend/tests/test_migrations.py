@@ -0,0 +1,116 @@
+"""
+Versioned SQLite migrations: an empty database and databases created before the
+migrations (scraper-format or canonical giocatori) brought to head, then re-run.
+
+    python -m pytest backend/tests
+"""
+import os
+import json
+import sqlite3
+
+import pytest
+
+from backend.database.migrations import (
+    DATABASE_DIR, MIGRATIONS, _V002_GIOCATORI_COLUMNS, _V003_GIOCATORI_INDEXES, run_migrations, table_columns,
+)
+from backend.database.skills import skills_mask
+
+HEAD = [version for version, _, _ in MIGRATIONS]
+GIOCATORI_COLUMNS = set(_V002_GIOCATORI_COLUMNS) | {'last_modified', 'skills_mask'}
+
+# giocatori as created by the init script before the migrations (scraper format)
+LEGACY_GIOCATORI = """
+CREATE TABLE giocatori (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    cognome TEXT,
+    punteggio REAL,
+    skills TEXT,
+    squadra TEXT,
+    quota_attuale INTEGER,
+    last_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'migrations.db'), isolation_level=None)
+    yield conn
+    conn.close()
+
+
+def baseline(conn, giocatori_ddl):
+    """The tables of the init script, with giocatori as created by `giocatori_ddl`."""
+    conn.execute(giocatori_ddl)
+    with open(os.path.join(DATABASE_DIR, 'init.sqlite.sql')) as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO users (google_sub, plan, ai_credits) VALUES ('sub', 'pro', 7)")
+
+
+def schema_versions(conn):
+    return [version for (version,) in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+
+
+def schema(conn):
+    return sorted(conn.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"))
+
+
+def assert_at_head(conn):
+    assert schema_versions(conn) == HEAD
+    cur = conn.cursor()
+    assert table_columns(cur, 'sqlite', 'giocatori') == GIOCATORI_COLUMNS
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {f'idx_giocatori_{name}' for name in _V003_GIOCATORI_INDEXES} <= indexes
+    assert 'idx_processed_sessions_google_sub' in indexes
+    assert table_columns(cur, 'sqlite', 'skill_tags') and table_columns(cur, 'sqlite', 'giocatori_skills')
+    # a re-run applies nothing and changes nothing
+    before = schema(conn)
+    assert run_migrations(conn) == []
+    assert schema_versions(conn) == HEAD
+    assert schema(conn) == before
+
+
+def test_empty_database_to_head(conn):
+    assert run_migrations(conn) == HEAD
+    assert_at_head(conn)
+    assert conn.execute("SELECT COUNT(*) FROM giocatori").fetchone() == (0,)
+    types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(giocatori)")}
+    assert (types['id'], types['skills'], types['stars'], types['skills_mask']) == ('INTEGER', 'TEXT', 'REAL', 'INTEGER')
+
+
+def test_scraper_format_giocatori_is_kept_as_legacy(conn):
+    baseline(conn, LEGACY_GIOCATORI)
+    conn.execute("INSERT INTO giocatori (nome, cognome, skills) VALUES ('Mario', 'Rossi', '[\"Bomber\"]')")
+    assert run_migrations(conn) == HEAD
+    assert_at_head(conn)
+    assert conn.execute("SELECT nome FROM giocatori_legacy").fetchall() == [('Mario',)]
+    assert conn.execute("SELECT COUNT(*) FROM giocatori").fetchone() == (0,)
+    assert conn.execute("SELECT plan, ai_credits FROM users").fetchall() == [('pro', 7)]
+    # foreign keys still point at giocatori, not at the renamed table
+    targets = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'strategy_board_targets'").fetchone()[0]
+    assert 'giocatori_legacy' not in targets and 'REFERENCES giocatori' in targets
+
+
+def test_empty_scraper_format_giocatori_is_dropped(conn):
+    baseline(conn, LEGACY_GIOCATORI)
+    assert run_migrations(conn) == HEAD
+    assert_at_head(conn)
+    assert not table_columns(conn.cursor(), 'sqlite', 'giocatori_legacy')
+
+
+def test_canonical_rows_are_carried_over_with_their_skills(conn):
+    baseline(conn, "CREATE TABLE giocatori (id INTEGER PRIMARY KEY, player_name TEXT, stars REAL, skills TEXT)")
+    players = [(1, 'Mario Rossi', 4.5, ['Bomber', 'Rigorista']), (2, 'Luca Bianchi', 3.0, []),
+               (3, 'Marco Verdi', None, ['rigorista', 'Unknown tag'])]
+    conn.executemany("INSERT INTO giocatori (id, player_name, stars, skills) VALUES (?, ?, ?, ?)",
+                     [(pid, name, stars, json.dumps(skills)) for pid, name, stars, skills in players])
+    assert run_migrations(conn) == HEAD
+    assert_at_head(conn)
+    rows = conn.execute("SELECT id, player_name, stars, skills, skills_mask FROM giocatori ORDER BY id").fetchall()
+    assert rows == [(pid, name, stars, json.dumps(skills), skills_mask(skills)) for pid, name, stars, skills in players]
+    tagged = conn.execute(
+        "SELECT s.player_id, t.name FROM giocatori_skills s JOIN skill_tags t ON t.id = s.tag_id"
+        " ORDER BY s.player_id, t.name"
+    ).fetchall()
+    assert tagged == [(1, 'Bomber'), (1, 'Rigorista'), (3, 'Rigorista')]
@@ -0,0 +1,63 @@
+"""
+Request planning for Sportmonks ingestion: call and payload estimates of each
+request shape, and the choice between them.
+
+    python -m pytest backend/tests
+"""
+from backend.data.planner import estimate, include_depth, includes, plan
+
+
+def test_first_run_estimates():
+    # two squads not fetched yet: SQUAD_SIZE players assumed for each
+    assert estimate({1: None, 2: None}, {1: None, 2: None}, per_page=50) == {
+        'league': {'calls': 1, 'payloads': 60},
+        'team': {'calls': 2, 'payloads': 60},
+        'player': {'calls': 2 + 60, 'payloads': 60},
+    }
+    strategy, estimates = plan({1: None, 2: None}, {1: None, 2: None}, per_page=50)
+    assert strategy == 'league' and all(e['allowed'] for e in estimates.values())
+
+
+def test_pages_follow_per_page():
+    squads = {team_id: 60 for team_id in range(120)}
+    estimates = estimate(squads, dict.fromkeys(squads), per_page=50)
+    assert estimates['league']['calls'] == 3
+    assert estimates['team']['calls'] == 240
+
+
+def test_resumed_run_plans_the_work_left():
+    # squads known from the manifest; only three players of team 2 still to fetch
+    squads, todo = {1: 25, 2: 40}, {1: 0, 2: 3}
+    assert estimate(squads, todo, per_page=50) == {
+        'league': {'calls': 1, 'payloads': 65},
+        'team': {'calls': 1, 'payloads': 40},
+        'player': {'calls': 3, 'payloads': 3},
+    }
+    # league and team tie on calls: fewer payloads wins
+    assert plan(squads, todo, per_page=50)[0] == 'team'
+    # --since refreshes every squad listing: per-player requests now also page the squads
+    assert estimate(squads, todo, refresh_squads=True, per_page=50)['player']['calls'] == 2 + 3
+
+
+def test_nothing_left_to_fetch():
+    strategy, estimates = plan({1: 25, 2: 40}, {1: 0, 2: 0})
+    assert strategy == 'player'
+    assert all(e['calls'] == 0 and e['payloads'] == 0 for e in estimates.values())
+
+
+def test_include_depth_limits_the_shapes():
+    assert [include_depth(i) for i in includes().values()] == [4, 3, 2]
+    assert [include_depth(i) for i in includes(type_names=True).values()] == [5, 4, 3]
+    squads, todo = {1: None, 2: None}, {1: None, 2: None}
+    strategy, estimates = plan(squads, todo, per_page=50, max_include_depth=3)
+    assert strategy == 'team' and not estimates['league']['allowed']
+    strategy, estimates = plan(squads, todo, per_page=50, max_include_depth=3, type_names=True)
+    assert strategy == 'player'
+    assert estimates['player']['include'] == 'statistics.details.type'
+    # nothing allowed at all: per-player requests are the fallback
+    assert plan(squads, todo, max_include_depth=1)[0] == 'player'
+
+
+def test_forced_strategy():
+    strategy, estimates = plan({1: None}, {1: None}, strategy='team')
+    assert strategy == 'team' and estimates['league']['calls'] == 1
@@ -0,0 +1,99 @@
+"""
+The memory-mapped player snapshot against the in-memory record path it replaces
+for /api/giocatori: same JSON body, same query results (NaN ordering, skill
+filters) and the same dataset version.
+
+    python -m pytest backend/tests
+"""
+import os
+import json
+
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+import pytest
+
+from backend.api.routes.giocatori import _records_dataset, dataset_players, query_players, skill_counts
+from backend.api.utils.player_record import dumps_records
+from backend.api.utils.player_snapshot import publish_snapshot, open_snapshot, current_version, dataset_version
+from backend.database.skills import skills_mask
+
+SKILLS = [['Bomber', 'Rigorista'], [], ['Titolare'], ['Bomber'], ['Titolare', 'Pararigori', 'Paratutto'], []]
+
+
+def players():
+    """Rows as load_players() returns them from SQL: NULLs, skills decoded to lists."""
+    giocatori = []
+    for i in range(24):
+        skills = SKILLS[i % len(SKILLS)]
+        giocatori.append({
+            'id': i + 1,
+            'player_name': f'Player {i}',
+            'position': 'ACDP'[i % 4],
+            'current_team': None if i % 9 == 0 else f'Team {i % 3}',
+            'stars': None if i % 5 == 0 else float(i % 4),  # NULLs and ties
+            'goals_total': i % 7,
+            'season_id': None if i % 6 == 0 else 2024,  # INTEGER column with NULLs
+            'price_expected': i * 1.5,
+            'skills': skills,
+            'skills_mask': skills_mask(skills),
+        })
+    return giocatori
+
+
+@pytest.fixture
+def datasets(tmp_path):
+    giocatori = players()
+    version = dataset_version(giocatori)
+    publish_snapshot(giocatori, version, str(tmp_path))
+    snapshot = open_snapshot(snapshot_dir=str(tmp_path))
+    return ({'snapshot': snapshot, 'giocatori': None, 'version': snapshot.version},
+            _records_dataset(players(), version))
+
+
+def test_snapshot_is_published_as_current(tmp_path):
+    giocatori = players()
+    version = dataset_version(giocatori)
+    publish_snapshot(giocatori, version, str(tmp_path))
+    assert current_version(str(tmp_path)) == version
+    snapshot = open_snapshot(snapshot_dir=str(tmp_path))
+    assert (snapshot.version, len(snapshot)) == (version, len(giocatori))
+
+
+def test_full_list_matches_the_record_path(datasets):
+    snapshot, records = datasets
+    assert snapshot['version'] == records['version']
+    encoded = dumps_records(dataset_players(snapshot))
+    assert encoded == dumps_records(dataset_players(records))
+    decoded = json.loads(encoded)
+    assert [p['skills'] for p in decoded] == [SKILLS[i % len(SKILLS)] for i in range(24)]
+    assert decoded[0]['stars'] is None and decoded[0]['season_id'] is None
+
+
+@pytest.mark.parametrize('query', [
+    {'sort': 'stars'},
+    {'sort': 'stars', 'descending': True},
+    {'sort': 'price_expected', 'descending': True, 'limit': 5},
+    {'sort': 'season_id', 'descending': True},
+    {'sort': 'season_id'},
+    {'position': 'A', 'sort': 'goals_total', 'descending': True},
+    {'team': 'Team 1'},
+    {'skills': ['bomber']},
+    {'skills': ['Titolare', 'Pararigori'], 'skills_match': 'all', 'sort': 'stars'},
+    {'position': 'X'},
+])
+def test_queries_match_the_record_path(datasets, query):
+    snapshot, records = datasets
+    expected = query_players(records, **query)
+    assert dumps_records(query_players(snapshot, **query)) == dumps_records(expected)
+
+
+def test_skill_counts_match_the_record_path(datasets):
+    snapshot, records = datasets
+    assert skill_counts(snapshot) == skill_counts(records)
+    assert skill_counts(snapshot)['Bomber'] == 8
+
+
+def test_unknown_skill_tag_is_rejected(datasets):
+    for dataset in datasets:
+        with pytest.raises(ValueError):
+            query_players(dataset, skills=['Not a tag'])
@@ -0,0 +1,102 @@
+"""
+SQLiteWriter: group commit, per-write savepoints and the failure paths of a batch.
+
+    python -m pytest backend/tests
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from backend.api.utils.sqlite_writer import SQLiteWriter
+
+TIMEOUT = 10
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '0')
+    path = str(tmp_path / 'writer.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (k TEXT PRIMARY KEY)")
+    return path
+
+
+def insert(conn, key):
+    conn.execute("INSERT INTO t (k) VALUES (?)", (key,))
+    return key
+
+
+def keys(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {k for (k,) in conn.execute("SELECT k FROM t")}
+
+
+def hold(writer):
+    """Occupy the writer thread until the returned event is set, so later writes queue up as one batch."""
+    started, release = threading.Event(), threading.Event()
+
+    def blocker(conn):
+        started.set()
+        release.wait(TIMEOUT)
+    future = writer.submit(blocker)
+    assert started.wait(TIMEOUT)
+    return future, release
+
+
+def test_queued_writes_commit_as_one_batch(db_path):
+    writer = SQLiteWriter(db_path, max_wait_ms=0)
+    blocker, release = hold(writer)
+    futures = [writer.submit(insert, str(i)) for i in range(5)]
+    release.set()
+    assert [f.result(TIMEOUT) for f in futures] == ['0', '1', '2', '3', '4']
+    blocker.result(TIMEOUT)
+    assert writer.stats == {'writes': 6, 'batches': 2, 'failed': 0}
+    assert keys(db_path) == {'0', '1', '2', '3', '4'}
+
+
+def test_failing_write_rolls_back_to_its_savepoint(db_path):
+    def insert_then_fail(conn, key):
+        insert(conn, key)
+        raise ValueError(key)
+
+    writer = SQLiteWriter(db_path, max_wait_ms=0)
+    _, release = hold(writer)
+    first = writer.submit(insert, 'a')
+    failing = writer.submit(insert_then_fail, 'b')
+    last = writer.submit(insert, 'c')
+    release.set()
+    assert first.result(TIMEOUT) == 'a' and last.result(TIMEOUT) == 'c'
+    with pytest.raises(ValueError):
+        failing.result(TIMEOUT)
+    assert keys(db_path) == {'a', 'c'}
+    assert writer.stats['failed'] == 1
+
+
+def test_locked_database_fails_every_write_of_the_batch(db_path):
+    # a wait long enough for the three writes to be collected into one batch
+    writer = SQLiteWriter(db_path, max_wait_ms=200)
+    assert writer.submit(insert, 'before').result(TIMEOUT) == 'before'
+    holder = sqlite3.connect(db_path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    futures = [writer.submit(insert, str(i)) for i in range(3)]
+    for future in futures:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            future.result(TIMEOUT)
+    holder.execute('ROLLBACK')
+    holder.close()
+    # the writer thread survives the failed batch
+    assert writer.submit(insert, 'after').result(TIMEOUT) == 'after'
+    assert keys(db_path) == {'before', 'after'}
+
+
+def test_failed_connect_is_reported_and_retried(tmp_path):
+    path = tmp_path / 'missing' / 'writer.db'
+    writer = SQLiteWriter(str(path), max_wait_ms=0)
+    with pytest.raises(sqlite3.OperationalError):
+        writer.submit(insert, 'x').result(TIMEOUT)
+    path.parent.mkdir()
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (k TEXT PRIMARY KEY)")
+    assert writer.submit(insert, 'x').result(TIMEOUT) == 'x'
+    assert keys(str(path)) == {'x'}
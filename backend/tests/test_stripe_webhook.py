@@ -0,0 +1,127 @@
+"""
+Stripe webhook fulfilment, driven by a local fake Stripe event source: events
+are signed with STRIPE_WEBHOOK_SECRET the way Stripe signs them and posted to
+/api/stripe-webhook of an app backed by a temporary SQLite database.
+
+    python -m pytest backend/tests
+"""
+import os
+import json
+import time
+import hmac
+import sqlite3
+import hashlib
+
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+import pytest
+
+SECRET = 'whsec_test'
+USER = 'google-sub-1'
+
+
+def sign(payload, secret=SECRET, timestamp=None):
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def fake_event(session_id, payment_status='paid', plan='basic', credits=0,
+               event_type='checkout.session.completed'):
+    metadata = {'plan': plan, 'credits': str(credits)} if credits else {'plan': plan}
+    return json.dumps({
+        'id': f"evt_{session_id}_{event_type}_{payment_status}",
+        'object': 'event',
+        'type': event_type,
+        'data': {'object': {'id': session_id, 'object': 'checkout.session', 'client_reference_id': USER,
+                            'payment_status': payment_status, 'metadata': metadata}},
+    })
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'webhook.db')
+    monkeypatch.setenv('SQLITE_PATH', db_path)
+    monkeypatch.setenv('DB_TYPE', 'sqlite')
+    monkeypatch.setenv('STRIPE_WEBHOOK_SECRET', SECRET)
+    from backend.api.util import init_db
+    from backend.api.app import create_app
+    init_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO users (google_sub, plan, ai_credits) VALUES (?, 'free', 5)", (USER,))
+    app = create_app()
+    app.config['TESTING'] = True
+    app.db_path = db_path
+    return app
+
+
+@pytest.fixture
+def post(app):
+    client = app.test_client()
+
+    def post(payload, signature=None):
+        return client.post('/api/stripe-webhook', data=payload, content_type='application/json',
+                           headers={'Stripe-Signature': signature or sign(payload)})
+    return post
+
+
+def user(app):
+    with sqlite3.connect(app.db_path) as conn:
+        return conn.execute("SELECT plan, ai_credits, last_session_id FROM users WHERE google_sub = ?",
+                            (USER,)).fetchone()
+
+
+def session_status(app, session_id):
+    with sqlite3.connect(app.db_path) as conn:
+        return conn.execute("SELECT payment_status FROM checkout_sessions WHERE session_id = ?",
+                            (session_id,)).fetchone()[0]
+
+
+def test_valid_signature_applies_the_plan(app, post):
+    resp = post(fake_event('cs_plan', plan='pro'))
+    assert resp.status_code == 200
+    assert resp.get_json()['data'] == {'received': True}
+    assert user(app) == ('pro', 55, 'cs_plan')
+    assert session_status(app, 'cs_plan') == 'paid'
+
+
+def test_bad_signature_is_rejected(app, post):
+    payload = fake_event('cs_forged', plan='enterprise')
+    resp = post(payload, signature=sign(payload, secret='whsec_other'))
+    assert resp.status_code == 400
+    assert resp.get_json()['error']['code'] == 'invalid_signature'
+    assert user(app) == ('free', 5, None)
+
+
+def test_duplicate_delivery_grants_credits_once(app, post):
+    payload = fake_event('cs_dup', plan='free', credits=20)
+    for _ in range(3):
+        assert post(payload).status_code == 200
+    assert user(app) == ('free', 25, 'cs_dup')
+
+
+def test_topup_keeps_the_plan_and_plan_purchase_changes_it(app, post):
+    assert post(fake_event('cs_topup', plan='free', credits=20)).status_code == 200
+    assert user(app) == ('free', 25, 'cs_topup')
+    assert post(fake_event('cs_change', plan='basic')).status_code == 200
+    assert user(app)[:2] == ('basic', 35)
+
+
+def test_unpaid_event_after_paid_does_not_downgrade(app, post):
+    assert post(fake_event('cs_late', plan='pro')).status_code == 200
+    for event_type, status in (('checkout.session.expired', 'unpaid'),
+                               ('checkout.session.async_payment_failed', 'unpaid'),
+                               ('checkout.session.completed', 'unpaid')):
+        assert post(fake_event('cs_late', status, plan='pro', event_type=event_type)).status_code == 200
+    assert session_status(app, 'cs_late') == 'paid'
+    assert user(app) == ('pro', 55, 'cs_late')
+
+
+def test_unpaid_then_paid_applies_once(app, post):
+    assert post(fake_event('cs_async', 'unpaid', plan='basic')).status_code == 200
+    assert user(app) == ('free', 5, None)
+    assert session_status(app, 'cs_async') == 'unpaid'
+    assert post(fake_event('cs_async', plan='basic',
+                           event_type='checkout.session.async_payment_succeeded')).status_code == 200
+    assert session_status(app, 'cs_async') == 'paid'
+    assert user(app) == ('basic', 15, 'cs_async')
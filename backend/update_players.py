@@ -70,11 +70,13 @@ from backend.database.insert_giocatori import insert_giocatori_from_csv_records,
 
 def player_processing_data_from_csv(filepath: str = '/Users/moltisantid/Personal/fantacalcio/player_statistics_2025-07-21_15-02-25_with_target_price_and_predictions.csv') -> None:
     df = pd.read_csv(filepath, sep=',')
-    # Clean NaN/inf values for JSON serialization
-    df = df.replace([float('nan'), float('inf'), float('-inf')], None)
-    # Also, replace pandas NaN with None
-    df = df.where(pd.notnull(df), None)
-    insert_giocatori_from_csv_records(df.to_dict(orient='records'))
+    # NaN/inf -> NULL and type coercion happen in the loader's canonicalization stage
+    insert_giocatori_from_csv_records(df)
+    # Also publish a versioned artifact for API nodes that serve from DATASET_ARTIFACT_URI
+    if os.getenv('DATASET_ARTIFACT_DIR'):
+        from backend.database.artifact import publish_artifact
+        from backend.database.canonicalize import canonicalize_players
+        publish_artifact(canonicalize_players(df), os.getenv('DATASET_ARTIFACT_DIR'))
     return
     
 
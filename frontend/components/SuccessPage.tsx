@@ -19,9 +19,18 @@ export const SuccessPage: React.FC = () => {
 
   useEffect(() => {
     if (!sessionId) return;
-    call<any>(`${BASE_URL}/api/checkout-session?sessionId=${sessionId}`)
+    // The payment is fulfilled by the Stripe webhook: poll the local status until it is no longer pending
+    const fetchStatus = async (attempt = 0): Promise<any> => {
+      const data = await call<any>(`${BASE_URL}/api/checkout-session?sessionId=${sessionId}`);
+      if (data.data.payment_status === 'pending' && attempt < 10) {
+        await new Promise(resolve => setTimeout(resolve, 1500));
+        return fetchStatus(attempt + 1);
+      }
+      return data;
+    };
+    fetchStatus()
       .then(data => {
-        const meta = data.data.metadata;
+        const meta = data.data.metadata || {};
         const postBody: any = { sessionId };
         if (meta.credits) {
           setCredits(Number(meta.credits));